@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0002_conversation_support_ticket"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["conversation", "timestamp", "id"],
+                name="message_conversation_time_idx",
+            ),
+        ),
+    ]
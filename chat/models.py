@@ -32,6 +32,9 @@ class Message(models.Model):
 
     class Meta:
         app_label = "chat"
+        indexes = [
+            models.Index(fields=["conversation", "timestamp", "id"], name="message_conversation_time_idx"),
+        ]
 
     is_edited = models.BooleanField(default=False)
     is_deleted = models.BooleanField(default=False)
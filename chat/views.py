@@ -2,6 +2,8 @@ from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 
+from tournaments.pagination import KeysetPagination
+
 from .models import Attachment, Conversation, Message
 from .permissions import IsParticipantInConversation, IsSenderOrReadOnly
 from .serializers import (AttachmentCreateSerializer, AttachmentSerializer,
@@ -35,6 +37,7 @@ class MessageViewSet(viewsets.ModelViewSet):
 
     queryset = Message.objects.all()
     permission_classes = [IsAuthenticated, IsSenderOrReadOnly]
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -44,7 +47,8 @@ class MessageViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return (
             Message.objects.filter(
-                conversation__in=self.request.user.conversations.all()
+                conversation_id=self.kwargs["conversation_pk"],
+                conversation__in=self.request.user.conversations.all(),
             )
             .select_related("sender")
             .prefetch_related("attachments")
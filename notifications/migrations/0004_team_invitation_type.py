@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notification",
+            name="notification_type",
+            field=models.CharField(
+                choices=[
+                    ("report_new", "New Report"),
+                    ("report_status_change", "Report Status Change"),
+                    ("winner_submission_required", "Winner Submission Required"),
+                    (
+                        "winner_submission_status_change",
+                        "Winner Submission Status Change",
+                    ),
+                    ("team_invitation", "Team Invitation"),
+                ],
+                default="report_status_change",
+                max_length=50,
+            ),
+        ),
+    ]
@@ -9,6 +9,7 @@ class Notification(models.Model):
         ("report_status_change", "Report Status Change"),
         ("winner_submission_required", "Winner Submission Required"),
         ("winner_submission_status_change", "Winner Submission Status Change"),
+        ("team_invitation", "Team Invitation"),
     )
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="notifications"
@@ -27,3 +28,7 @@ class Notification(models.Model):
 
     class Meta:
         app_label = "notifications"
+        indexes = [
+            models.Index(fields=["user", "is_read", "timestamp"], name="notification_user_read_idx"),
+            models.Index(fields=["user", "timestamp", "id"], name="notification_user_time_idx"),
+        ]
@@ -1,5 +1,8 @@
+import asyncio
+
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.db import transaction
 
 from .models import Notification
 
@@ -17,3 +20,39 @@ def send_notification(user, message, notification_type):
             "notification_type": notification_type,
         },
     )
+
+
+async def _group_send_many(channel_layer, user_ids, event):
+    await asyncio.gather(
+        *(
+            channel_layer.group_send(f"notifications_{user_id}", event)
+            for user_id in user_ids
+        )
+    )
+
+
+def send_notifications(user_ids, message, notification_type):
+    """
+    Sends the same notification to many users: one INSERT for the in-app
+    notifications and, once the transaction commits, a single hop into the
+    channel layer that pushes to every user's websocket group concurrently.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                user_id=user_id, message=message, notification_type=notification_type
+            )
+            for user_id in user_ids
+        ]
+    )
+    event = {
+        "type": "send_notification",
+        "message": message,
+        "notification_type": notification_type,
+    }
+    transaction.on_commit(
+        lambda: async_to_sync(_group_send_many)(get_channel_layer(), user_ids, event)
+    )
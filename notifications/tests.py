@@ -6,6 +6,7 @@ from django.test import TestCase, override_settings
 from tournaments.models import Game, Match, Tournament
 
 from .models import Notification
+from .services import send_notifications
 from .tasks import (send_email_notification, send_sms_notification,
                     send_tournament_credentials)
 
@@ -28,6 +29,37 @@ class NotificationModelTests(TestCase):
         self.assertEqual(notification.notification_type, "report_new")
 
 
+class SendNotificationsTests(TestCase):
+    def test_fans_out_in_app_and_websocket_notifications(self):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        users = [
+            User.objects.create_user(
+                username=f"fanout{i}", password="password", phone_number=f"+40{i}"
+            )
+            for i in range(3)
+        ]
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f"notifications_{users[1].id}", channel)
+
+        with self.assertNumQueries(1):
+            with self.captureOnCommitCallbacks(execute=True):
+                send_notifications(
+                    [user.id for user in users], "Hello", "team_invitation"
+                )
+
+        self.assertEqual(
+            Notification.objects.filter(
+                message="Hello", notification_type="team_invitation"
+            ).count(),
+            3,
+        )
+        event = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(event["message"], "Hello")
+
+
 class NotificationTaskTests(TestCase):
 
     def setUp(self):
@@ -183,18 +183,17 @@ def generate_marketing_report(filters=None):
         .order_by('-new_users')
     )
 
-    referred_user_ids = Referral.objects.filter(
-        created_at__range=[start_date, end_date]
-    ).values_list('referred_id', flat=True)
+    referrals = Referral.objects.filter(created_at__range=[start_date, end_date])
 
+    # Kept as a subquery; the ids are never loaded into Python.
     revenue_from_referred = Transaction.objects.filter(
-        wallet__user_id__in=referred_user_ids,
+        wallet__user_id__in=referrals.values('referred_id'),
         transaction_type='entry_fee'
     ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
 
     return {
         "summary": {
-            "total_referred_users": len(referred_user_ids),
+            "total_referred_users": referrals.count(),
             "revenue_from_referred_users": revenue_from_referred,
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
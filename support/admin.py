@@ -10,6 +10,8 @@ from django_select2.forms import Select2Widget
 # Local Imports
 from chat.models import Conversation
 from .models import SupportAssignment, Ticket, TicketMessage
+from .services import (close_tickets as close_ticket_queryset,
+                       record_ticket_status_change)
 
 
 # --- Inlines (Upgraded) ---
@@ -56,8 +58,13 @@ class TicketAdmin(SimpleHistoryAdmin, ModelAdmin):
         ("Timestamps", {"fields": ("created_at",), "classes": ("tab",)}),
     )
 
+    def save_model(self, request, obj, form, change):
+        previous_status = form.initial.get("status") if change else None
+        super().save_model(request, obj, form, change)
+        record_ticket_status_change(previous_status, obj.status)
+
     def close_tickets(self, request, queryset):
-        updated_count = queryset.update(status="closed")
+        updated_count = close_ticket_queryset(queryset)
         self.message_user(
             request,
             f"{updated_count} tickets have been marked as closed.",
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("support", "0002_supportassignment"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["status", "created_at"], name="ticket_status_idx"
+            ),
+        ),
+    ]
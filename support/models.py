@@ -21,6 +21,7 @@ class Ticket(models.Model):
 
     class Meta:
         app_label = "support"
+        indexes = [models.Index(fields=["status", "created_at"], name="ticket_status_idx")]
 
 
 class TicketMessage(models.Model):
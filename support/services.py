@@ -0,0 +1,31 @@
+from tournaments.alerts import adjust_alert_counter
+
+from .models import Ticket
+
+
+def create_ticket(user, title: str) -> Ticket:
+    """
+    Opens a new support ticket and bumps the open-ticket alert counter.
+    """
+    ticket = Ticket.objects.create(user=user, title=title)
+    adjust_alert_counter("open_tickets", 1)
+    return ticket
+
+
+def close_tickets(tickets) -> int:
+    """
+    Closes every open ticket in the given queryset and returns how many
+    tickets were closed.
+    """
+    closed = tickets.filter(status="open").update(status="closed")
+    adjust_alert_counter("open_tickets", -closed)
+    return closed
+
+
+def record_ticket_status_change(previous_status, new_status):
+    """
+    Keeps the open-ticket counter in sync when a ticket's status is edited
+    directly (e.g. from the admin change form).
+    """
+    delta = (new_status == "open") - (previous_status == "open")
+    adjust_alert_counter("open_tickets", delta)
@@ -20,3 +20,39 @@ class SupportTicketModelTests(TestCase):
         self.assertEqual(ticket.title, "Test Ticket")
         self.assertEqual(ticket.messages.count(), 1)
         self.assertEqual(message.message, "This is a test message.")
+
+
+class TicketAlertCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="password", phone_number="+123"
+        )
+
+    def test_counters_follow_ticket_lifecycle(self):
+        from tournaments.alerts import get_alert_counts
+
+        from .services import close_tickets, create_ticket
+
+        self.assertEqual(get_alert_counts()["open_tickets"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ticket(user=self.user, title="First")
+            create_ticket(user=self.user, title="Second")
+        self.assertEqual(get_alert_counts()["open_tickets"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            closed = close_tickets(Ticket.objects.filter(title="First"))
+        self.assertEqual(closed, 1)
+        self.assertEqual(get_alert_counts()["open_tickets"], 1)
+
+    def test_missing_counters_are_reconciled_from_database(self):
+        from django.core.cache import cache
+
+        from tournaments.alerts import get_alert_counts
+
+        Ticket.objects.create(user=self.user, title="Untracked")
+        cache.clear()
+        with self.assertNumQueries(2):
+            counts = get_alert_counts()
+        self.assertEqual(counts["open_tickets"], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_alert_counts()["open_tickets"], 1)
@@ -7,6 +7,7 @@ from users.permissions import IsAdminUser
 from .models import SupportAssignment, Ticket, TicketMessage
 from .serializers import (SupportAssignmentSerializer, TicketMessageSerializer,
                           TicketSerializer)
+from .services import create_ticket
 
 
 class TicketViewSet(viewsets.ModelViewSet):
@@ -23,7 +24,9 @@ class TicketViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.instance = create_ticket(
+            user=self.request.user, title=serializer.validated_data["title"]
+        )
 
 
 class TicketMessageViewSet(viewsets.ModelViewSet):
@@ -16,6 +16,7 @@ import sys
 from pathlib import Path
 
 import dj_database_url
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -58,6 +59,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "channels",
     "django_filters",
@@ -200,6 +202,17 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 PRIVATE_MEDIA_ROOT = os.path.join(BASE_DIR, "private_media")
 
+if "test" in sys.argv:
+    # Keep files uploaded by tests out of the source tree.
+    import atexit
+    import shutil
+    import tempfile
+
+    _TEST_MEDIA_DIR = tempfile.mkdtemp(prefix="tournament-test-media-")
+    atexit.register(shutil.rmtree, _TEST_MEDIA_DIR, ignore_errors=True)
+    MEDIA_ROOT = os.path.join(_TEST_MEDIA_DIR, "media")
+    PRIVATE_MEDIA_ROOT = os.path.join(_TEST_MEDIA_DIR, "private_media")
+
 # Custom Storage Settings
 STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local")
 
@@ -266,6 +279,12 @@ REST_FRAMEWORK = {
     ),
 }
 
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "users.tokens.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.tokens.VersionedTokenRefreshSerializer",
+    "TOKEN_USER_CLASS": "users.authentication.ClaimsUser",
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": f"{SITE_NAME} API",
     "DESCRIPTION": "API for managing tournaments, users, wallets, and more.",
@@ -345,6 +364,89 @@ CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
+CELERY_BEAT_SCHEDULE = {
+    "sweep-check-in-deadlines": {
+        "task": "tournaments.tasks.sweep_check_in_deadlines_task",
+        "schedule": 60.0,
+    },
+    "reconcile-admin-alert-counters": {
+        "task": "tournaments.tasks.reconcile_admin_alert_counters_task",
+        "schedule": 10 * 60.0,
+    },
+    "materialize-tournament-series": {
+        "task": "tournaments.tasks.materialize_tournament_series_task",
+        "schedule": 60 * 60.0,
+    },
+    "refresh-top-tournaments": {
+        "task": "tournaments.tasks.refresh_top_tournaments_task",
+        "schedule": 5 * 60.0,
+    },
+    "reconcile-platform-stats": {
+        "task": "tournaments.tasks.reconcile_platform_stats_task",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "reconcile-leaderboards": {
+        "task": "users.tasks.reconcile_leaderboards_task",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "purge-otp-audit": {
+        "task": "users.tasks.purge_otp_audit_task",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "reconcile-referral-stats": {
+        "task": "users.tasks.reconcile_referral_stats_task",
+        "schedule": crontab(hour=4, minute=30),
+    },
+    "take-ledger-balance-snapshots": {
+        "task": "wallet.tasks.take_balance_snapshots_task",
+        "schedule": 60 * 60.0,
+    },
+}
+
+# How far ahead recurring tournament series are materialized.
+TOURNAMENT_SERIES_HORIZON_DAYS = int(
+    os.environ.get("TOURNAMENT_SERIES_HORIZON_DAYS", 14)
+)
+
+# Number of tournaments kept in each precomputed top tournaments list.
+TOP_TOURNAMENTS_LIMIT = int(os.environ.get("TOP_TOURNAMENTS_LIMIT", 100))
+
+# Length in months of a per-game leaderboard season (must divide 12).
+LEADERBOARD_SEASON_MONTHS = int(os.environ.get("LEADERBOARD_SEASON_MONTHS", 3))
+
+# Upper bound in seconds on how long a cached user dashboard is served.
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get("DASHBOARD_CACHE_TIMEOUT", 300))
+
+# Upper bound in seconds on how long a cached public profile is served.
+PUBLIC_PROFILE_CACHE_TIMEOUT = int(os.environ.get("PUBLIC_PROFILE_CACHE_TIMEOUT", 600))
+
+# Postings younger than this are left out of ledger balance snapshots, so
+# entries still being committed are picked up by the next run.
+LEDGER_SNAPSHOT_LAG_SECONDS = int(os.environ.get("LEDGER_SNAPSHOT_LAG_SECONDS", 300))
+
+# How long the keys of committed wallet transactions are remembered in Redis
+# so retried requests are answered before a wallet row is locked.
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_KEY_TTL_SECONDS", 24 * 60 * 60))
+
+# Networks of the reverse proxies (nginx) allowed to report the client's
+# address in X-Real-IP / X-Forwarded-For. Only nginx publishes a port, so
+# the private ranges of the compose network are trusted by default.
+TRUSTED_PROXIES = [
+    network.strip()
+    for network in os.environ.get(
+        "TRUSTED_PROXIES", "127.0.0.1/32,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+    ).split(",")
+    if network.strip()
+]
+
+# One-time login codes (see users.otp). Send limits are (sends, seconds).
+OTP_LENGTH = 6
+OTP_TTL_SECONDS = int(os.environ.get("OTP_TTL_SECONDS", 300))
+OTP_MAX_ATTEMPTS = int(os.environ.get("OTP_MAX_ATTEMPTS", 5))
+OTP_SEND_LIMIT_PER_IDENTIFIER = (int(os.environ.get("OTP_SENDS_PER_IDENTIFIER", 3)), 600)
+OTP_SEND_LIMIT_PER_IP = (int(os.environ.get("OTP_SENDS_PER_IP", 20)), 600)
+OTP_AUDIT_ENABLED = os.environ.get("OTP_AUDIT_ENABLED", "True").lower() in ("true", "1", "t")
+OTP_AUDIT_RETENTION_DAYS = int(os.environ.get("OTP_AUDIT_RETENTION_DAYS", 30))
 if "test" in sys.argv:
     CELERY_TASK_ALWAYS_EAGER = True
     RATELIMIT_ENABLED = False
@@ -395,33 +497,34 @@ CACHES = {
     # },
 }
 if "test" in sys.argv:
+    # Tests run against an in-process fake Redis server so cache-backed
+    # services behave exactly as in production without a running Redis.
+    from fakeredis import FakeConnection
+
+    _TEST_REDIS_OPTIONS = {
+        "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        "CONNECTION_POOL_KWARGS": {"connection_class": FakeConnection},
+    }
     CACHES = {
         "default": {
             "BACKEND": "django_redis.cache.RedisCache",
             "LOCATION": f"{REDIS_URL}/1",
-            "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-            },
+            "OPTIONS": _TEST_REDIS_OPTIONS,
         },
         "connection-errors": {
             "BACKEND": "django_redis.cache.RedisCache",
             "LOCATION": f"{REDIS_URL}/1",
-            "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-            },
+            "OPTIONS": _TEST_REDIS_OPTIONS,
         },
         "connection-errors-redis": {
             "BACKEND": "django_redis.cache.RedisCache",
             "LOCATION": f"{REDIS_URL}/1",
-            "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-            },
+            "OPTIONS": _TEST_REDIS_OPTIONS,
         },
         "instant-expiration": {
             "BACKEND": "django_redis.cache.RedisCache",
             "LOCATION": f"{REDIS_URL}/1",
-            "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-            },
+            "OPTIONS": _TEST_REDIS_OPTIONS,
         },
     }
+    TEST_RUNNER = "tournament_project.test_runner.CacheIsolatedTestRunner"
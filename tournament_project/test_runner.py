@@ -0,0 +1,24 @@
+import unittest
+
+from django.core.cache import cache
+from django.test.runner import DiscoverRunner
+
+
+class CacheIsolatedTestRunner(DiscoverRunner):
+    """
+    A test runner that flushes the cache before every test.
+
+    Database changes are rolled back between tests but Redis is not, and
+    primary keys are reused after a rollback, so cached per-user or
+    per-tournament data would otherwise leak from one test into the next.
+    """
+
+    def get_resultclass(self):
+        base = super().get_resultclass() or unittest.TextTestResult
+
+        class CacheIsolatedResult(base):
+            def startTest(self, test):
+                cache.clear()
+                super().startTest(test)
+
+        return CacheIsolatedResult
@@ -1,6 +1,8 @@
 # Django Imports
 from django.contrib import admin
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 # 3rd-party Imports
 from unfold.admin import ModelAdmin, TabularInline
@@ -21,13 +23,17 @@ from .models import (
     Participant,
     Rank,
     Report,
+    RoundCheckIn,
     Scoring,
     Tournament,
     TournamentColor,
     TournamentImage,
+    TournamentSeries,
     WinnerSubmission,
 )
 from .mixins import AdminAlertsMixin
+from .services import (materialize_tournament_series, rebuild_match_participations,
+                       resolve_match_disputes)
 
 
 # --- Resources for django-import-export ---
@@ -39,6 +45,18 @@ class TournamentResource(resources.ModelResource):
         export_order = fields
 
 
+def _count_subquery(model):
+    """Counts `model` rows per tournament as a correlated subquery."""
+    counts = (
+        model.objects.filter(tournament=OuterRef("pk"))
+        .order_by()
+        .values("tournament")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
 # --- Inlines (using Unfold's TabularInline) ---
 
 class GameManagerInline(TabularInline):
@@ -58,26 +76,47 @@ class ParticipantInline(TabularInline):
     model = Participant
     extra = 0
     autocomplete_fields = ("user",)
-    classes = ["collapse"]
+    # Rendered in its own tab and paginated; Unfold loads each page via htmx.
+    tab = True
+    per_page = 20
+    ordering = ("id",)
 
 
 class MatchInline(TabularInline):
     model = Match
     extra = 0
-    autocomplete_fields = (
+    fields = (
+        "round", "participant1_user", "participant2_user",
+        "participant1_team", "participant2_team",
+        "winner_user", "winner_team", "is_confirmed", "is_disputed",
+    )
+    # Participants are edited from the match change page; rendering them as
+    # read-only text avoids an autocomplete lookup per FK per row.
+    readonly_fields = (
         "participant1_user", "participant2_user",
         "participant1_team", "participant2_team",
         "winner_user", "winner_team",
     )
     show_change_link = True
-    classes = ["collapse"]
+    tab = True
+    per_page = 20
+    ordering = ("round", "id")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            "participant1_user", "participant2_user",
+            "participant1_team", "participant2_team",
+            "winner_user", "winner_team",
+        )
 
 
 class ScoringInline(TabularInline):
     model = Scoring
     extra = 0
     autocomplete_fields = ("user",)
-    classes = ["collapse"]
+    tab = True
+    per_page = 20
+    ordering = ("-score", "id")
 
 
 class ReportInline(TabularInline):
@@ -146,19 +185,31 @@ class TournamentAdmin(
     ModelAdmin,
 ):
     resource_class = TournamentResource
-    list_display = ("name", "description", "image", "color", "game", "type", "mode", "start_date", "is_free")
+    list_display = ("name", "description", "image", "color", "game", "type", "mode", "start_date", "is_free", "participant_count", "match_count")
     list_display_links = ("name",)
     list_filter = ("type", "mode", "is_free", "game")
+    list_select_related = ("image", "color", "game", "creator")
     search_fields = ("name", "game__name")
     autocomplete_fields = ("image", "color", "game", "creator")
     history_list_display = ["history_type", "history_user", "history_date"]
 
     def get_queryset(self, request):
+        # Counts are correlated subqueries rather than prefetching every
+        # participant, so the changelist cost does not grow with event size.
         queryset = super().get_queryset(request)
-        return queryset.select_related("image", "game", "creator").prefetch_related(
-            "participants", "teams"
+        return queryset.select_related(*self.list_select_related).annotate(
+            participant_count=_count_subquery(Participant),
+            match_count=_count_subquery(Match),
         )
 
+    @admin.display(description="Participants", ordering="participant_count")
+    def participant_count(self, obj):
+        return obj.participant_count
+
+    @admin.display(description="Matches", ordering="match_count")
+    def match_count(self, obj):
+        return obj.match_count
+
     formfield_overrides = {
         models.ForeignKey: {"widget": Select2Widget},
     }
@@ -172,10 +223,34 @@ class TournamentAdmin(
     inlines = [ParticipantInline, MatchInline, ScoringInline]
 
 
+@admin.register(TournamentSeries)
+class TournamentSeriesAdmin(ModelAdmin):
+    list_display = ("name", "game", "frequency", "interval", "start_time", "is_active")
+    list_filter = ("is_active", "frequency", "game")
+    list_select_related = ("game",)
+    search_fields = ("name", "game__name")
+    autocomplete_fields = ("game", "image", "color", "creator")
+    actions = ["materialize_series"]
+
+    fieldsets = (
+        ("Schedule", {"fields": ("name", "is_active", "frequency", "interval", "starts_on", "ends_on", "start_time", "duration"), "classes": ("tab",)}),
+        ("Tournament Template", {"fields": ("game", "type", "mode", "max_participants", "team_size", "description", "rules", "image", "color", "creator"), "classes": ("tab",)}),
+        ("Prizes & Restrictions", {"fields": ("is_free", "entry_fee", "prize_pool", "required_verification_level", "min_rank", "max_rank"), "classes": ("tab",)}),
+    )
+
+    def materialize_series(self, request, queryset):
+        created_count = sum(
+            len(materialize_tournament_series(series)) for series in queryset
+        )
+        self.message_user(request, f"{created_count} tournaments created.", "success")
+    materialize_series.short_description = "Create upcoming tournaments for selected series"
+
+
 @admin.register(Participant)
 class ParticipantAdmin(SimpleHistoryAdmin, ModelAdmin):
     list_display = ("user", "tournament", "status", "rank", "prize")
     list_filter = ("status", "tournament")
+    list_select_related = ("user", "tournament")
     search_fields = ("user__username", "tournament__name")
     autocomplete_fields = ("user", "tournament")
     history_list_display = ["status"]
@@ -185,24 +260,52 @@ class ParticipantAdmin(SimpleHistoryAdmin, ModelAdmin):
 class MatchAdmin(SimpleHistoryAdmin, ModelAdmin):
     list_display = ("tournament", "round", "__str__", "is_confirmed", "is_disputed")
     list_filter = ("is_confirmed", "is_disputed", "tournament", "match_type")
+    list_select_related = (
+        "tournament", "participant1_user", "participant2_user",
+        "participant1_team", "participant2_team",
+    )
     search_fields = ("tournament__name", "participant1_user__username", "participant2_user__username")
     autocomplete_fields = ("tournament", "participant1_user", "participant2_user", "participant1_team", "participant2_team", "winner_user", "winner_team")
     inlines = [ReportInline]
     history_list_display = ["history_type", "history_user", "history_date"]
-    actions = ["confirm_matches"]
+    actions = ["confirm_matches", "resolve_disputes"]
 
     fieldsets = (
         ("Match Info", {"fields": ("tournament", "round", "match_type"), "classes": ("tab",)}),
         ("Participants", {"fields": ("participant1_user", "participant2_user", "participant1_team", "participant2_team"), "classes": ("tab",)}),
         ("Result & Status", {"fields": ("winner_user", "winner_team", "result_proof", "is_confirmed", "is_disputed", "dispute_reason"), "classes": ("tab",)}),
+        ("Check-in", {"fields": ("participant1_checked_in", "participant2_checked_in", "is_forfeit"), "classes": ("tab",)}),
         ("Connection", {"fields": ("room_id", "password"), "classes": ("tab",)}),
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        participant_fields = {
+            "participant1_user", "participant2_user",
+            "participant1_team", "participant2_team",
+        }
+        if change and participant_fields & set(form.changed_data):
+            rebuild_match_participations([obj])
+
     def confirm_matches(self, request, queryset):
         updated_count = queryset.update(is_confirmed=True)
         self.message_user(request, f"{updated_count} matches confirmed.", "success")
     confirm_matches.short_description = "Confirm selected matches"
 
+    def resolve_disputes(self, request, queryset):
+        resolved_count = resolve_match_disputes(queryset)
+        self.message_user(request, f"{resolved_count} disputes resolved.", "success")
+    resolve_disputes.short_description = "Resolve disputes on selected matches"
+
+
+@admin.register(RoundCheckIn)
+class RoundCheckInAdmin(ModelAdmin):
+    list_display = ("tournament", "round", "opens_at", "closes_at", "processed_at")
+    list_filter = ("processed_at",)
+    search_fields = ("tournament__name",)
+    autocomplete_fields = ("tournament",)
+    readonly_fields = ("processed_at",)
+
 
 @admin.register(Report)
 class ReportAdmin(ModelAdmin):
@@ -0,0 +1,68 @@
+"""
+Redis-backed counters feeding the admin alert banner (see AdminAlertsMixin).
+
+Counters are adjusted incrementally by the services that open and close
+support tickets and match disputes, and periodically reconciled against the
+database to correct any drift (e.g. rows deleted directly in the admin).
+"""
+
+from django.db import transaction
+from django_redis import get_redis_connection
+
+ALERT_COUNTER_KEYS = {
+    "open_tickets": "admin_alerts:open_tickets",
+    "open_disputes": "admin_alerts:open_disputes",
+}
+
+
+def _count_from_database(name):
+    # Imported lazily: support depends on tournaments, not the other way round.
+    from support.models import Ticket
+
+    from .models import Match
+
+    if name == "open_tickets":
+        return Ticket.objects.filter(status="open").count()
+    return Match.objects.filter(is_disputed=True).count()
+
+
+def reconcile_alert_counters():
+    """
+    Recomputes every counter from the database and stores it in Redis.
+    """
+    counts = {name: _count_from_database(name) for name in ALERT_COUNTER_KEYS}
+    get_redis_connection("default").mset(
+        {ALERT_COUNTER_KEYS[name]: count for name, count in counts.items()}
+    )
+    return counts
+
+
+def get_alert_counts():
+    """
+    Returns all alert counters with a single MGET, reconciling from the
+    database if any counter is missing (e.g. after a Redis flush).
+    """
+    names = list(ALERT_COUNTER_KEYS)
+    values = get_redis_connection("default").mget(
+        [ALERT_COUNTER_KEYS[name] for name in names]
+    )
+    if any(value is None for value in values):
+        return reconcile_alert_counters()
+    return {name: max(int(value), 0) for name, value in zip(names, values)}
+
+
+def adjust_alert_counter(name, delta):
+    """
+    Adjusts a counter once the surrounding transaction commits. Missing
+    counters are left alone; the next read rebuilds them from the database.
+    """
+    if not delta:
+        return
+    key = ALERT_COUNTER_KEYS[name]
+
+    def _apply():
+        client = get_redis_connection("default")
+        if client.exists(key):
+            client.incrby(key, delta)
+
+    transaction.on_commit(_apply)
@@ -3,10 +3,11 @@ from django.db.models import Q
 from django.utils import timezone
 
 from .models import Tournament
+from .search import search_queryset
 
 
 class TournamentFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(lookup_expr="icontains")
+    name = django_filters.CharFilter(method="filter_by_name")
     status = django_filters.ChoiceFilter(
         choices=(
             ("upcoming", "Upcoming"),
@@ -41,3 +42,6 @@ class TournamentFilter(django_filters.FilterSet):
         elif value == "finished":
             return queryset.filter(end_date__lt=now)
         return queryset
+
+    def filter_by_name(self, queryset, name, value):
+        return search_queryset(queryset, "name", value)
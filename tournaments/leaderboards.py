@@ -0,0 +1,223 @@
+"""
+Per-game leaderboards, all-time and per season, kept in Redis sorted sets.
+
+Each board maps user ids to the sum of their `Scoring.score` over the
+game's tournaments (optionally restricted to one season). Boards are
+refreshed for the affected users whenever scores are written, and can be
+bulk-loaded from the database with `rebuild_game_leaderboards` (or the
+`rebuild_game_leaderboards` management command). When the boards are
+missing, the first reader reloads them under a lock while other readers
+are served whatever the boards hold.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+GAME_BOARD_PREFIX = "leaderboard:game"
+GAME_BOARDS_BUILT_KEY = "leaderboard:game:built"
+GAME_BOARDS_LOCK_KEY = "leaderboard:game-rebuild-lock"
+REBUILD_LOCK_SECONDS = 300
+REBUILD_BATCH_SIZE = 1000
+
+
+def season_for(moment):
+    """
+    Returns the season label (e.g. "2026-S4") a tournament starting at
+    `moment` belongs to. Seasons are LEADERBOARD_SEASON_MONTHS long.
+    """
+    moment = timezone.localtime(moment)
+    index = (moment.month - 1) // settings.LEADERBOARD_SEASON_MONTHS + 1
+    return f"{moment.year}-S{index}"
+
+
+def season_bounds(season):
+    """
+    Returns the aware [start, end) datetimes of a season label.
+    """
+    try:
+        year, index = season.split("-S")
+        year, index = int(year), int(index)
+        start_month = (index - 1) * settings.LEADERBOARD_SEASON_MONTHS + 1
+        if not 1 <= start_month <= 12:
+            raise ValueError
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid season: {season}")
+    end_month = start_month + settings.LEADERBOARD_SEASON_MONTHS
+    start = timezone.make_aware(datetime.datetime(year, start_month, 1))
+    end = timezone.make_aware(
+        datetime.datetime(year + (end_month - 1) // 12, (end_month - 1) % 12 + 1, 1)
+    )
+    return start, end
+
+
+def board_key(game_id, season=None):
+    if season:
+        return f"{GAME_BOARD_PREFIX}:{game_id}:season:{season}"
+    return f"{GAME_BOARD_PREFIX}:{game_id}"
+
+
+def _user_totals(game_id, season, user_ids):
+    """
+    Returns {user_id: (all_time_total, season_total)} from Scoring rows.
+    """
+    from .models import Scoring
+
+    start, end = season_bounds(season)
+    rows = (
+        Scoring.objects.filter(tournament__game_id=game_id, user_id__in=user_ids)
+        .values("user_id")
+        .annotate(
+            total=Sum("score"),
+            season_total=Sum(
+                "score",
+                filter=Q(tournament__start_date__gte=start, tournament__start_date__lt=end),
+                default=0,
+            ),
+        )
+    )
+    totals = {user_id: (0, 0) for user_id in user_ids}
+    totals.update({row["user_id"]: (row["total"], row["season_total"]) for row in rows})
+    return totals
+
+
+def refresh_user_scores(game_id, season, user_ids):
+    """
+    Recomputes the given users' entries on a game's all-time and season
+    boards once the surrounding transaction commits.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    def _apply():
+        client = get_redis_connection("default")
+        if not client.exists(GAME_BOARDS_BUILT_KEY):
+            return
+        pipe = client.pipeline()
+        for user_id, (total, season_total) in _user_totals(game_id, season, user_ids).items():
+            for key, score in (
+                (board_key(game_id), total),
+                (board_key(game_id, season), season_total),
+            ):
+                if score:
+                    pipe.zadd(key, {user_id: score})
+                else:
+                    pipe.zrem(key, user_id)
+        pipe.execute()
+
+    transaction.on_commit(_apply)
+
+
+def rebuild_game_leaderboards(batch_size=REBUILD_BATCH_SIZE):
+    """
+    Reloads every game board from Scoring rows, writing in pipelined batches
+    to temporary keys that are renamed over the live ones at the end.
+
+    Returns the number of boards written.
+    """
+    from .models import Scoring
+
+    boards = defaultdict(lambda: defaultdict(int))
+    rows = Scoring.objects.values_list(
+        "tournament__game_id", "tournament__start_date", "user_id", "score"
+    ).iterator(chunk_size=batch_size)
+    for game_id, start_date, user_id, score in rows:
+        boards[board_key(game_id)][user_id] += score
+        boards[board_key(game_id, season_for(start_date))][user_id] += score
+
+    client = get_redis_connection("default")
+    pipe = client.pipeline(transaction=False)
+    pending = 0
+    for key, scores in boards.items():
+        temp_key = f"{key}:rebuild"
+        pipe.delete(temp_key)
+        items = [(user_id, score) for user_id, score in scores.items() if score]
+        for start in range(0, len(items), batch_size):
+            pipe.zadd(temp_key, dict(items[start : start + batch_size]))
+            pending += 1
+            if pending >= batch_size:
+                pipe.execute()
+                pending = 0
+    pipe.execute()
+
+    # Swap the new boards in and drop boards that no longer have scores.
+    live_keys = {
+        key.decode()
+        for key in client.scan_iter(match=f"{GAME_BOARD_PREFIX}:*", count=batch_size)
+        if not key.decode().endswith(":rebuild") and key.decode() != GAME_BOARDS_BUILT_KEY
+    }
+    pipe = client.pipeline()
+    for key in boards:
+        if client.exists(f"{key}:rebuild"):
+            pipe.rename(f"{key}:rebuild", key)
+        else:
+            pipe.delete(key)
+    for key in live_keys - set(boards):
+        pipe.delete(key)
+    pipe.set(GAME_BOARDS_BUILT_KEY, 1)
+    pipe.execute()
+    return len(boards)
+
+
+def _ensure_built(client):
+    if client.exists(GAME_BOARDS_BUILT_KEY):
+        return
+    if not client.set(GAME_BOARDS_LOCK_KEY, 1, nx=True, ex=REBUILD_LOCK_SECONDS):
+        return
+    try:
+        if not client.exists(GAME_BOARDS_BUILT_KEY):
+            rebuild_game_leaderboards()
+    finally:
+        client.delete(GAME_BOARDS_LOCK_KEY)
+
+
+def get_top_scores(game_id, season, offset, limit):
+    """
+    Returns ([(position, user_id, score), ...], total) for a page of a board.
+    """
+    client = get_redis_connection("default")
+    _ensure_built(client)
+    key = board_key(game_id, season)
+    pipe = client.pipeline()
+    pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+    pipe.zcard(key)
+    rows, total = pipe.execute()
+    return [
+        (position, int(member), int(score))
+        for position, (member, score) in enumerate(rows, start=offset + 1)
+    ], total
+
+
+def get_user_position(game_id, season, user_id):
+    """
+    Returns (position, score) of a user on a board, or None if unranked.
+    """
+    client = get_redis_connection("default")
+    _ensure_built(client)
+    key = board_key(game_id, season)
+    pipe = client.pipeline()
+    pipe.zrevrank(key, user_id)
+    pipe.zscore(key, user_id)
+    rank, score = pipe.execute()
+    if rank is None:
+        return None
+    return rank + 1, int(score)
+
+
+def get_scores_around(game_id, season, user_id, radius):
+    """
+    Returns the entries within `radius` places of a user, or None if the
+    user is unranked.
+    """
+    position = get_user_position(game_id, season, user_id)
+    if position is None:
+        return None
+    offset = max(position[0] - 1 - radius, 0)
+    rows, _ = get_top_scores(game_id, season, offset, position[0] - offset + radius)
+    return rows
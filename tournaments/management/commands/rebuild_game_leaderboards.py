@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from tournaments.leaderboards import REBUILD_BATCH_SIZE, rebuild_game_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-game and seasonal leaderboards in Redis from Scoring rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=REBUILD_BATCH_SIZE,
+            help='Number of rows read and written per batch.',
+        )
+
+    def handle(self, *args, **options):
+        boards = rebuild_game_leaderboards(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {boards} leaderboards.'))
@@ -1,14 +1,24 @@
-import random
 import datetime
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.db.models import Max
 from django.utils import timezone
-from django.db import transaction, models
-from tournaments.models import Tournament, Game, Match
-from users.models import User, Team, TeamMembership
-from wallet.services import process_transaction
-from wallet.models import Transaction
+
 from chat.models import Conversation, Message
+from tournaments.models import Game, Match, Tournament
+from tournaments.services import record_match_participations
+from users.models import MAX_TEAMS_PER_USER, Team, TeamMembership, User
+from users.services import provision_users
+from wallet.models import (BalanceSnapshot, JournalEntry, LedgerAccount, Posting,
+                           Transaction, Wallet)
 
 # Constants for test data
 FIRST_NAMES = ["علی", "رضا", "محمد", "حسین", "مهدی", "سارا", "مریم", "فاطمه", "زهرا", "نیما"]
@@ -17,8 +27,199 @@ TEAM_ADJECTIVES = ["شجاع", "سریع", "خشمگین", "افسانه‌ای"
 TEAM_NOUNS = ["عقاب‌ها", "شیرها", "ببرها", "گرگ‌ها", "مارها", "جنگجویان", "قهرمانان"]
 CHAT_MESSAGES = ["سلام، چطوری؟", "آماده‌ای برای مسابقه؟", "من برنده میشم!", "چه بازی خوبی بود!", "موفق باشی"]
 
+SEED_PASSWORD = "password123"
+# Seeded wallets stay well below the Wallet.total_balance column limit.
+MAX_SEEDED_BALANCE = Decimal("50000000")
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _split(count, parts):
+    """
+    Splits `count` into `parts` near-equal non-negative integers.
+    """
+    return [count // parts + (1 if i < count % parts else 0) for i in range(parts)]
+
+
+def _worker_init():
+    # Forked workers must not share the parent's database connections.
+    connections.close_all()
+
+
+def _seed_users(start, count, password_hash, batch_size, seed):
+    rng = random.Random(seed)
+    created = 0
+    for batch_start in range(start, start + count, batch_size):
+        users = []
+        for i in range(batch_start, min(batch_start + batch_size, start + count)):
+            username = f"user_{i}"
+            users.append(
+                User(
+                    username=username,
+                    password=password_hash,
+                    email=f"{username}@example.com",
+                    phone_number=f"+98999{i:08d}",
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                )
+            )
+        # Users, wallets and role memberships: three rows per user.
+        created += 3 * len(provision_users(users))
+    return created
+
+
+def _seed_matches(count, batch_size, seed):
+    rng = random.Random(seed)
+    tournaments = list(Tournament.objects.values_list("id", "type"))
+    user_ids = list(
+        User.objects.filter(is_staff=False).values_list("id", flat=True)
+    )
+    team_ids = list(Team.objects.values_list("id", flat=True))
+    candidates = [
+        (tournament_id, kind)
+        for tournament_id, kind in tournaments
+        if len(user_ids if kind == "individual" else team_ids) >= 2
+    ]
+    if not candidates:
+        return 0
+
+    created = 0
+    for batch in _chunks(range(count), batch_size):
+        matches = []
+        for _ in batch:
+            tournament_id, kind = rng.choice(candidates)
+            if kind == "individual":
+                p1, p2 = rng.sample(user_ids, 2)
+                fields = {"participant1_user_id": p1, "participant2_user_id": p2}
+            else:
+                t1, t2 = rng.sample(team_ids, 2)
+                fields = {"participant1_team_id": t1, "participant2_team_id": t2}
+            matches.append(
+                Match(
+                    tournament_id=tournament_id,
+                    match_type=kind,
+                    round=rng.randint(1, 5 if kind == "individual" else 3),
+                    **fields,
+                )
+            )
+        with transaction.atomic():
+            matches = Match.objects.bulk_create(matches)
+            record_match_participations(matches)
+        created += len(matches)
+    return created
+
+
+def _seed_transactions(wallet_ids, count, batch_size, seed):
+    """
+    Writes ledger rows straight into Transaction for the given wallets,
+    replaying each wallet's running balance so debits never overdraw it
+    (a deposit is inserted first when needed), then stores the final
+    balances.
+    """
+    rng = random.Random(seed)
+    if not wallet_ids:
+        return 0
+    types = [choice for choice, _ in Transaction.TRANSACTION_TYPE_CHOICES]
+    balances = {
+        wallet.pk: wallet
+        for wallet in Wallet.objects.filter(pk__in=wallet_ids).only(
+            "pk", "total_balance", "withdrawable_balance"
+        )
+    }
+    created = 0
+    for batch in _chunks(range(count), batch_size):
+        rows = []
+        touched = {}
+        for _ in batch:
+            wallet = balances[rng.choice(wallet_ids)]
+            transaction_type = rng.choice(types)
+            amount = Decimal(rng.randrange(10000, 500000))
+            is_debit = transaction_type in ("withdrawal", "entry_fee")
+            if not is_debit and wallet.total_balance + amount > MAX_SEEDED_BALANCE:
+                transaction_type, is_debit = "withdrawal", True
+            if is_debit and wallet.withdrawable_balance < amount:
+                deposit = amount * 2
+                rows.append(
+                    Transaction(
+                        wallet_id=wallet.pk,
+                        amount=deposit,
+                        transaction_type="deposit",
+                        description="Initial seeding deposit",
+                    )
+                )
+                wallet.total_balance += deposit
+                wallet.withdrawable_balance += deposit
+            if is_debit:
+                wallet.total_balance -= amount
+                wallet.withdrawable_balance -= amount
+            else:
+                wallet.total_balance += amount
+                if transaction_type in ("deposit", "prize"):
+                    wallet.withdrawable_balance += amount
+            rows.append(
+                Transaction(
+                    wallet_id=wallet.pk,
+                    amount=amount,
+                    transaction_type=transaction_type,
+                    description=f"تراکنش تستی {transaction_type}",
+                )
+            )
+            touched[wallet.pk] = wallet
+        with transaction.atomic():
+            Transaction.objects.bulk_create(rows)
+            Wallet.objects.bulk_update(
+                touched.values(), ["total_balance", "withdrawable_balance"]
+            )
+        created += len(rows)
+    return created
+
+
+def _seed_chats(count, batch_size, seed):
+    rng = random.Random(seed)
+    user_ids = list(User.objects.filter(is_staff=False).values_list("id", flat=True))
+    if len(user_ids) < 2 or not count:
+        return 0
+
+    created = 0
+    # One conversation for every 5 messages.
+    for batch in _chunks(range(count), batch_size):
+        with transaction.atomic():
+            conversations = Conversation.objects.bulk_create(
+                [Conversation() for _ in range(max(1, len(batch) // 5))]
+            )
+            pairs = {conversation.pk: rng.sample(user_ids, 2) for conversation in conversations}
+            Conversation.participants.through.objects.bulk_create(
+                [
+                    Conversation.participants.through(
+                        conversation_id=conversation_id, user_id=user_id
+                    )
+                    for conversation_id, pair in pairs.items()
+                    for user_id in pair
+                ]
+            )
+            messages = []
+            for _ in batch:
+                conversation_id = rng.choice(conversations).pk
+                messages.append(
+                    Message(
+                        conversation_id=conversation_id,
+                        sender_id=rng.choice(pairs[conversation_id]),
+                        content=rng.choice(CHAT_MESSAGES),
+                    )
+                )
+            Message.objects.bulk_create(messages)
+        created += len(messages) + len(conversations) * 3
+    return created
+
+
 class Command(BaseCommand):
-    help = 'Seeds the database with realistic test data for various models.'
+    help = (
+        "Seeds the database with realistic test data for various models, in "
+        "bulk batches spread over worker processes."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument('--users', type=int, default=0, help='The number of users to create.')
@@ -28,148 +229,229 @@ class Command(BaseCommand):
         parser.add_argument('--transactions', type=int, default=0, help='The number of transactions to create.')
         parser.add_argument('--chats', type=int, default=0, help='The number of chat messages to create.')
         parser.add_argument('--clean', action='store_true', help='Delete existing data before seeding.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert.')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker processes for independent tables (default: 1 on SQLite, '
+            'otherwise up to 4; always 1 inside a daemonic process).',
+        )
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data.')
 
-    @transaction.atomic
     def handle(self, *args, **options):
+        self.batch_size = max(options['batch_size'], 1)
+        self.workers = options['workers']
+        if self.workers is None:
+            self.workers = 1 if connection.vendor == 'sqlite' else min(4, os.cpu_count() or 1)
+        self.workers = max(self.workers, 1)
+        if multiprocessing.current_process().daemon:
+            # Daemonic processes (e.g. Celery prefork workers) cannot start
+            # children, so seed serially there.
+            self.workers = 1
+        self.rng = random.Random(options['seed'])
+        self.total_rows = 0
+        started = time.monotonic()
+
         if options['clean']:
             self.stdout.write(self.style.WARNING('Deleting all existing data...'))
             Message.objects.all().delete()
             Conversation.objects.all().delete()
             Transaction.objects.all().delete()
+            Wallet.objects.update(total_balance=0, withdrawable_balance=0)
+            # Every balance is zero again, so the ledger starts over too.
+            BalanceSnapshot.objects.all().delete()
+            Posting.objects.all().delete()
+            JournalEntry.objects.all().delete()
+            LedgerAccount.objects.all().delete()
             Match.objects.all().delete()
             Tournament.objects.all().delete()
             Team.objects.all().delete()
             User.objects.filter(is_staff=False, is_superuser=False).delete()
             self.stdout.write(self.style.SUCCESS('Successfully deleted existing data.'))
 
-        if options['users'] > 0: self.seed_users(options['users'])
-        if options['teams'] > 0: self.seed_teams(options['teams'])
-        if options['tournaments'] > 0: self.seed_tournaments(options['tournaments'])
-        if options['matches'] > 0: self.seed_matches(options['matches'])
-        if options['transactions'] > 0: self.seed_transactions(options['transactions'])
-        if options['chats'] > 0: self.seed_chats(options['chats'])
+        if options['users'] > 0:
+            self.seed_users(options['users'])
+        if options['tournaments'] > 0:
+            self._timed('tournaments', self.seed_tournaments, options['tournaments'])
+        if options['teams'] > 0:
+            self._timed('teams', self.seed_teams, options['teams'])
+
+        # Matches, transactions and chats only read the rows above, so they
+        # are generated side by side.
+        jobs = []
+        if options['matches'] > 0:
+            jobs += [
+                ('matches', _seed_matches, (count, self.batch_size))
+                for count in _split(options['matches'], self.workers)
+            ]
+        if options['transactions'] > 0:
+            wallet_ids = list(
+                Wallet.objects.filter(user__is_staff=False).values_list('id', flat=True)
+            )
+            if not wallet_ids:
+                self.stdout.write(self.style.ERROR('Cannot create transactions. No users found.'))
+            # Each worker owns a disjoint set of wallets so balances stay exact.
+            parts = min(self.workers, len(wallet_ids)) or 1
+            jobs += [
+                ('transactions', _seed_transactions, (wallet_ids[i::parts], count, self.batch_size))
+                for i, count in enumerate(_split(options['transactions'], parts))
+            ]
+        if options['chats'] > 0:
+            jobs += [
+                ('chats', _seed_chats, (count, self.batch_size))
+                for count in _split(options['chats'], self.workers)
+            ]
+        if jobs:
+            self._run_parallel(jobs)
+
+        self._refresh_derived_data()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Database seeding complete: {self.total_rows} rows in {elapsed:.1f}s '
+                f'({self.total_rows / max(elapsed, 1e-9):.0f} rows/s).'
+            )
+        )
+
+    def _report(self, label, rows, elapsed):
+        self.total_rows += rows
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{label}: {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s).'
+            )
+        )
+
+    def _timed(self, label, func, *args):
+        started = time.monotonic()
+        rows = func(*args)
+        self._report(label, rows, time.monotonic() - started)
 
-        self.stdout.write(self.style.SUCCESS('Database seeding complete.'))
+    def _run_parallel(self, jobs):
+        """
+        Runs (label, function, args) jobs, in worker processes when more
+        than one is configured, and reports rows per second for each label.
+        """
+        started = time.monotonic()
+        rows = {}
+        seeds = [self.rng.randrange(2**32) for _ in jobs]
+        if self.workers == 1:
+            for (label, func, args), seed in zip(jobs, seeds):
+                rows[label] = rows.get(label, 0) + func(*args, seed)
+        else:
+            # Children open their own connections; close ours before forking.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_worker_init) as pool:
+                futures = [
+                    (label, pool.submit(func, *args, seed))
+                    for (label, func, args), seed in zip(jobs, seeds)
+                ]
+                for label, future in futures:
+                    rows[label] = rows.get(label, 0) + future.result()
+        elapsed = time.monotonic() - started
+        for label, count in rows.items():
+            self._report(label, count, elapsed)
 
     def seed_users(self, count):
         self.stdout.write(f'Creating {count} new users...')
-        # ... (logic is unchanged)
-        users = []
-        for i in range(count):
-            username = f'user_{random.choice(FIRST_NAMES)}_{i}'
-            phone_number = f'+98999{str(i).zfill(8)}'
-            if User.objects.filter(username=username).exists() or User.objects.filter(phone_number=phone_number).exists(): continue
-            user = User.objects.create_user(username=username, password='password123', email=f'{username}@example.com', phone_number=phone_number, first_name=random.choice(FIRST_NAMES), last_name=random.choice(LAST_NAMES))
-            users.append(user)
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {len(users)} users.'))
-
-    def seed_teams(self, count):
-        self.stdout.write(f'Creating {count} new teams...')
-        # ... (logic is unchanged)
-        users = list(User.objects.filter(is_staff=False, is_superuser=False))
-        if len(users) < 2: self.stdout.write(self.style.ERROR('Cannot create teams. Need at least 2 users.')); return
-        teams_created = 0
-        for i in range(count):
-            team_name = f'{random.choice(TEAM_ADJECTIVES)} {random.choice(TEAM_NOUNS)}'
-            if Team.objects.filter(name=team_name).exists(): continue
-            captain = random.choice(users)
-            team = Team.objects.create(name=team_name, captain=captain)
-            TeamMembership.objects.create(user=captain, team=team)
-            member_count = random.randint(0, team.max_members - 1)
-            potential_members = [u for u in users if u != captain]
-            members_to_add = random.sample(potential_members, min(len(potential_members), member_count))
-            for member in members_to_add:
-                if member.teams.count() < 10 and team.members.count() < team.max_members:
-                    TeamMembership.objects.get_or_create(user=member, team=team)
-            teams_created += 1
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {teams_created} teams.'))
+        # Hash once; every seeded user shares the same password.
+        password_hash = make_password(SEED_PASSWORD)
+        # Continue numbering after existing rows so usernames and phone
+        # numbers never collide, without per-user existence checks.
+        start = (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        offsets = [start]
+        for part in _split(count, self.workers)[:-1]:
+            offsets.append(offsets[-1] + part)
+        self._run_parallel(
+            [
+                ('users', _seed_users, (offset, part, password_hash, self.batch_size))
+                for offset, part in zip(offsets, _split(count, self.workers))
+                if part
+            ]
+        )
 
     def seed_tournaments(self, count):
-        self.stdout.write(f'Creating {count} new tournaments...')
-        # ... (logic is unchanged)
         game, _ = Game.objects.get_or_create(name="Default Game")
         now = timezone.now()
-        for i in range(count):
-            Tournament.objects.create(name=f'Tournament #{i}', game=game, type=random.choice(['individual', 'team']), start_date=now + datetime.timedelta(days=random.randint(1, 60)), end_date=now + datetime.timedelta(days=random.randint(61, 120)))
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {count} tournaments.'))
-
-    def seed_matches(self, count):
-        self.stdout.write(f'Creating {count} new matches...')
-        # ... (logic is unchanged)
-        tournaments, users, teams = list(Tournament.objects.all()), list(User.objects.filter(is_staff=False)), list(Team.objects.all())
-        if not tournaments: self.stdout.write(self.style.ERROR('Cannot create matches. No tournaments found.')); return
-        if len(users) < 2: self.stdout.write(self.style.ERROR('Cannot create individual matches. Need at least 2 users.'))
-        if len(teams) < 2: self.stdout.write(self.style.ERROR('Cannot create team matches. Need at least 2 teams.'))
-        matches_created = 0
-        for i in range(count):
-            tournament = random.choice(tournaments)
-            try:
-                if tournament.type == 'individual':
-                    if len(users) < 2: continue
-                    p1, p2 = random.sample(users, 2)
-                    Match.objects.create(tournament=tournament, match_type='individual', round=random.randint(1, 5), participant1_user=p1, participant2_user=p2)
-                elif tournament.type == 'team':
-                    if len(teams) < 2: continue
-                    t1, t2 = random.sample(teams, 2)
-                    Match.objects.create(tournament=tournament, match_type='team', round=random.randint(1, 3), participant1_team=t1, participant2_team=t2)
-                matches_created += 1
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Could not create match: {e}"))
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {matches_created} matches.'))
-
-    def seed_transactions(self, count):
-        self.stdout.write(f'Creating {count} new transactions...')
-        # ... (logic is unchanged)
-        users = list(User.objects.filter(is_staff=False))
-        if not users: self.stdout.write(self.style.ERROR('Cannot create transactions. No users found.')); return
-        transaction_types = [t[0] for t in Transaction.TRANSACTION_TYPE_CHOICES]
-        transactions_created = 0
-        for i in range(count):
-            user = random.choice(users)
-            transaction_type = random.choice(transaction_types)
-            amount = Decimal(random.randrange(10000, 500000))
-            if transaction_type in ['withdrawal', 'entry_fee']:
-                process_transaction(user, amount * 2, 'deposit', 'Initial seeding deposit')
-            _, error = process_transaction(user=user, amount=amount, transaction_type=transaction_type, description=f'تراکنش تستی {transaction_type}')
-            if error: self.stdout.write(self.style.ERROR(f"Could not create transaction for {user.username}: {error}"))
-            else: transactions_created += 1
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {transactions_created} transactions.'))
-
-    def seed_chats(self, count):
-        self.stdout.write(f'Creating {count} new chat messages...')
-        users = list(User.objects.filter(is_staff=False))
-        if len(users) < 2:
-            self.stdout.write(self.style.ERROR('Cannot create chats. Need at least 2 users.'))
-            return
-
-        # Create a few conversations to populate
-        num_conversations = max(1, count // 5) # Create 1 conversation for every 5 messages
-        conversations = []
-        for _ in range(num_conversations):
-            participants = random.sample(users, 2)
-            # Use get_or_create to avoid duplicate conversations
-            # Note: This simple get_or_create doesn't handle M2M well. A more robust way is needed for production.
-            # For seeding, we'll just create new ones.
-            convo = Conversation.objects.create()
-            convo.participants.set(participants)
-            conversations.append(convo)
-
-        if not conversations:
-            self.stdout.write(self.style.ERROR('Could not create any conversations.'))
-            return
-
-        messages_created = 0
-        for i in range(count):
-            try:
-                conversation = random.choice(conversations)
-                sender = random.choice(list(conversation.participants.all()))
-                Message.objects.create(
-                    conversation=conversation,
-                    sender=sender,
-                    content=random.choice(CHAT_MESSAGES)
+        tournaments = [
+            Tournament(
+                name=f'Tournament #{i}',
+                game=game,
+                type=self.rng.choice(['individual', 'team']),
+                start_date=now + datetime.timedelta(days=self.rng.randint(1, 60)),
+                end_date=now + datetime.timedelta(days=self.rng.randint(61, 120)),
+            )
+            for i in range(count)
+        ]
+        Tournament.objects.bulk_create(tournaments, batch_size=self.batch_size)
+        return count
+
+    def seed_teams(self, count):
+        user_ids = list(
+            User.objects.filter(is_staff=False, is_superuser=False).values_list('id', flat=True)
+        )
+        if len(user_ids) < 2:
+            self.stdout.write(self.style.ERROR('Cannot create teams. Need at least 2 users.'))
+            return 0
+
+        team_counts = dict(
+            User.objects.filter(team_count__gt=0).values_list('id', 'team_count')
+        )
+        joined = set()
+
+        created = 0
+        for batch in _chunks(range(count), self.batch_size):
+            teams, rosters = [], []
+            for i in batch:
+                team = Team(
+                    name=f'{self.rng.choice(TEAM_ADJECTIVES)} {self.rng.choice(TEAM_NOUNS)} #{i}',
+                    captain_id=self.rng.choice(user_ids),
+                )
+                wanted = self.rng.randint(0, team.max_members - 1)
+                candidates = [team.captain_id] + self.rng.sample(
+                    user_ids, min(len(user_ids), wanted)
                 )
-                messages_created += 1
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Could not create message: {e}"))
+                roster = []
+                for user_id in dict.fromkeys(candidates):
+                    if len(roster) >= team.max_members:
+                        break
+                    if team_counts.get(user_id, 0) < MAX_TEAMS_PER_USER:
+                        team_counts[user_id] = team_counts.get(user_id, 0) + 1
+                        joined.add(user_id)
+                        roster.append(user_id)
+                # Bulk inserts bypass the counters TeamMembership keeps.
+                team.member_count = len(roster)
+                teams.append(team)
+                rosters.append(roster)
+            with transaction.atomic():
+                teams = Team.objects.bulk_create(teams)
+                memberships = [
+                    TeamMembership(user_id=user_id, team_id=team.pk)
+                    for team, roster in zip(teams, rosters)
+                    for user_id in roster
+                ]
+                TeamMembership.objects.bulk_create(memberships)
+            created += len(teams) + len(memberships)
+
+        User.objects.bulk_update(
+            [User(pk=user_id, team_count=team_counts[user_id]) for user_id in joined],
+            ['team_count'],
+            batch_size=self.batch_size,
+        )
+        return created
+
+    def _refresh_derived_data(self):
+        """
+        Bulk inserts skip the signals that keep Redis counters and boards up
+        to date, and the ledger entries that mirror wallet balances, so
+        rebuild them from the database once at the end.
+        """
+        from tournaments.rankings import refresh_top_tournaments
+        from tournaments.stats import reconcile_platform_stats
+        from users.leaderboards import reconcile_leaderboards
+        from wallet.ledger import open_wallet_balances
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {messages_created} messages.'))
+        reconcile_platform_stats()
+        refresh_top_tournaments()
+        reconcile_leaderboards()
+        open_wallet_balances()
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0019_game_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="match",
+            name="is_forfeit",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="match",
+            name="participant1_checked_in",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="match",
+            name="participant2_checked_in",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name="RoundCheckIn",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("round", models.IntegerField()),
+                ("opens_at", models.DateTimeField()),
+                ("closes_at", models.DateTimeField()),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "tournament",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="check_in_windows",
+                        to="tournaments.tournament",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["processed_at", "closes_at"],
+                        name="tournaments_process_977c5a_idx",
+                    )
+                ],
+                "unique_together": {("tournament", "round")},
+            },
+        ),
+    ]
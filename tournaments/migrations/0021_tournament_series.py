@@ -0,0 +1,168 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0020_round_check_in"),
+        ("users", "0009_user_referral_code_referral"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TournamentSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[("daily", "Daily"), ("weekly", "Weekly")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "interval",
+                    models.PositiveIntegerField(
+                        default=1, help_text="Repeat every N days or weeks."
+                    ),
+                ),
+                (
+                    "starts_on",
+                    models.DateField(help_text="Date of the first occurrence."),
+                ),
+                ("ends_on", models.DateField(blank=True, null=True)),
+                ("start_time", models.TimeField()),
+                ("duration", models.DurationField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[("individual", "Individual"), ("team", "Team")],
+                        default="individual",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "mode",
+                    models.CharField(
+                        choices=[
+                            ("team_deathmatch", "Team Deathmatch"),
+                            ("battle_royale", "Battle Royale"),
+                        ],
+                        default="team_deathmatch",
+                        max_length=20,
+                    ),
+                ),
+                ("max_participants", models.PositiveIntegerField(default=100)),
+                ("team_size", models.PositiveIntegerField(default=1)),
+                ("description", models.TextField(blank=True)),
+                ("rules", models.TextField(blank=True)),
+                ("is_free", models.BooleanField(default=True)),
+                (
+                    "entry_fee",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                (
+                    "prize_pool",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                ("required_verification_level", models.IntegerField(default=1)),
+                (
+                    "color",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="tournaments.tournamentcolor",
+                    ),
+                ),
+                (
+                    "creator",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="created_tournament_series",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="tournaments.game",
+                    ),
+                ),
+                (
+                    "image",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="tournaments.tournamentimage",
+                    ),
+                ),
+                (
+                    "max_rank",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="tournaments.rank",
+                    ),
+                ),
+                (
+                    "min_rank",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="tournaments.rank",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tournament Series",
+                "verbose_name_plural": "Tournament Series",
+            },
+        ),
+        migrations.AddField(
+            model_name="tournament",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="tournaments",
+                to="tournaments.tournamentseries",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="tournament",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("series__isnull", False)),
+                fields=("series", "start_date"),
+                name="unique_series_occurrence",
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# The normalized expression of `tournaments.search.PersianNormalize`, which
+# must stay identical for queries to use these indexes.
+CREATE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS tournaments_tournament_name_trgm_idx ON tournaments_tournament "
+    "USING gin ((translate(lower(name), 'يىكۀة\u200c۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩ـًٌٍَُِّْ', 'ییکهه 01234567890123456789')) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS tournaments_tournament_name_fts_idx ON tournaments_tournament "
+    "USING gin (to_tsvector('simple'::regconfig, "
+    "COALESCE(translate(lower(name), 'يىكۀة\u200c۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩ـًٌٍَُِّْ', 'ییکهه 01234567890123456789'), '')))",
+    "CREATE INDEX IF NOT EXISTS tournaments_game_name_trgm_idx ON tournaments_game "
+    "USING gin ((translate(lower(name), 'يىكۀة\u200c۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩ـًٌٍَُِّْ', 'ییکهه 01234567890123456789')) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS tournaments_game_name_fts_idx ON tournaments_game "
+    "USING gin (to_tsvector('simple'::regconfig, "
+    "COALESCE(translate(lower(name), 'يىكۀة\u200c۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩ـًٌٍَُِّْ', 'ییکهه 01234567890123456789'), '')))",
+]
+
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS tournaments_tournament_name_trgm_idx",
+    "DROP INDEX IF EXISTS tournaments_tournament_name_fts_idx",
+    "DROP INDEX IF EXISTS tournaments_game_name_trgm_idx",
+    "DROP INDEX IF EXISTS tournaments_game_name_fts_idx",
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for statement in CREATE_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in DROP_INDEXES:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0021_tournament_series"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
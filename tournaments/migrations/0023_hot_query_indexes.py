@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0022_search_indexes"),
+        ("users", "0011_hot_query_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["tournament", "round"], name="match_tournament_round_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                condition=models.Q(("is_disputed", True)),
+                fields=["tournament"],
+                name="match_disputed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tournament",
+            index=models.Index(
+                fields=["start_date", "end_date"], name="tournament_dates_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tournament",
+            index=models.Index(fields=["end_date"], name="tournament_end_date_idx"),
+        ),
+    ]
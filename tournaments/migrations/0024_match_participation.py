@@ -0,0 +1,125 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_participations(apps, schema_editor):
+    Match = apps.get_model("tournaments", "Match")
+    MatchParticipation = apps.get_model("tournaments", "MatchParticipation")
+    TeamMembership = apps.get_model("users", "TeamMembership")
+
+    members = {}
+    for team_id, user_id in TeamMembership.objects.values_list("team_id", "user_id"):
+        members.setdefault(team_id, []).append(user_id)
+
+    rows = []
+    matches = Match.objects.values_list(
+        "id",
+        "tournament_id",
+        "participant1_user_id",
+        "participant1_team_id",
+        "participant2_user_id",
+        "participant2_team_id",
+    ).iterator(chunk_size=BATCH_SIZE)
+    for match_id, tournament_id, user1, team1, user2, team2 in matches:
+        for side, user_id, team_id in ((1, user1, team1), (2, user2, team2)):
+            common = {"match_id": match_id, "tournament_id": tournament_id, "side": side}
+            if user_id:
+                rows.append(MatchParticipation(user_id=user_id, **common))
+            if team_id:
+                rows.append(MatchParticipation(team_id=team_id, **common))
+                rows.extend(
+                    MatchParticipation(user_id=member_id, team_id=team_id, **common)
+                    for member_id in members.get(team_id, ())
+                )
+        if len(rows) >= BATCH_SIZE:
+            MatchParticipation.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    MatchParticipation.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0023_hot_query_indexes"),
+        ("users", "0012_player_team_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MatchParticipation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "side",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Participant 1"), (2, "Participant 2")]
+                    ),
+                ),
+                (
+                    "match",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="participations",
+                        to="tournaments.match",
+                    ),
+                ),
+                (
+                    "team",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="match_participations",
+                        to="users.team",
+                    ),
+                ),
+                (
+                    "tournament",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="match_participations",
+                        to="tournaments.tournament",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="match_participations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("user__isnull", False)),
+                        fields=("user", "match"),
+                        name="unique_user_match_participation",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("user__isnull", True)),
+                        fields=("team", "match"),
+                        name="unique_team_match_participation",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_participations, migrations.RunPython.noop),
+    ]
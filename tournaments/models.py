@@ -169,6 +169,27 @@ class Tournament(models.Model):
     top_teams = models.ManyToManyField(
         "users.Team", related_name="top_placements", blank=True
     )
+    series = models.ForeignKey(
+        "TournamentSeries",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="tournaments",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["series", "start_date"],
+                condition=models.Q(series__isnull=False),
+                name="unique_series_occurrence",
+            )
+        ]
+        indexes = [
+            # Upcoming/ongoing/finished status filters and landing page lists.
+            models.Index(fields=["start_date", "end_date"], name="tournament_dates_idx"),
+            models.Index(fields=["end_date"], name="tournament_end_date_idx"),
+        ]
 
     def clean(self):
         super().clean()
@@ -196,6 +217,91 @@ class Tournament(models.Model):
         return self.name
 
 
+class TournamentSeries(models.Model):
+    """
+    A template for a recurring tournament (e.g. a daily or weekly cup).
+    Upcoming instances are materialized as regular `Tournament` rows a
+    configurable horizon ahead by `materialize_tournament_series`.
+    """
+
+    FREQUENCY_CHOICES = (
+        ("daily", "Daily"),
+        ("weekly", "Weekly"),
+    )
+    name = models.CharField(max_length=100)
+    is_active = models.BooleanField(default=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveIntegerField(
+        default=1, help_text="Repeat every N days or weeks."
+    )
+    starts_on = models.DateField(help_text="Date of the first occurrence.")
+    ends_on = models.DateField(null=True, blank=True)
+    start_time = models.TimeField()
+    duration = models.DurationField()
+
+    # Fields copied onto every materialized tournament.
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    type = models.CharField(
+        max_length=20, choices=Tournament.TOURNAMENT_TYPE_CHOICES, default="individual"
+    )
+    mode = models.CharField(
+        max_length=20,
+        choices=Tournament.TOURNAMENT_MODE_CHOICES,
+        default="team_deathmatch",
+    )
+    max_participants = models.PositiveIntegerField(default=100)
+    team_size = models.PositiveIntegerField(default=1)
+    description = models.TextField(blank=True)
+    rules = models.TextField(blank=True)
+    image = models.ForeignKey(
+        TournamentImage, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    color = models.ForeignKey(
+        TournamentColor, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    is_free = models.BooleanField(default=True)
+    entry_fee = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    prize_pool = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    required_verification_level = models.IntegerField(default=1)
+    min_rank = models.ForeignKey(
+        Rank, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    max_rank = models.ForeignKey(
+        Rank, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    creator = models.ForeignKey(
+        "users.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="created_tournament_series",
+    )
+
+    class Meta:
+        verbose_name = "Tournament Series"
+        verbose_name_plural = "Tournament Series"
+
+    def clean(self):
+        super().clean()
+        if self.ends_on and self.ends_on < self.starts_on:
+            raise ValidationError("The series must end after it starts.")
+        if not self.is_free and self.entry_fee is None:
+            raise ValidationError("Entry fee must be set for paid tournaments.")
+        if self.type == "individual" and self.team_size != 1:
+            raise ValidationError("Individual tournaments must have a team size of 1.")
+        if self.type == "team" and self.team_size <= 1:
+            raise ValidationError("Team tournaments must have a team size greater than 1.")
+        if self.mode == "battle_royale" and self.type != "individual":
+            raise ValidationError("Battle Royale tournaments must be individual.")
+
+    def __str__(self):
+        return self.name
+
+
 class Participant(models.Model):
     user = models.ForeignKey("users.User", on_delete=models.CASCADE)
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE)
@@ -277,6 +383,19 @@ class Match(models.Model):
     dispute_reason = models.TextField(blank=True)
     room_id = models.CharField(max_length=100, blank=True)
     password = models.CharField(max_length=100, blank=True)
+    participant1_checked_in = models.BooleanField(default=False)
+    participant2_checked_in = models.BooleanField(default=False)
+    is_forfeit = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tournament", "round"], name="match_tournament_round_idx"),
+            models.Index(
+                fields=["tournament"],
+                condition=models.Q(is_disputed=True),
+                name="match_disputed_idx",
+            ),
+        ]
 
     def clean(self):
         if self.match_type == "individual":
@@ -308,6 +427,90 @@ class Match(models.Model):
             return f"{self.participant1_team} vs {self.participant2_team} - Tournament: {self.tournament}"
 
 
+class MatchParticipation(models.Model):
+    """
+    One row per (match, side) for the team itself and one per (match, user)
+    for every player, so a user's or team's match history is a single
+    indexed range scan instead of an OR over the four participant columns.
+
+    Team matches get a team row (`user` empty) plus a row for each member of
+    the team when the match was created.
+    """
+
+    SIDE_CHOICES = (
+        (1, "Participant 1"),
+        (2, "Participant 2"),
+    )
+    match = models.ForeignKey(
+        Match, on_delete=models.CASCADE, related_name="participations"
+    )
+    tournament = models.ForeignKey(
+        Tournament, on_delete=models.CASCADE, related_name="match_participations"
+    )
+    user = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="match_participations",
+        null=True,
+        blank=True,
+    )
+    team = models.ForeignKey(
+        "users.Team",
+        on_delete=models.CASCADE,
+        related_name="match_participations",
+        null=True,
+        blank=True,
+    )
+    side = models.PositiveSmallIntegerField(choices=SIDE_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "match"],
+                condition=models.Q(user__isnull=False),
+                name="unique_user_match_participation",
+            ),
+            models.UniqueConstraint(
+                fields=["team", "match"],
+                condition=models.Q(user__isnull=True),
+                name="unique_team_match_participation",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user or self.team} in match {self.match_id}"
+
+
+class RoundCheckIn(models.Model):
+    """
+    The check-in window for one round of a tournament. Entrants must check in
+    to their match before `closes_at`; absent entrants are forfeited by the
+    check-in sweeper once the window has closed.
+    """
+
+    tournament = models.ForeignKey(
+        Tournament, on_delete=models.CASCADE, related_name="check_in_windows"
+    )
+    round = models.IntegerField()
+    opens_at = models.DateTimeField()
+    closes_at = models.DateTimeField()
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("tournament", "round")
+        indexes = [models.Index(fields=["processed_at", "closes_at"])]
+
+    def clean(self):
+        if self.opens_at and self.closes_at and self.opens_at >= self.closes_at:
+            raise ValidationError("Check-in must close after it opens.")
+
+    def is_open(self, now):
+        return self.processed_at is None and self.opens_at <= now <= self.closes_at
+
+    def __str__(self):
+        return f"{self.tournament} - Round {self.round} check-in"
+
+
 class Report(models.Model):
     REPORT_STATUS_CHOICES = (
         ("pending", "Pending"),
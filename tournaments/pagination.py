@@ -0,0 +1,173 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a unique, indexed tuple of fields such as
+    (timestamp, id).
+
+    Each page is fetched with a `WHERE (timestamp, id) < (cursor)` style
+    filter instead of an OFFSET, and no COUNT is run, so the cost of a page
+    does not depend on how deep the client has scrolled. Views can override
+    the key with a `cursor_ordering` attribute; all fields must sort in the
+    same direction and the last one must be unique.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("-timestamp", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, "cursor_ordering", self.ordering))
+        self.fields = [field.lstrip("-") for field in self.ordering]
+        self.descending = self.ordering[0].startswith("-")
+        self.model = queryset.model
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["reverse"])
+        if cursor:
+            queryset = queryset.filter(
+                self.get_keyset_filter(cursor["position"], self.descending != reverse)
+            )
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+            )
+
+        results = list(queryset.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_keyset_filter(self, position, descending):
+        """
+        Builds the row-value comparison `(f1, f2, ...) < (v1, v2, ...)` (or
+        `>` when ascending) as an OR of prefix-equality terms.
+        """
+        lookup = "lt" if descending else "gt"
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            term = Q(**{f"{field}__{lookup}": position[index]})
+            for previous, value in zip(self.fields[:index], position):
+                term &= Q(**{previous: value})
+            condition |= term
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            values = data["p"]
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+            return {"position": position, "reverse": bool(data.get("r"))}
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            UnicodeEncodeError,
+            binascii.Error,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for field in self.fields:
+            value = getattr(instance, self.model._meta.get_field(field).attname)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        data = {"p": values}
+        if reverse:
+            data["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data).encode()).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -1,6 +1,6 @@
 from rest_framework import permissions
 
-from .models import GameManager
+from .services import get_managed_game_ids
 
 
 class IsGameManagerOrAdmin(permissions.BasePermission):
@@ -10,6 +10,9 @@ class IsGameManagerOrAdmin(permissions.BasePermission):
       manages the game associated with the tournament.
     - For view-level permissions (create), it checks if the user manages
       the game specified in the request data.
+
+    Managed games are read from the cached set returned by
+    `get_managed_game_ids`, so repeated checks do not hit the database.
     """
 
     def has_permission(self, request, view):
@@ -30,9 +33,11 @@ class IsGameManagerOrAdmin(permissions.BasePermission):
             game_id = request.data.get("game")
             if not game_id:
                 return False  # Cannot create a tournament without a game.
-            return GameManager.objects.filter(
-                user=request.user, game_id=game_id
-            ).exists()
+            try:
+                game_id = int(game_id)
+            except (TypeError, ValueError):
+                return False
+            return game_id in get_managed_game_ids(request.user)
 
         # For other actions (like update, destroy), object-level permission is the source of truth.
         return True
@@ -43,7 +48,7 @@ class IsGameManagerOrAdmin(permissions.BasePermission):
             return True
 
         # 'obj' is the tournament instance. Check if the user manages its game.
-        return GameManager.objects.filter(user=request.user, game=obj.game).exists()
+        return obj.game_id in get_managed_game_ids(request.user)
 
 
 class IsTournamentCreatorOrAdmin(permissions.BasePermission):
@@ -56,5 +61,9 @@ class IsTournamentCreatorOrAdmin(permissions.BasePermission):
         if request.user.is_staff:
             return True
 
-        # The creator of the tournament is allowed to perform the action.
-        return obj.tournament.creator == request.user
+        # Compare ids so the creator is never loaded from the database.
+        tournament = obj.tournament
+        return (
+            tournament.creator_id is not None
+            and tournament.creator_id == request.user.id
+        )
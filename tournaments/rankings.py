@@ -0,0 +1,113 @@
+"""
+Precomputed "top tournaments" lists served by TopTournamentsView.
+
+The lists are ranked by prize pool, capped at TOP_TOURNAMENTS_LIMIT rows and
+stored in Redis as lists of serialized rows, so a page is a single LRANGE.
+They are rebuilt by a periodic task and shortly after tournament writes.
+Rows are stored with relative media URLs and made absolute for the request
+serving them.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+TOP_TOURNAMENTS_KEYS = {
+    "past": "top_tournaments:past",
+    "future": "top_tournaments:future",
+}
+TOP_TOURNAMENTS_REFRESHED_KEY = "top_tournaments:refreshed_at"
+TOP_TOURNAMENTS_PENDING_KEY = "top_tournaments:refresh_pending"
+# Writes within this many seconds of each other share a single rebuild.
+TOP_TOURNAMENTS_REFRESH_DELAY = 5
+
+
+def _ranked_queryset(bucket, now):
+    from .models import Tournament
+    from .services import annotate_entrant_count
+
+    if bucket == "past":
+        queryset = Tournament.objects.filter(end_date__lt=now)
+    else:
+        queryset = Tournament.objects.filter(start_date__gte=now)
+    return (
+        annotate_entrant_count(
+            queryset.select_related("image", "game").prefetch_related("game__images")
+        )
+        .order_by(F("prize_pool").desc(nulls_last=True), "-start_date", "id")
+    )[: settings.TOP_TOURNAMENTS_LIMIT]
+
+
+def refresh_top_tournaments(now=None):
+    """
+    Rebuilds both lists from the database and swaps them in atomically.
+    Returns the number of rows stored per list.
+    """
+    from .serializers import TournamentListSerializer
+
+    now = now or timezone.now()
+    pipe = get_redis_connection("default").pipeline()
+    sizes = {}
+    for bucket, key in TOP_TOURNAMENTS_KEYS.items():
+        rows = TournamentListSerializer(_ranked_queryset(bucket, now), many=True).data
+        sizes[bucket] = len(rows)
+        pipe.delete(key)
+        if rows:
+            pipe.rpush(key, *(json.dumps(row, cls=DjangoJSONEncoder) for row in rows))
+    # Marks the lists as built, so an empty list isn't mistaken for a miss.
+    pipe.set(TOP_TOURNAMENTS_REFRESHED_KEY, now.isoformat())
+    pipe.execute()
+    return sizes
+
+
+def _absolute(row, request):
+    if request is None:
+        return row
+    images = [row["image"]] if row.get("image") else []
+    if row.get("game"):
+        images += row["game"].get("images", [])
+    for image in images:
+        if image.get("image"):
+            image["image"] = request.build_absolute_uri(image["image"])
+    return row
+
+
+def get_top_tournaments(bucket, offset, limit, request=None):
+    """
+    Returns (rows, total) for a slice of a precomputed list, rebuilding the
+    lists first if Redis has lost them.
+    """
+    key = TOP_TOURNAMENTS_KEYS[bucket]
+    client = get_redis_connection("default")
+    for _ in range(2):
+        pipe = client.pipeline()
+        pipe.exists(TOP_TOURNAMENTS_REFRESHED_KEY)
+        pipe.lrange(key, offset, offset + limit - 1)
+        pipe.llen(key)
+        built, rows, total = pipe.execute()
+        if built:
+            break
+        refresh_top_tournaments()
+    return [_absolute(json.loads(row), request) for row in rows], total
+
+
+def schedule_top_tournaments_refresh():
+    """
+    Queues a debounced rebuild once the surrounding transaction commits.
+    """
+
+    def _schedule():
+        from .tasks import refresh_top_tournaments_task
+
+        if cache.add(TOP_TOURNAMENTS_PENDING_KEY, 1, TOP_TOURNAMENTS_REFRESH_DELAY * 12):
+            refresh_top_tournaments_task.apply_async(
+                countdown=TOP_TOURNAMENTS_REFRESH_DELAY
+            )
+
+    transaction.on_commit(_schedule)
@@ -2,10 +2,12 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (GameViewSet, MatchViewSet, ReportViewSet,
                     TournamentColorViewSet, TournamentImageViewSet,
-                    TournamentViewSet, WinnerSubmissionViewSet)
+                    TournamentSeriesViewSet, TournamentViewSet,
+                    WinnerSubmissionViewSet)
 
 router = DefaultRouter()
 router.register(r"tournaments", TournamentViewSet, basename="tournament")
+router.register(r"tournament-series", TournamentSeriesViewSet)
 router.register(r"matches", MatchViewSet)
 router.register(r"games", GameViewSet)
 router.register(r"reports", ReportViewSet)
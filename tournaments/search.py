@@ -0,0 +1,113 @@
+"""
+Ranked search over tournaments, games, users and teams.
+
+Text is folded to a normalized form (lower case, Arabic letter variants
+mapped to their Persian equivalents, ZWNJ turned into a space, diacritics
+and tatweel removed) both on the stored column and on the query.
+
+On PostgreSQL the normalized column is matched with full-text search and
+pg_trgm, backed by the GIN expression indexes created by the
+`*_search_indexes` migrations; the expressions here must stay identical to
+the indexed ones. Other databases (SQLite in tests) fall back to a LIKE
+match on the same normalized form, using a `persian_normalize` SQL function
+registered on each new SQLite connection.
+"""
+
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramWordSimilarity)
+from django.db import connection
+from django.db.models import (Case, CharField, F, FloatField, Func, IntegerField,
+                              Q, Value, When)
+from django.db.models.functions import Length
+
+# Characters replaced one-for-one, followed by characters that are dropped.
+_REPLACE_FROM = "يىكۀة‌" + "۰۱۲۳۴۵۶۷۸۹" + "٠١٢٣٤٥٦٧٨٩"
+_REPLACE_TO = "ییکهه " + "0123456789" + "0123456789"
+_DROP = "ـًٌٍَُِّْ"
+
+_TRANSLATION = str.maketrans(_REPLACE_FROM, _REPLACE_TO, _DROP)
+
+SEARCH_CONFIG = "simple"
+
+
+def normalize_search_text(text):
+    """
+    Returns `text` in the normalized form used for matching.
+    """
+    if text is None:
+        return None
+    return text.lower().translate(_TRANSLATION)
+
+
+def normalize_search_query(text):
+    return re.sub(r"\s+", " ", normalize_search_text(text or "")).strip()
+
+
+class PersianNormalize(Func):
+    """
+    SQL equivalent of `normalize_search_text` for a single text column.
+    """
+
+    function = "LOWER"
+    arity = 1
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function="persian_normalize", **extra_context
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        # Literals rather than parameters so the expression matches the index.
+        template = "translate(lower(%%(expressions)s), '%s', '%s')" % (
+            _REPLACE_FROM + _DROP,
+            _REPLACE_TO,
+        )
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+def search_queryset(queryset, field, query):
+    """
+    Filters `queryset` to rows whose `field` matches `query`, annotated with
+    a `search_rank` and ordered best match first.
+    """
+    query = normalize_search_query(query)
+    if not query:
+        return queryset.none()
+    document = PersianNormalize(F(field))
+
+    if connection.vendor == "postgresql":
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.annotate(
+                search_document=document,
+                search_vector=SearchVector(document, config=SEARCH_CONFIG),
+            )
+            .filter(
+                Q(search_vector=search_query)
+                | Q(search_document__trigram_word_similar=query)
+                | Q(search_document__contains=query)
+            )
+            .annotate(
+                search_rank=SearchRank(F("search_vector"), search_query)
+                + TrigramWordSimilarity(Value(query), F("search_document"))
+            )
+            .order_by("-search_rank", "pk")
+        )
+
+    return (
+        queryset.annotate(search_document=document)
+        .filter(search_document__contains=query)
+        .annotate(
+            search_rank=Case(
+                When(search_document=query, then=Value(3.0)),
+                When(search_document__startswith=query, then=Value(2.0)),
+                default=Value(1.0),
+                output_field=FloatField(),
+            ),
+            search_length=Length("search_document", output_field=IntegerField()),
+        )
+        .order_by("-search_rank", "search_length", "pk")
+    )
@@ -1,10 +1,14 @@
+import copy
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 
 from users.serializers import TeamSerializer, UserReadOnlySerializer
 
 from .models import (Game, GameImage, GameManager, Match, Participant, Rank,
-                     Report, Scoring, Tournament, TournamentColor,
-                     TournamentImage, WinnerSubmission)
+                     Report, RoundCheckIn, Scoring, Tournament,
+                     TournamentColor, TournamentImage, TournamentSeries,
+                     WinnerSubmission)
 from .validators import FileValidator
 
 
@@ -78,6 +82,53 @@ class TournamentCreateUpdateSerializer(serializers.ModelSerializer):
         )
 
 
+class TournamentSeriesSerializer(serializers.ModelSerializer):
+    """Serializer for recurring tournament templates."""
+
+    class Meta:
+        model = TournamentSeries
+        fields = (
+            "id",
+            "name",
+            "is_active",
+            "frequency",
+            "interval",
+            "starts_on",
+            "ends_on",
+            "start_time",
+            "duration",
+            "game",
+            "type",
+            "mode",
+            "max_participants",
+            "team_size",
+            "description",
+            "rules",
+            "image",
+            "color",
+            "is_free",
+            "entry_fee",
+            "prize_pool",
+            "required_verification_level",
+            "min_rank",
+            "max_rank",
+            "creator",
+        )
+        read_only_fields = ("id", "creator")
+
+    def validate(self, attrs):
+        # Run the model's clean() against the merged state so an invalid
+        # template never materializes invalid tournaments.
+        series = copy.copy(self.instance) if self.instance else TournamentSeries()
+        for field, value in attrs.items():
+            setattr(series, field, value)
+        try:
+            series.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return attrs
+
+
 class TournamentReadOnlySerializer(serializers.ModelSerializer):
     """Serializer for reading tournament data."""
 
@@ -140,6 +191,10 @@ class TournamentReadOnlySerializer(serializers.ModelSerializer):
     def get_spots_left(self, obj):
         if obj.max_participants is None:
             return None
+        # Querysets may annotate the entrant count to avoid a COUNT per row.
+        entrant_count = getattr(obj, "entrant_count", None)
+        if entrant_count is not None:
+            return obj.max_participants - entrant_count
         if obj.type == "individual":
             return obj.max_participants - obj.participants.count()
         else:
@@ -256,10 +311,23 @@ class MatchReadOnlySerializer(serializers.ModelSerializer):
             "is_disputed",
             "dispute_reason",
             "room_id",
+            "participant1_checked_in",
+            "participant2_checked_in",
+            "is_forfeit",
         )
         read_only_fields = fields
 
 
+class RoundCheckInSerializer(serializers.ModelSerializer):
+    """Serializer for opening a round's check-in window."""
+
+    class Meta:
+        model = RoundCheckIn
+        fields = ("id", "tournament", "round", "opens_at", "closes_at", "processed_at")
+        read_only_fields = ("id", "tournament", "processed_at")
+        extra_kwargs = {"opens_at": {"required": False}}
+
+
 class ParticipantSerializer(serializers.ModelSerializer):
     """Serializer for the Participant model."""
 
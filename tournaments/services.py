@@ -1,16 +1,214 @@
+import datetime
 import random
 from decimal import Decimal
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, When
+from django.utils import timezone
 from rest_framework.exceptions import PermissionDenied
 
 from notifications.services import send_notification
 from notifications.tasks import send_email_notification, send_sms_notification
-from users.models import Team, User
+from users.leaderboards import record_match_wins, sync_player_scores
+from users.models import Team, TeamMembership, User
+from users.profiles import invalidate_public_profiles
+from users.tokens import revoke_user_tokens
 from verification.models import Verification
-from wallet.services import process_transaction
+from wallet.services import (
+    BATCH_ABORTED,
+    process_transaction,
+    process_transactions_bulk,
+)
+from .alerts import adjust_alert_counter
+from .stats import adjust_platform_stat
 from .exceptions import ApplicationError
-from .models import Match, Participant, Report, Tournament, WinnerSubmission
+from .leaderboards import refresh_user_scores, season_for
+from .models import (GameManager, Match, MatchParticipation, Participant,
+                     Report, RoundCheckIn, Scoring, Tournament, TournamentSeries,
+                     WinnerSubmission)
+from .rankings import schedule_top_tournaments_refresh
+
+# Fields copied verbatim from a TournamentSeries onto each tournament it
+# materializes, including the prize, rank and verification gates.
+SERIES_TOURNAMENT_FIELDS = (
+    "game_id",
+    "type",
+    "mode",
+    "max_participants",
+    "team_size",
+    "description",
+    "rules",
+    "image_id",
+    "color_id",
+    "is_free",
+    "entry_fee",
+    "prize_pool",
+    "required_verification_level",
+    "min_rank_id",
+    "max_rank_id",
+    "creator_id",
+)
+
+MANAGED_GAMES_CACHE_TIMEOUT = 60 * 60
+
+
+def _managed_games_cache_key(user_id):
+    return f"tournaments:managed_games:{user_id}"
+
+
+def annotate_entrant_count(queryset):
+    """
+    Annotates tournaments with `entrant_count` (participants for individual
+    tournaments, teams otherwise), which `TournamentReadOnlySerializer` uses
+    instead of a COUNT per row.
+    """
+    return queryset.annotate(
+        entrant_count=Case(
+            When(type="individual", then=Count("participants", distinct=True)),
+            default=Count("teams", distinct=True),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def get_managed_game_ids(user) -> frozenset:
+    """
+    Returns the ids of the games a user manages.
+
+    The set is memoized on the user object, so it is loaded at most once per
+    request, and cached in Redis until the user's GameManager rows change.
+    """
+    managed = getattr(user, "_managed_game_ids", None)
+    if managed is not None:
+        return managed
+
+    key = _managed_games_cache_key(user.id)
+    game_ids = cache.get(key)
+    if game_ids is None:
+        game_ids = list(
+            GameManager.objects.filter(user_id=user.id).values_list(
+                "game_id", flat=True
+            )
+        )
+        cache.set(key, game_ids, MANAGED_GAMES_CACHE_TIMEOUT)
+
+    managed = frozenset(game_ids)
+    user._managed_game_ids = managed
+    return managed
+
+
+def invalidate_managed_game_ids(user_id):
+    cache.delete(_managed_games_cache_key(user_id))
+
+
+def record_match_participations(matches):
+    """
+    Writes the MatchParticipation rows for newly created matches: one per
+    player, plus one per team for team matches, in a single bulk insert.
+    """
+    team_ids = {
+        team_id
+        for match in matches
+        for team_id in (match.participant1_team_id, match.participant2_team_id)
+        if team_id
+    }
+    members = {}
+    if team_ids:
+        for team_id, user_id in TeamMembership.objects.filter(
+            team_id__in=team_ids
+        ).values_list("team_id", "user_id"):
+            members.setdefault(team_id, []).append(user_id)
+
+    rows = []
+    for match in matches:
+        sides = (
+            (1, match.participant1_user_id, match.participant1_team_id),
+            (2, match.participant2_user_id, match.participant2_team_id),
+        )
+        for side, user_id, team_id in sides:
+            common = {"match_id": match.pk, "tournament_id": match.tournament_id, "side": side}
+            if user_id:
+                rows.append(MatchParticipation(user_id=user_id, **common))
+            if team_id:
+                rows.append(MatchParticipation(team_id=team_id, **common))
+                rows.extend(
+                    MatchParticipation(user_id=member_id, team_id=team_id, **common)
+                    for member_id in members.get(team_id, ())
+                )
+    MatchParticipation.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def rebuild_match_participations(matches):
+    """
+    Replaces the MatchParticipation rows of matches whose participants were
+    edited after creation.
+    """
+    with transaction.atomic():
+        MatchParticipation.objects.filter(match__in=matches).delete()
+        record_match_participations(matches)
+
+
+def sync_team_member_participations(team_id, user_ids, joined):
+    """
+    Adds or removes the players' rows for the team's unconfirmed matches when
+    they join or leave the team. Finished matches keep the roster they were
+    played with.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    open_matches = Match.objects.filter(
+        Q(participant1_team_id=team_id) | Q(participant2_team_id=team_id),
+        is_confirmed=False,
+    )
+    if not joined:
+        MatchParticipation.objects.filter(
+            team_id=team_id, user_id__in=user_ids, match__in=open_matches
+        ).delete()
+        return
+    MatchParticipation.objects.bulk_create(
+        [
+            MatchParticipation(
+                match_id=match.pk,
+                tournament_id=match.tournament_id,
+                team_id=team_id,
+                user_id=user_id,
+                side=1 if match.participant1_team_id == team_id else 2,
+            )
+            for match in open_matches.only(
+                "pk", "tournament_id", "participant1_team_id"
+            )
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def create_round_matches(tournament: Tournament, round_number: int, entrants):
+    """
+    Pairs consecutive entrants (users or teams, matching the tournament
+    type) into matches for a round, inserting the matches and their
+    participation rows in bulk. An odd entrant out gets no match.
+    """
+    field = "user" if tournament.type == "individual" else "team"
+    matches = Match.objects.bulk_create(
+        [
+            Match(
+                tournament=tournament,
+                match_type=tournament.type,
+                round=round_number,
+                **{
+                    f"participant1_{field}": entrants[i],
+                    f"participant2_{field}": entrants[i + 1],
+                },
+            )
+            for i in range(0, len(entrants) - 1, 2)
+        ]
+    )
+    record_match_participations(matches)
+    return matches
 
 
 def generate_matches(tournament: Tournament):
@@ -33,28 +231,14 @@ def generate_matches(tournament: Tournament):
             raise ApplicationError("Not enough participants to generate matches.")
 
         random.shuffle(participants)
-        for i in range(0, len(participants) - 1, 2):
-            Match.objects.create(
-                tournament=tournament,
-                match_type="individual",
-                round=1,
-                participant1_user=participants[i],
-                participant2_user=participants[i + 1],
-            )
+        create_round_matches(tournament, 1, participants)
     elif tournament.type == "team":
         teams = list(tournament.teams.all())
         if len(teams) < 2:
             raise ApplicationError("Not enough teams to generate matches.")
 
         random.shuffle(teams)
-        for i in range(0, len(teams) - 1, 2):
-            Match.objects.create(
-                tournament=tournament,
-                match_type="team",
-                round=1,
-                participant1_team=teams[i],
-                participant2_team=teams[i + 1],
-            )
+        create_round_matches(tournament, 1, teams)
 
 
 def confirm_match_result(match: Match, winner_id: int, proof_image=None):
@@ -77,6 +261,7 @@ def confirm_match_result(match: Match, winner_id: int, proof_image=None):
     match.is_confirmed = True
     match.result_proof = proof_image
     match.save()
+    record_match_wins(user_ids=[match.winner_user_id], team_ids=[match.winner_team_id])
 
     # Check if all matches in the round are confirmed
     tournament = match.tournament
@@ -89,40 +274,196 @@ def advance_to_next_round(tournament: Tournament, current_round: int):
     """
     Advances the winners of the current round to the next round.
     """
+    # Matches where neither side checked in are confirmed without a winner,
+    # so they are skipped when building the next round.
     if tournament.type == "individual":
         winners = [
-            m.winner_user for m in tournament.matches.filter(round=current_round)
+            m.winner_user
+            for m in tournament.matches.filter(round=current_round)
+            if m.winner_user_id
         ]
         if len(winners) < 2:
             # Tournament is over
             return
 
         random.shuffle(winners)
-        for i in range(0, len(winners) - 1, 2):
-            Match.objects.create(
-                tournament=tournament,
-                match_type="individual",
-                round=current_round + 1,
-                participant1_user=winners[i],
-                participant2_user=winners[i + 1],
-            )
+        create_round_matches(tournament, current_round + 1, winners)
     elif tournament.type == "team":
         winners = [
-            m.winner_team for m in tournament.matches.filter(round=current_round)
+            m.winner_team
+            for m in tournament.matches.filter(round=current_round)
+            if m.winner_team_id
         ]
         if len(winners) < 2:
             # Tournament is over
             return
 
         random.shuffle(winners)
-        for i in range(0, len(winners) - 1, 2):
-            Match.objects.create(
-                tournament=tournament,
-                match_type="team",
-                round=current_round + 1,
-                participant1_team=winners[i],
-                participant2_team=winners[i + 1],
+        create_round_matches(tournament, current_round + 1, winners)
+
+
+def open_check_in(tournament: Tournament, round_number: int, closes_at, opens_at=None):
+    """
+    Opens (or reschedules) the check-in window for a round of a tournament.
+    """
+    opens_at = opens_at or timezone.now()
+    if opens_at >= closes_at:
+        raise ApplicationError("Check-in must close after it opens.")
+    if not tournament.matches.filter(round=round_number).exists():
+        raise ApplicationError("This round has no matches yet.")
+
+    window, _ = RoundCheckIn.objects.update_or_create(
+        tournament=tournament,
+        round=round_number,
+        defaults={"opens_at": opens_at, "closes_at": closes_at, "processed_at": None},
+    )
+    return window
+
+
+def check_in_to_match(match: Match, user: User):
+    """
+    Checks a user (or the user's team) in to a match while the round's
+    check-in window is open.
+    """
+    try:
+        window = RoundCheckIn.objects.get(
+            tournament_id=match.tournament_id, round=match.round
+        )
+    except RoundCheckIn.DoesNotExist:
+        raise ApplicationError("Check-in is not open for this round.")
+    if not window.is_open(timezone.now()):
+        raise ApplicationError("Check-in is not open for this round.")
+    if match.is_confirmed:
+        raise ApplicationError("Match result has already been confirmed.")
+
+    if match.match_type == "individual":
+        if user.id == match.participant1_user_id:
+            side = 1
+        elif user.id == match.participant2_user_id:
+            side = 2
+        else:
+            raise PermissionDenied("You are not a participant in this match.")
+        user_ids = [user.id]
+    else:
+        side = None
+        for number, team in ((1, match.participant1_team), (2, match.participant2_team)):
+            # A side may not be filled yet.
+            if team is None:
+                continue
+            if team.captain_id == user.id or team.members.filter(id=user.id).exists():
+                side = number
+                user_ids = [team.captain_id, *team.members.values_list("id", flat=True)]
+                break
+        if side is None:
+            raise ApplicationError("You are not a participant in this match.")
+
+    Match.objects.filter(pk=match.pk).update(**{f"participant{side}_checked_in": True})
+    setattr(match, f"participant{side}_checked_in", True)
+    Participant.objects.filter(
+        tournament_id=match.tournament_id, user_id__in=user_ids, status="registered"
+    ).update(status="checked_in")
+    return match
+
+
+def forfeit_absent_entrants(window: RoundCheckIn):
+    """
+    Closes a check-in window: every unconfirmed match in the round is decided
+    in a single UPDATE, awarding the win to the side that checked in. Matches
+    where nobody checked in are confirmed without a winner. Absent entrants are
+    marked as eliminated and the round is advanced once it is complete.
+
+    Returns the number of forfeited matches.
+    """
+    tournament = window.tournament
+    absent = Q(participant1_checked_in=False) | Q(participant2_checked_in=False)
+    round_matches = Match.objects.filter(
+        tournament=tournament, round=window.round, is_confirmed=False
+    )
+    forfeited = round_matches.filter(absent)
+
+    # Collect the absent users before the forfeit UPDATE hides them.
+    absent_user_ids = set()
+    forfeited_ids = []
+    for match in forfeited.select_related(
+        "participant1_team", "participant2_team"
+    ).prefetch_related("participant1_team__members", "participant2_team__members"):
+        forfeited_ids.append(match.pk)
+        for side in (1, 2):
+            if getattr(match, f"participant{side}_checked_in"):
+                continue
+            if match.match_type == "individual":
+                absent_user_ids.add(getattr(match, f"participant{side}_user_id"))
+            else:
+                team = getattr(match, f"participant{side}_team")
+                # A side may not be filled yet.
+                if team is None:
+                    continue
+                absent_user_ids.add(team.captain_id)
+                absent_user_ids.update(m.id for m in team.members.all())
+
+    forfeited_count = forfeited.update(
+        winner_user=Case(
+            When(participant1_checked_in=True, then=F("participant1_user")),
+            When(participant2_checked_in=True, then=F("participant2_user")),
+            default=None,
+        ),
+        winner_team=Case(
+            When(participant1_checked_in=True, then=F("participant1_team")),
+            When(participant2_checked_in=True, then=F("participant2_team")),
+            default=None,
+        ),
+        is_confirmed=True,
+        is_forfeit=True,
+    )
+    winners = list(
+        Match.objects.filter(pk__in=forfeited_ids).values_list(
+            "winner_user_id", "winner_team_id"
+        )
+    )
+    record_match_wins(
+        user_ids=[user_id for user_id, _ in winners],
+        team_ids=[team_id for _, team_id in winners],
+    )
+    if absent_user_ids:
+        Participant.objects.filter(
+            tournament=tournament, user_id__in=absent_user_ids
+        ).update(status="eliminated")
+
+    RoundCheckIn.objects.filter(pk=window.pk).update(processed_at=timezone.now())
+
+    # Only advance when the sweep closed the round; otherwise the last
+    # confirm_match_result call has already done (or will do) it.
+    if (
+        forfeited_count
+        and not round_matches.exists()
+        and not tournament.matches.filter(round=window.round + 1).exists()
+    ):
+        advance_to_next_round(tournament, window.round)
+    return forfeited_count
+
+
+def sweep_check_in_deadlines(now=None):
+    """
+    Forfeits absent entrants for every check-in window whose deadline has
+    passed. Returns the total number of forfeited matches.
+    """
+    now = now or timezone.now()
+    total = 0
+    due_ids = RoundCheckIn.objects.filter(
+        processed_at__isnull=True, closes_at__lte=now
+    ).values_list("id", flat=True)
+    for window_id in list(due_ids):
+        with transaction.atomic():
+            window = (
+                RoundCheckIn.objects.select_for_update(skip_locked=True)
+                .select_related("tournament")
+                .filter(id=window_id, processed_at__isnull=True)
+                .first()
             )
+            if window is None:
+                continue
+            total += forfeit_absent_entrants(window)
+    return total
 
 
 def record_match_result(match: Match, winner_id, proof_image=None):
@@ -147,15 +488,37 @@ def record_match_result(match: Match, winner_id, proof_image=None):
     confirm_match_result(match, winner, proof_image)
 
 
+def get_verification_level(user):
+    """
+    Returns the user's verification level, or None if they have not started
+    verification. Always read from the database: access token claims can be
+    stale, and this gates paid writes.
+    """
+    try:
+        return user.verification.level
+    except Verification.DoesNotExist:
+        return None
+
+
+def _entry_fee_key(tournament, user, idempotency_key):
+    if not idempotency_key:
+        return None
+    return f"join:{tournament.pk}:{user.pk}:{idempotency_key}"
+
+
 def join_tournament(
     tournament: Tournament,
     user: User,
     team_id: int = None,
     member_ids: list[int] = None,
+    idempotency_key: str = None,
 ):
     """
     Handles the logic for a user or a team to join a tournament,
     including validation, fee deduction, and notification.
+
+    A client-supplied `idempotency_key` is scoped to the tournament and each
+    paying user, so a retried join never charges an entry fee twice.
     """
     # 0. Capacity Check
     if tournament.type == "individual":
@@ -166,25 +529,22 @@ def join_tournament(
             raise ApplicationError("This tournament is full.")
 
     # 1. Verification and Score Checks
-    try:
-        verification = user.verification
-    except Verification.DoesNotExist:
-        verification = None
+    verification_level = get_verification_level(user)
 
     if (
-        verification is None
-        or verification.level < tournament.required_verification_level
+        verification_level is None
+        or verification_level < tournament.required_verification_level
     ):
         raise ApplicationError(
             "You do not have the required verification level to join this tournament."
         )
 
-    if user.score >= 1000 and (verification is None or verification.level < 2):
+    if user.score >= 1000 and (verification_level is None or verification_level < 2):
         raise ApplicationError(
             "You must be verified at level 2 to join this tournament."
         )
 
-    if user.score >= 2000 and (verification is None or verification.level < 3):
+    if user.score >= 2000 and (verification_level is None or verification_level < 3):
         raise ApplicationError(
             "You must be verified at level 3 to join this tournament."
         )
@@ -201,6 +561,8 @@ def join_tournament(
                 amount=tournament.entry_fee,
                 transaction_type="entry_fee",
                 description=f"Entry fee for tournament: {tournament.name}",
+                tournament=tournament,
+                idempotency_key=_entry_fee_key(tournament, user, idempotency_key),
             )
             if error:
                 raise ApplicationError(error)
@@ -213,14 +575,14 @@ def join_tournament(
             raise ApplicationError("Team ID is required for team tournaments.")
 
         try:
-            team = Team.objects.get(id=team_id)
+            team = Team.objects.select_related("captain").get(id=team_id)
         except Team.DoesNotExist:
             raise ApplicationError("Invalid team ID.")
 
-        if user != team.captain:
+        if user.pk != team.captain_id:
             raise ApplicationError("Only the team captain can join a tournament.")
 
-        if team.members.count() + 1 != tournament.team_size:
+        if team.member_count + 1 != tournament.team_size:
             raise ApplicationError(
                 f"This tournament requires teams of size {tournament.team_size}."
             )
@@ -229,30 +591,35 @@ def join_tournament(
             raise ApplicationError("Your team has already joined this tournament.")
 
         # Fetch all members including the captain
-        members = list(team.members.all()) + [team.captain]
+        members = list(team.members.exclude(pk=team.captain_id)) + [team.captain]
 
-        if any(
-            tournament.participants.filter(id=member.id).exists() for member in members
-        ):
+        if tournament.participants.filter(
+            id__in=[member.pk for member in members]
+        ).exists():
             raise ApplicationError(
                 "One or more members of your team are already in this tournament."
             )
 
-        # 3. Handle Entry Fee for Team using the safe wallet service
+        # 3. Handle Entry Fee for Team using the safe wallet service. Either
+        # every member is charged or, if anyone cannot pay, nobody is.
         if not tournament.is_free:
-            for member in members:
-                _, error = process_transaction(
-                    user=member,
-                    amount=tournament.entry_fee,
-                    transaction_type="entry_fee",
-                    description=f"Entry fee for tournament: {tournament.name}",
-                )
-                if error:
-                    # Note: In a real-world scenario, we would need to roll back
-                    # the transactions for other team members who were already charged.
-                    # The current `process_transaction` is atomic per user, but the
-                    # overall team join is not. This is a complex problem.
-                    # For now, we raise an error for the first member that fails.
+            results = process_transactions_bulk(
+                [
+                    {
+                        "user": member,
+                        "amount": tournament.entry_fee,
+                        "transaction_type": "entry_fee",
+                        "description": f"Entry fee for tournament: {tournament.name}",
+                        "tournament": tournament,
+                        "idempotency_key": _entry_fee_key(
+                            tournament, member, idempotency_key
+                        ),
+                    }
+                    for member in members
+                ]
+            )
+            for member, (_, error) in zip(members, results):
+                if error and error != BATCH_ABORTED:
                     raise ApplicationError(
                         f"Failed to process fee for {member.username}: {error}"
                     )
@@ -283,9 +650,22 @@ def dispute_match_result(match: Match, user, reason: str):
     if not reason:
         raise ApplicationError("A reason for the dispute must be provided.")
 
+    newly_disputed = not match.is_disputed
     match.is_disputed = True
     match.dispute_reason = reason
     match.save()
+    if newly_disputed:
+        adjust_alert_counter("open_disputes", 1)
+
+
+def resolve_match_disputes(matches):
+    """
+    Clears the disputed flag on the given matches and returns how many
+    disputes were closed.
+    """
+    resolved = matches.filter(is_disputed=True).update(is_disputed=False)
+    adjust_alert_counter("open_disputes", -resolved)
+    return resolved
 
 
 def get_tournament_winners(tournament: Tournament):
@@ -307,9 +687,11 @@ def get_tournament_winners(tournament: Tournament):
     return winners
 
 
-def pay_prize(tournament: Tournament, winner):
+def pay_prize(tournament: Tournament, winner, idempotency_key: str = None):
     """
-    Pays the prize to the winner using the safe wallet service.
+    Pays the prize to the winner using the safe wallet service. Without an
+    explicit `idempotency_key` the prize is keyed by tournament and winner,
+    so approving a win again never pays it twice.
     """
     # This is a simplified logic. In a real application, you would
     # probably have a more complex prize distribution system.
@@ -324,6 +706,8 @@ def pay_prize(tournament: Tournament, winner):
             amount=prize_amount,
             transaction_type="prize",
             description=f"Prize for winning tournament: {tournament.name}",
+            tournament=tournament,
+            idempotency_key=idempotency_key or f"prize:{tournament.pk}:{winner.pk}",
         )
         if error:
             # In a real app, this should trigger an alert for manual review.
@@ -332,21 +716,30 @@ def pay_prize(tournament: Tournament, winner):
 
 def refund_entry_fees(tournament: Tournament, cheater):
     """
-    Refunds entry fees to all participants except the cheater.
+    Refunds entry fees to all participants except the cheater, at most once
+    per participant.
     """
     if tournament.is_free or not tournament.entry_fee:
         return
 
-    for participant in tournament.participants.all():
-        if participant.user != cheater:
-            _, error = process_transaction(
-                user=participant.user,
-                amount=tournament.entry_fee,
-                transaction_type="deposit", # Refund is a type of deposit
-                description=f"Refund for tournament: {tournament.name}",
-            )
-            if error:
-                print(f"ERROR: Failed to refund {participant.user.username} for t: {tournament.id}: {error}")
+    refunded = list(tournament.participants.exclude(pk=cheater.pk))
+    results = process_transactions_bulk(
+        [
+            {
+                "user": participant,
+                "amount": tournament.entry_fee,
+                "transaction_type": "deposit",  # Refund is a type of deposit
+                "description": f"Refund for tournament: {tournament.name}",
+                "tournament": tournament,
+                "idempotency_key": f"refund:{tournament.pk}:{participant.pk}",
+            }
+            for participant in refunded
+        ],
+        all_or_nothing=False,
+    )
+    for participant, (_, error) in zip(refunded, results):
+        if error:
+            print(f"ERROR: Failed to refund {participant.username} for t: {tournament.id}: {error}")
 
 
 def create_report_service(
@@ -382,6 +775,7 @@ def resolve_report_service(report: Report, ban_user: bool):
         reported_user = report.reported_user
         reported_user.is_active = False
         reported_user.save()
+        revoke_user_tokens(reported_user)
         report.status = "resolved"
         report.save()
         send_notification(
@@ -451,6 +845,8 @@ def distribute_scores_for_tournament(tournament: Tournament, score_distribution=
         score_distribution = [5, 4, 3, 2, 1]
 
     users_to_update = []
+    # Points awarded per user in this tournament, recorded as Scoring rows.
+    awards = {}
     if tournament.type == "individual":
         # Get the top players from the tournament's m2m field
         top_placements = tournament.top_players.all()
@@ -458,22 +854,54 @@ def distribute_scores_for_tournament(tournament: Tournament, score_distribution=
             if i < len(score_distribution):
                 player.score += score_distribution[i]
                 users_to_update.append(player)
+                awards[player.id] = awards.get(player.id, 0) + score_distribution[i]
     else:  # 'team'
         # Get the top teams from the tournament's m2m field
         top_placements = tournament.top_teams.all()
+        fetched = {}
         for i, team in enumerate(top_placements):
             if i < len(score_distribution):
-                # Award points to every member of the team, including the captain
-                all_members = list(team.members.all()) + [team.captain]
-                for member in all_members:
-                    # It's important to fetch the user again to avoid stale data
-                    user = User.objects.get(id=member.id)
+                # Award points to every member of the team, including the
+                # captain, who is usually a member too and must count once.
+                member_ids = {member.id for member in team.members.all()}
+                member_ids.add(team.captain_id)
+                for member_id in member_ids:
+                    user = fetched.get(member_id)
+                    if user is None:
+                        # It's important to fetch the user again to avoid stale data
+                        user = fetched[member_id] = User.objects.get(id=member_id)
+                        users_to_update.append(user)
                     user.score += score_distribution[i]
-                    users_to_update.append(user)
+                    awards[user.id] = awards.get(user.id, 0) + score_distribution[i]
 
     # Use a transaction to ensure all score updates are atomic and efficient
     with transaction.atomic():
         User.objects.bulk_update(users_to_update, ["score"])
+        sync_player_scores(users_to_update)
+        invalidate_public_profiles(awards.keys())
+        # Points add up with earlier distributions, as they do on User.score.
+        scored = set(
+            Scoring.objects.filter(
+                tournament=tournament, user_id__in=awards
+            ).values_list("user_id", flat=True)
+        )
+        Scoring.objects.bulk_create(
+            [
+                Scoring(tournament=tournament, user_id=user_id, score=points)
+                for user_id, points in awards.items()
+                if user_id not in scored
+            ]
+        )
+        by_points = {}
+        for user_id in scored:
+            by_points.setdefault(awards[user_id], []).append(user_id)
+        for points, user_ids in by_points.items():
+            Scoring.objects.filter(tournament=tournament, user_id__in=user_ids).update(
+                score=F("score") + points
+            )
+        refresh_user_scores(
+            tournament.game_id, season_for(tournament.start_date), awards.keys()
+        )
 
     # After scores are updated, ranks might change.
     # This part still involves individual saves, but rank updates are
@@ -510,3 +938,93 @@ def reject_winner_submission_service(submission: WinnerSubmission):
         notification_type="winner_submission_status_change",
     )
     return submission
+
+
+def get_series_occurrences(series: TournamentSeries, start, end):
+    """
+    Returns the aware start datetimes of a series' occurrences falling within
+    [start, end].
+    """
+    step_days = series.interval * (7 if series.frequency == "weekly" else 1)
+    first = series.starts_on
+    last = min(end.date(), series.ends_on) if series.ends_on else end.date()
+
+    # Jump straight to the first occurrence on or after `start`.
+    offset = (start.date() - first).days
+    if offset > 0:
+        first += datetime.timedelta(days=-(-offset // step_days) * step_days)
+
+    occurrences = []
+    day = first
+    while day <= last:
+        starts_at = timezone.make_aware(datetime.datetime.combine(day, series.start_time))
+        if start <= starts_at <= end:
+            occurrences.append(starts_at)
+        day += datetime.timedelta(days=step_days)
+    return occurrences
+
+
+def materialize_tournament_series(series: TournamentSeries, horizon_days=None, now=None):
+    """
+    Creates the series' tournaments scheduled between now and the horizon
+    with a single bulk_create. Occurrences that already exist are skipped, so
+    the function is safe to run repeatedly.
+
+    Returns the list of created tournaments, as saved.
+    """
+    if horizon_days is None:
+        horizon_days = settings.TOURNAMENT_SERIES_HORIZON_DAYS
+    now = now or timezone.now()
+    occurrences = get_series_occurrences(
+        series, now, now + datetime.timedelta(days=horizon_days)
+    )
+    if not occurrences:
+        return []
+
+    template = {field: getattr(series, field) for field in SERIES_TOURNAMENT_FIELDS}
+    with transaction.atomic():
+        # Concurrent runs for the same series queue here, so the occurrences
+        # found missing below are exactly the ones this run inserts.
+        TournamentSeries.objects.select_for_update().filter(pk=series.pk).first()
+        existing = set(
+            series.tournaments.filter(start_date__in=occurrences).values_list(
+                "start_date", flat=True
+            )
+        )
+        missing = [starts_at for starts_at in occurrences if starts_at not in existing]
+        if not missing:
+            return []
+        Tournament.objects.bulk_create(
+            [
+                Tournament(
+                    name=f"{series.name} - {timezone.localtime(starts_at):%Y-%m-%d}",
+                    start_date=starts_at,
+                    end_date=starts_at + series.duration,
+                    series=series,
+                    **template,
+                )
+                for starts_at in missing
+            ],
+            ignore_conflicts=True,
+        )
+        # bulk_create neither sets pks with ignore_conflicts nor sends
+        # post_save, so the rows are read back and the signal handlers'
+        # work done here. New tournaments have no entrants, so there are no
+        # dashboards to invalidate.
+        created = list(
+            series.tournaments.filter(start_date__in=missing).order_by("start_date")
+        )
+        adjust_platform_stat("total_tournaments", len(created))
+        schedule_top_tournaments_refresh()
+    return created
+
+
+def materialize_all_tournament_series(horizon_days=None, now=None):
+    """
+    Materializes every active series. Returns the number of tournaments
+    created.
+    """
+    created = 0
+    for series in TournamentSeries.objects.filter(is_active=True):
+        created += len(materialize_tournament_series(series, horizon_days, now))
+    return created
@@ -0,0 +1,99 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import Team, TeamMembership
+from .leaderboards import refresh_user_scores, season_for
+from .models import GameManager, Match, Scoring, Tournament
+from .rankings import schedule_top_tournaments_refresh
+from .search import normalize_search_text
+from .services import (invalidate_managed_game_ids, record_match_participations,
+                       sync_team_member_participations)
+from .stats import adjust_platform_stat
+
+
+@receiver(pre_save, sender=GameManager)
+def remember_previous_game_manager(sender, instance, raw=False, **kwargs):
+    # A row reassigned to another user must also drop the previous user's
+    # cached access.
+    if instance.pk and not raw:
+        instance._previous_user_id = (
+            GameManager.objects.filter(pk=instance.pk)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=GameManager)
+@receiver(post_delete, sender=GameManager)
+def game_manager_changed(sender, instance, **kwargs):
+    invalidate_managed_game_ids(instance.user_id)
+    previous_user_id = getattr(instance, "_previous_user_id", None)
+    if previous_user_id not in (None, instance.user_id):
+        invalidate_managed_game_ids(previous_user_id)
+
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def tournament_changed(sender, instance, **kwargs):
+    schedule_top_tournaments_refresh()
+
+
+@receiver(post_save, sender=Tournament)
+def count_created_tournament(sender, instance, created, **kwargs):
+    if created:
+        adjust_platform_stat("total_tournaments", 1)
+
+
+@receiver(post_delete, sender=Tournament)
+def count_deleted_tournament(sender, instance, **kwargs):
+    adjust_platform_stat("total_tournaments", -1)
+
+
+@receiver(connection_created)
+def register_search_functions(sender, connection, **kwargs):
+    # SQLite fallback for tournaments.search.PersianNormalize.
+    if connection.vendor == "sqlite":
+        connection.connection.create_function(
+            "persian_normalize", 1, normalize_search_text, deterministic=True
+        )
+
+
+@receiver(post_save, sender=Scoring)
+@receiver(post_delete, sender=Scoring)
+def scoring_changed(sender, instance, **kwargs):
+    tournament = instance.tournament
+    refresh_user_scores(
+        tournament.game_id, season_for(tournament.start_date), [instance.user_id]
+    )
+
+
+@receiver(post_save, sender=Match)
+def match_created(sender, instance, created, raw=False, **kwargs):
+    # Bulk-created rounds write their participations themselves.
+    if created and not raw:
+        record_match_participations([instance])
+
+
+@receiver(post_save, sender=TeamMembership)
+def team_member_joined(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        sync_team_member_participations(instance.team_id, [instance.user_id], joined=True)
+
+
+@receiver(post_delete, sender=TeamMembership)
+def team_member_left(sender, instance, **kwargs):
+    sync_team_member_participations(instance.team_id, [instance.user_id], joined=False)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def team_members_added(sender, instance, action, reverse, pk_set, **kwargs):
+    # `team.members.add()` bulk-inserts without TeamMembership signals;
+    # removals and clears delete row by row and reach `team_member_left`.
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        for team_id in pk_set:
+            sync_team_member_participations(team_id, [instance.pk], joined=True)
+    else:
+        sync_team_member_participations(instance.pk, pk_set, joined=True)
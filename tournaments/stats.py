@@ -0,0 +1,83 @@
+"""
+Platform-wide statistics shown on the landing page, kept in a Redis hash.
+
+Counters are adjusted incrementally when prizes are paid, tournaments are
+created or deleted and users sign up, and reconciled against the database
+nightly to correct any drift. Prize money is stored in hundredths so it can
+be incremented atomically with HINCRBY.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django_redis import get_redis_connection
+
+PLATFORM_STATS_KEY = "platform_stats"
+PLATFORM_STATS_FIELDS = ("total_prize_money", "total_tournaments", "total_players")
+
+
+def _to_stored(name, value):
+    if name == "total_prize_money":
+        return int(Decimal(value) * 100)
+    return int(value)
+
+
+def _from_stored(name, value):
+    if name == "total_prize_money":
+        return (Decimal(int(value)) / 100).quantize(Decimal("0.01"))
+    return int(value)
+
+
+def reconcile_platform_stats():
+    """
+    Recomputes every counter from the database and stores it in Redis.
+    """
+    # Imported lazily: this module is used by the wallet and users apps.
+    from users.models import User
+    from wallet.models import Transaction
+
+    from .models import Tournament
+
+    stats = {
+        "total_prize_money": Transaction.objects.filter(
+            transaction_type="prize"
+        ).aggregate(total=Sum("amount"))["total"]
+        or Decimal("0"),
+        "total_tournaments": Tournament.objects.count(),
+        "total_players": User.objects.count(),
+    }
+    get_redis_connection("default").hset(
+        PLATFORM_STATS_KEY,
+        mapping={name: _to_stored(name, value) for name, value in stats.items()},
+    )
+    return {name: _from_stored(name, _to_stored(name, value)) for name, value in stats.items()}
+
+
+def get_platform_stats():
+    """
+    Returns all counters with a single HGETALL, reconciling from the database
+    if any counter is missing (e.g. after a Redis flush).
+    """
+    values = get_redis_connection("default").hgetall(PLATFORM_STATS_KEY)
+    values = {name.decode(): value for name, value in values.items()}
+    if any(name not in values for name in PLATFORM_STATS_FIELDS):
+        return reconcile_platform_stats()
+    return {name: _from_stored(name, values[name]) for name in PLATFORM_STATS_FIELDS}
+
+
+def adjust_platform_stat(name, delta):
+    """
+    Adjusts a counter once the surrounding transaction commits. A missing
+    hash is left alone; the next read rebuilds it from the database.
+    """
+    if not delta:
+        return
+    delta = _to_stored(name, delta)
+
+    def _apply():
+        client = get_redis_connection("default")
+        if client.exists(PLATFORM_STATS_KEY):
+            client.hincrby(PLATFORM_STATS_KEY, name, delta)
+
+    transaction.on_commit(_apply)
@@ -1,4 +1,5 @@
 from celery import shared_task
+from django.core.cache import cache
 from django.core.management import call_command
 import logging
 
@@ -17,6 +18,8 @@ def run_seed_data_task(**options):
         # passes them as keyword arguments without the '--'.
         # We need to filter out None values so call_command doesn't pass them.
         command_options = {k: v for k, v in options.items() if v is not None}
+        # Celery workers are daemonic and cannot fork seeding processes.
+        command_options.setdefault('workers', 1)
 
         call_command('seed_data', **command_options)
 
@@ -25,3 +28,61 @@ def run_seed_data_task(**options):
     except Exception as e:
         logger.error(f"An error occurred during the seed_data task: {e}", exc_info=True)
         return f"An error occurred: {e}"
+
+
+@shared_task
+def sweep_check_in_deadlines_task():
+    """
+    Periodic task that forfeits entrants who missed their round's check-in
+    deadline and advances their opponents.
+    """
+    from .services import sweep_check_in_deadlines
+
+    forfeited = sweep_check_in_deadlines()
+    if forfeited:
+        logger.info(f"Check-in sweep forfeited {forfeited} matches.")
+    return forfeited
+
+
+@shared_task
+def reconcile_admin_alert_counters_task():
+    """
+    Periodic task that rebuilds the admin alert counters from the database.
+    """
+    from .alerts import reconcile_alert_counters
+
+    return reconcile_alert_counters()
+
+
+@shared_task
+def materialize_tournament_series_task(horizon_days=None):
+    """
+    Periodic task that creates upcoming tournaments for every active series.
+    """
+    from .services import materialize_all_tournament_series
+
+    created = materialize_all_tournament_series(horizon_days=horizon_days)
+    logger.info(f"Materialized {created} tournaments from series.")
+    return created
+
+
+@shared_task
+def reconcile_platform_stats_task():
+    """
+    Nightly task that rebuilds the platform statistics from the database.
+    """
+    from .stats import reconcile_platform_stats
+
+    stats = reconcile_platform_stats()
+    return {name: str(value) for name, value in stats.items()}
+
+
+@shared_task
+def refresh_top_tournaments_task():
+    """
+    Rebuilds the precomputed top tournaments lists.
+    """
+    from .rankings import TOP_TOURNAMENTS_PENDING_KEY, refresh_top_tournaments
+
+    cache.delete(TOP_TOURNAMENTS_PENDING_KEY)
+    return refresh_top_tournaments()
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from decimal import Decimal
 from unittest.mock import patch
 
 from django.core.exceptions import ValidationError
@@ -6,7 +7,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.utils import timezone
 from rest_framework import status
-from io import BytesIO
+from io import BytesIO, StringIO
 
 from PIL import Image
 from rest_framework.test import APIClient, APITestCase
@@ -15,8 +16,9 @@ from tournament_project.celery import app as celery_app
 from users.models import Team, User
 from verification.models import Verification
 
-from .models import (Game, GameManager, Match, Report, Tournament, TournamentColor,
-                     TournamentImage, WinnerSubmission)
+from .models import (Game, GameManager, Match, MatchParticipation, Participant,
+                     Report, RoundCheckIn, Scoring, Tournament, TournamentColor,
+                     TournamentImage, TournamentSeries, WinnerSubmission)
 
 
 class TournamentModelTests(TestCase):
@@ -310,6 +312,36 @@ class TournamentViewSetTests(APITestCase):
             paid_tournament.participants.filter(id=self.user.id).exists()
         )
 
+    def test_join_retry_with_idempotency_key_charges_once(self):
+        self.user.wallet.total_balance = 200
+        self.user.wallet.withdrawable_balance = 200
+        self.user.wallet.save()
+        paid_tournament = Tournament.objects.create(
+            name="Retried Tournament",
+            game=self.game,
+            start_date=timezone.now() + timedelta(days=1),
+            end_date=timezone.now() + timedelta(days=2),
+            is_free=False,
+            entry_fee=100,
+            type="individual",
+        )
+        url = f"{self.tournaments_url}tournaments/{paid_tournament.id}/join/"
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(url, HTTP_IDEMPOTENCY_KEY="join-1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # The fee was charged but the registration is lost, e.g. a crash
+        # before the response; the client retries with the same key.
+        Participant.objects.filter(tournament=paid_tournament).delete()
+        response = self.client.post(url, HTTP_IDEMPOTENCY_KEY="join-1")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.user.wallet.refresh_from_db()
+        self.assertEqual(self.user.wallet.withdrawable_balance, 100)
+
+        response = self.client.post(url, HTTP_IDEMPOTENCY_KEY="k" * 65)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_join_paid_team_tournament(self):
         """
         Test that a user can join a paid team tournament and the entry fee is deducted.
@@ -364,6 +396,23 @@ class TournamentViewSetTests(APITestCase):
             paid_tournament.participants.filter(id=self.user.id).exists()
         )
 
+    def test_join_checks_verification_level_in_the_database(self):
+        from users.tokens import UserAccessToken
+
+        access = UserAccessToken.for_user(self.user)
+        self.assertEqual(access["verification_level"], 2)
+        self.user.verification.level = 1
+        self.user.verification.save()
+        self.tournament.required_verification_level = 2
+        self.tournament.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = self.client.post(
+            f"{self.tournaments_url}tournaments/{self.tournament.id}/join/"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.tournament.participants.filter(id=self.user.id).exists())
+
     def test_generate_matches(self):
         self.client.force_authenticate(user=self.admin_user)
         p1 = User.objects.create_user(username="p1", password="p", phone_number="+3")
@@ -458,6 +507,158 @@ class MatchViewSetTests(APITestCase):
         self.assertTrue(self.match.is_disputed)
 
 
+class MatchCheckInTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.matches_url = "/api/tournaments/matches/"
+        self.users = [
+            User.objects.create_user(
+                username=f"player{i}", password="p", phone_number=f"+40{i}"
+            )
+            for i in range(4)
+        ]
+        self.game = Game.objects.create(name="Test Game")
+        self.tournament = Tournament.objects.create(
+            name="Check-in Tournament",
+            game=self.game,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+        )
+        for user in self.users:
+            Participant.objects.create(user=user, tournament=self.tournament)
+        self.match1 = Match.objects.create(
+            tournament=self.tournament,
+            round=1,
+            participant1_user=self.users[0],
+            participant2_user=self.users[1],
+        )
+        self.match2 = Match.objects.create(
+            tournament=self.tournament,
+            round=1,
+            participant1_user=self.users[2],
+            participant2_user=self.users[3],
+        )
+        self.window = RoundCheckIn.objects.create(
+            tournament=self.tournament,
+            round=1,
+            opens_at=timezone.now() - timedelta(minutes=5),
+            closes_at=timezone.now() + timedelta(minutes=10),
+        )
+
+    def test_check_in_marks_side_and_participant(self):
+        self.client.force_authenticate(user=self.users[1])
+        response = self.client.post(f"{self.matches_url}{self.match1.id}/check_in/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.match1.refresh_from_db()
+        self.assertFalse(self.match1.participant1_checked_in)
+        self.assertTrue(self.match1.participant2_checked_in)
+        self.assertEqual(
+            Participant.objects.get(user=self.users[1]).status, "checked_in"
+        )
+
+    def test_check_in_after_deadline_fails(self):
+        self.window.closes_at = timezone.now() - timedelta(minutes=1)
+        self.window.save()
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.post(f"{self.matches_url}{self.match1.id}/check_in/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_check_in_by_non_participant_fails(self):
+        self.client.force_authenticate(user=self.users[2])
+        response = self.client.post(f"{self.matches_url}{self.match1.id}/check_in/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_check_in_to_team_match_with_an_empty_side(self):
+        captain = User.objects.create_user(
+            username="checkin_captain", password="p", phone_number="+290"
+        )
+        match = Match.objects.create(
+            tournament=self.tournament,
+            round=1,
+            match_type="team",
+            participant1_team=Team.objects.create(name="Check-in Team", captain=captain),
+        )
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.post(f"{self.matches_url}{match.id}/check_in/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=captain)
+        response = self.client.post(f"{self.matches_url}{match.id}/check_in/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        match.refresh_from_db()
+        self.assertTrue(match.participant1_checked_in)
+
+    def test_sweeper_forfeits_absent_entrants_and_advances(self):
+        from .services import sweep_check_in_deadlines
+
+        Match.objects.filter(pk=self.match1.pk).update(participant1_checked_in=True)
+        Match.objects.filter(pk=self.match2.pk).update(participant2_checked_in=True)
+
+        forfeited = sweep_check_in_deadlines(now=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(forfeited, 2)
+        self.match1.refresh_from_db()
+        self.match2.refresh_from_db()
+        self.assertTrue(self.match1.is_forfeit)
+        self.assertEqual(self.match1.winner_user, self.users[0])
+        self.assertEqual(self.match2.winner_user, self.users[3])
+        self.assertEqual(
+            Participant.objects.get(user=self.users[1]).status, "eliminated"
+        )
+        self.window.refresh_from_db()
+        self.assertIsNotNone(self.window.processed_at)
+        final = Match.objects.get(tournament=self.tournament, round=2)
+        self.assertEqual(
+            {final.participant1_user, final.participant2_user},
+            {self.users[0], self.users[3]},
+        )
+
+    def test_sweeper_handles_team_matches_with_an_empty_side(self):
+        from .services import sweep_check_in_deadlines
+
+        captain = User.objects.create_user(
+            username="sweep_captain", password="p", phone_number="+291"
+        )
+        tournament = Tournament.objects.create(
+            name="Team Check-in Cup",
+            game=self.game,
+            type="team",
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+        )
+        Participant.objects.create(user=captain, tournament=tournament)
+        match = Match.objects.create(
+            tournament=tournament,
+            round=1,
+            match_type="team",
+            participant1_team=Team.objects.create(name="Sweep Team", captain=captain),
+        )
+        window = RoundCheckIn.objects.create(
+            tournament=tournament,
+            round=1,
+            opens_at=timezone.now() - timedelta(minutes=5),
+            closes_at=timezone.now() + timedelta(minutes=10),
+        )
+
+        sweep_check_in_deadlines(now=timezone.now() + timedelta(hours=1))
+
+        window.refresh_from_db()
+        self.assertIsNotNone(window.processed_at)
+        match.refresh_from_db()
+        self.assertTrue(match.is_forfeit)
+        self.assertEqual(
+            Participant.objects.get(user=captain, tournament=tournament).status,
+            "eliminated",
+        )
+
+    def test_sweeper_ignores_open_windows(self):
+        from .services import sweep_check_in_deadlines
+
+        self.assertEqual(sweep_check_in_deadlines(), 0)
+        self.match1.refresh_from_db()
+        self.assertFalse(self.match1.is_confirmed)
+
+
 class ReportViewSetTests(APITestCase):
     def setUp(self):
         self.client = APIClient()
@@ -593,6 +794,41 @@ class WinnerSubmissionViewSetTests(APITestCase):
         submission.refresh_from_db()
         self.assertEqual(submission.status, "rejected")
 
+    def test_approving_twice_pays_the_prize_once(self):
+        self.tournament.prize_pool = 500
+        self.tournament.save()
+        submission = WinnerSubmission.objects.create(
+            winner=self.winner, tournament=self.tournament, video="v.mp4"
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        for _ in range(2):
+            self.client.post(f"{self.submissions_url}{submission.id}/approve/")
+
+        self.winner.wallet.refresh_from_db()
+        self.assertEqual(self.winner.wallet.total_balance, Decimal("500.00"))
+        self.assertEqual(self.winner.wallet.transactions.count(), 1)
+
+    def test_reject_submission_refunds_other_participants(self):
+        others = [
+            User.objects.create_user(
+                username=f"refunded{i}", password="p", phone_number=f"+41{i}"
+            )
+            for i in range(2)
+        ]
+        for user in [self.winner] + others:
+            Participant.objects.create(user=user, tournament=self.tournament)
+        submission = WinnerSubmission.objects.create(
+            winner=self.winner, tournament=self.tournament, video="v.mp4"
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.client.post(f"{self.submissions_url}{submission.id}/reject/")
+
+        self.assertEqual(self.winner.wallet.transactions.count(), 0)
+        for user in others:
+            user.wallet.refresh_from_db()
+            self.assertEqual(user.wallet.total_balance, Decimal("100.00"))
+            self.assertEqual(user.wallet.transactions.get().transaction_type, "deposit")
+
     def test_approve_submission_by_creator(self):
         creator = User.objects.create_user(
             username="creator", password="p", phone_number="+403"
@@ -752,6 +988,832 @@ class GameManagerPermissionsTests(APITestCase):
         response = self.client.post(self.tournaments_url, data)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_warm_permission_check_runs_no_queries(self):
+        """Managed games are cached, so repeated checks cost no queries."""
+        from types import SimpleNamespace
+
+        from .permissions import IsGameManagerOrAdmin
+
+        permission = IsGameManagerOrAdmin()
+        view = SimpleNamespace(action="update")
+        request = SimpleNamespace(user=self.game_manager)
+        self.assertTrue(
+            permission.has_object_permission(
+                request, view, self.tournament_in_managed_game
+            )
+        )
+
+        # A fresh user object still hits the Redis copy, not the database.
+        request = SimpleNamespace(user=User.objects.get(pk=self.game_manager.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                permission.has_object_permission(
+                    request, view, self.tournament_in_managed_game
+                )
+            )
+
+    def test_removing_manager_invalidates_cached_games(self):
+        from .services import get_managed_game_ids
+
+        self.assertIn(self.managed_game.id, get_managed_game_ids(self.game_manager))
+        GameManager.objects.filter(user=self.game_manager).delete()
+        fresh_user = User.objects.get(pk=self.game_manager.pk)
+        self.assertNotIn(self.managed_game.id, get_managed_game_ids(fresh_user))
+
+    def test_reassigning_manager_invalidates_previous_user(self):
+        from .services import get_managed_game_ids
+
+        self.assertIn(self.managed_game.id, get_managed_game_ids(self.game_manager))
+        new_manager = User.objects.create_user(
+            username="new_manager", password="p", phone_number="+998"
+        )
+        manager = GameManager.objects.get(user=self.game_manager)
+        manager.user = new_manager
+        manager.save()
+
+        fresh_user = User.objects.get(pk=self.game_manager.pk)
+        self.assertNotIn(self.managed_game.id, get_managed_game_ids(fresh_user))
+        self.assertIn(self.managed_game.id, get_managed_game_ids(new_manager))
+
+
+class TournamentAdminTests(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin", password="password", phone_number="+900"
+        )
+        self.client.force_login(self.admin_user)
+        self.game = Game.objects.create(name="Admin Game")
+        self.tournament = Tournament.objects.create(
+            name="Large Tournament",
+            game=self.game,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+            max_participants=1000,
+        )
+        players = User.objects.bulk_create(
+            User(
+                username=f"admin_player{i}",
+                phone_number=f"+91{i:03d}",
+                referral_code=f"admin-ref-{i}",
+            )
+            for i in range(25)
+        )
+        Participant.objects.bulk_create(
+            Participant(user=player, tournament=self.tournament) for player in players
+        )
+
+    def test_changelist_shows_annotated_counts(self):
+        response = self.client.get("/admin/tournaments/tournament/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tournament = response.context["cl"].result_list[0]
+        self.assertEqual(tournament.participant_count, 25)
+        self.assertEqual(tournament.match_count, 0)
+
+    def test_change_page_paginates_participant_inline(self):
+        response = self.client.get(
+            f"/admin/tournaments/tournament/{self.tournament.id}/change/"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        participant_formset = next(
+            inline.formset
+            for inline in response.context["inline_admin_formsets"]
+            if inline.formset.model is Participant
+        )
+        self.assertEqual(participant_formset.paginator.count, 25)
+        self.assertEqual(len(participant_formset.forms), 20)
+
+
+class TournamentSeriesTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = User.objects.create_superuser(
+            username="admin", password="password", phone_number="+950"
+        )
+        self.game = Game.objects.create(name="Series Game")
+        self.now = timezone.now()
+        self.series = TournamentSeries.objects.create(
+            name="Daily Cup",
+            frequency="daily",
+            starts_on=(self.now - timedelta(days=3)).date(),
+            start_time=(self.now + timedelta(hours=1)).time(),
+            duration=timedelta(hours=2),
+            game=self.game,
+            is_free=False,
+            entry_fee=10,
+            prize_pool=500,
+            required_verification_level=2,
+        )
+
+    def test_materialize_creates_occurrences_within_horizon(self):
+        from .services import materialize_tournament_series
+
+        created = materialize_tournament_series(self.series, horizon_days=7, now=self.now)
+
+        self.assertEqual(len(created), 7)
+        tournaments = Tournament.objects.filter(series=self.series)
+        self.assertEqual(tournaments.count(), 7)
+        tournament = tournaments.order_by("start_date").first()
+        self.assertEqual(tournament.prize_pool, 500)
+        self.assertEqual(tournament.entry_fee, 10)
+        self.assertFalse(tournament.is_free)
+        self.assertEqual(tournament.required_verification_level, 2)
+        self.assertEqual(
+            tournament.end_date - tournament.start_date, timedelta(hours=2)
+        )
+
+    def test_materialize_is_idempotent(self):
+        from .services import materialize_tournament_series
+
+        materialize_tournament_series(self.series, horizon_days=7, now=self.now)
+        created = materialize_tournament_series(self.series, horizon_days=7, now=self.now)
+
+        self.assertEqual(created, [])
+        self.assertEqual(Tournament.objects.filter(series=self.series).count(), 7)
+
+    def test_materialize_returns_saved_tournaments_and_refreshes_rankings(self):
+        from .services import materialize_tournament_series
+        from .stats import get_platform_stats
+
+        get_platform_stats()
+        with (
+            patch("tournaments.services.schedule_top_tournaments_refresh") as refresh,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            created = materialize_tournament_series(
+                self.series, horizon_days=7, now=self.now
+            )
+        self.assertEqual(
+            {tournament.pk for tournament in created},
+            set(Tournament.objects.filter(series=self.series).values_list("pk", flat=True)),
+        )
+        self.assertEqual(get_platform_stats()["total_tournaments"], 7)
+        refresh.assert_called_once_with()
+
+    def test_weekly_series_respects_interval(self):
+        from .services import get_series_occurrences
+
+        self.series.frequency = "weekly"
+        self.series.interval = 2
+        occurrences = get_series_occurrences(
+            self.series, self.now, self.now + timedelta(days=60)
+        )
+        self.assertTrue(len(occurrences) >= 4)
+        for earlier, later in zip(occurrences, occurrences[1:]):
+            self.assertEqual(later - earlier, timedelta(weeks=2))
+
+    def test_materialize_action(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(
+            f"/api/tournaments/tournament-series/{self.series.id}/materialize/",
+            {"horizon_days": 3},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 3)
+
+    def test_regular_user_cannot_create_series(self):
+        user = User.objects.create_user(
+            username="player", password="password", phone_number="+951"
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.post(
+            "/api/tournaments/tournament-series/",
+            {
+                "name": "Weekly Cup",
+                "frequency": "weekly",
+                "starts_on": self.now.date(),
+                "start_time": "18:00",
+                "duration": "02:00:00",
+                "game": self.game.id,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TopTournamentsViewTests(APITestCase):
+    def setUp(self):
+        self.url = "/api/tournaments/top-tournaments/"
+        self.game = Game.objects.create(name="Top Game")
+        now = timezone.now()
+        for i, prize in enumerate([100, 500, 300]):
+            Tournament.objects.create(
+                name=f"Past {prize}",
+                game=self.game,
+                start_date=now - timedelta(days=10 + i),
+                end_date=now - timedelta(days=9 + i),
+                prize_pool=prize,
+                entry_fee=1000 - prize,
+            )
+        for prize in [50, 700]:
+            Tournament.objects.create(
+                name=f"Future {prize}",
+                game=self.game,
+                start_date=now + timedelta(days=1),
+                end_date=now + timedelta(days=2),
+                prize_pool=prize,
+            )
+
+    def test_ranked_by_prize_pool(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        past = response.data["past_tournaments"]
+        self.assertEqual(past["count"], 3)
+        self.assertEqual(
+            [t["name"] for t in past["results"]], ["Past 500", "Past 300", "Past 100"]
+        )
+        self.assertEqual(
+            [t["name"] for t in response.data["future_tournaments"]["results"]],
+            ["Future 700", "Future 50"],
+        )
+        self.assertEqual(response.data["future_tournaments"]["results"][0]["spots_left"], 100)
+
+    def test_paginates_precomputed_lists_without_queries(self):
+        from .rankings import get_top_tournaments, refresh_top_tournaments
+
+        refresh_top_tournaments()
+        with self.assertNumQueries(0):
+            rows, total = get_top_tournaments("past", 0, 2)
+        self.assertEqual((len(rows), total), (2, 3))
+
+        response = self.client.get(self.url, {"page": 2, "page_size": 2})
+        past = response.data["past_tournaments"]
+        self.assertEqual([t["name"] for t in past["results"]], ["Past 100"])
+        self.assertFalse(past["has_next"])
+        self.assertEqual(response.data["future_tournaments"]["results"], [])
+
+    def test_cached_image_urls_are_absolute(self):
+        image = TournamentImage.objects.create(
+            name="Banner", image=SimpleUploadedFile("banner.png", b"png")
+        )
+        Tournament.objects.filter(name="Future 700").update(image=image)
+
+        response = self.client.get(self.url)
+        row = response.data["future_tournaments"]["results"][0]
+        self.assertTrue(row["image"]["image"].startswith("http://testserver/"))
+
+    def test_refresh_picks_up_new_tournaments(self):
+        from .tasks import refresh_top_tournaments_task
+
+        self.client.get(self.url)
+        Tournament.objects.create(
+            name="Future 900",
+            game=self.game,
+            start_date=timezone.now() + timedelta(days=1),
+            end_date=timezone.now() + timedelta(days=2),
+            prize_pool=900,
+        )
+        refresh_top_tournaments_task.delay()
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response.data["future_tournaments"]["results"][0]["name"], "Future 900"
+        )
+
+
+class PlatformStatsTests(APITestCase):
+    def setUp(self):
+        self.url = "/api/tournaments/stats/"
+        self.game = Game.objects.create(name="Stats Game")
+        self.user = User.objects.create_user(
+            username="stats_user", password="password", phone_number="+960"
+        )
+
+    def _create_tournament(self):
+        return Tournament.objects.create(
+            name="Stats Tournament",
+            game=self.game,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+        )
+
+    def test_counters_follow_writes(self):
+        from wallet.services import process_transaction
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_players"], 1)
+        self.assertEqual(response.data["total_tournaments"], 0)
+        self.assertEqual(str(response.data["total_prize_money"]), "0.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_tournament()
+            User.objects.create_user(
+                username="stats_user2", password="password", phone_number="+961"
+            )
+            process_transaction(self.user, Decimal("12.50"), "prize")
+            process_transaction(self.user, Decimal("5.00"), "deposit")
+
+        with self.assertNumQueries(0):
+            from .stats import get_platform_stats
+
+            stats = get_platform_stats()
+        self.assertEqual(stats["total_players"], 2)
+        self.assertEqual(stats["total_tournaments"], 1)
+        self.assertEqual(stats["total_prize_money"], Decimal("12.50"))
+
+        response = self.client.get("/api/tournaments/total-prize-money/")
+        self.assertEqual(str(response.data["total_prize_money"]), "12.50")
+
+    def test_reconcile_corrects_drift(self):
+        from .stats import get_platform_stats, reconcile_platform_stats
+
+        get_platform_stats()
+        # Created outside a committed transaction, so the counter misses it.
+        self._create_tournament()
+        self.assertEqual(get_platform_stats()["total_tournaments"], 0)
+        reconcile_platform_stats()
+        self.assertEqual(get_platform_stats()["total_tournaments"], 1)
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.url = "/api/tournaments/search/"
+        self.game = Game.objects.create(name="Call of Duty")
+        now = timezone.now()
+        # Stored with Arabic yeh/kaf and a ZWNJ, as typed on Arabic keyboards.
+        for name in ["جام كاپيتان‌ها", "Duty Cup", "Weekly Duty", "Duty"]:
+            Tournament.objects.create(
+                name=name,
+                game=self.game,
+                start_date=now,
+                end_date=now + timedelta(days=1),
+            )
+        User.objects.create_user(
+            username="duty_player", password="password", phone_number="+970"
+        )
+        Team.objects.create(
+            name="Night Duty",
+            captain=User.objects.create_user(
+                username="captain", password="password", phone_number="+971"
+            ),
+        )
+
+    def test_normalize_search_text(self):
+        from .search import normalize_search_text
+
+        self.assertEqual(normalize_search_text("كاپيتان‌ها ۱۲"), "کاپیتان ها 12")
+        self.assertEqual(normalize_search_text("DUTY"), "duty")
+
+    def test_persian_query_matches_arabic_spelling(self):
+        response = self.client.get(self.url, {"q": "کاپیتان ها", "type": "tournaments"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["name"], "جام كاپيتان‌ها")
+
+    def test_results_are_ranked_and_paginated(self):
+        response = self.client.get(
+            self.url, {"q": "duty", "type": "tournaments", "page_size": 2}
+        )
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [t["name"] for t in response.data["results"]], ["Duty", "Duty Cup"]
+        )
+        self.assertIsNotNone(response.data["next"])
+
+    def test_search_all_types(self):
+        response = self.client.get(self.url, {"q": "DUTY"})
+        self.assertEqual(len(response.data["tournaments"]), 3)
+        self.assertEqual([g["name"] for g in response.data["games"]], ["Call of Duty"])
+        self.assertEqual(
+            [u["username"] for u in response.data["users"]], ["duty_player"]
+        )
+        self.assertEqual([t["name"] for t in response.data["teams"]], ["Night Duty"])
+
+    def test_invalid_requests(self):
+        self.assertEqual(
+            self.client.get(self.url, {"q": "  "}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.get(self.url, {"q": "duty", "type": "wallets"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_tournament_name_filter_uses_search(self):
+        response = self.client.get("/api/tournaments/tournaments/", {"name": "كاپيتان"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+
+
+def _hot_queries(seed):
+    """
+    Hot query shapes that must be served by an index, keyed by name.
+    """
+    from chat.models import Message
+    from notifications.models import Notification
+    from support.models import Ticket
+    from users.models import OTP
+    from wallet.models import Transaction
+
+    now = timezone.now()
+    return {
+        "upcoming_tournaments": Tournament.objects.filter(start_date__gt=now),
+        "ongoing_tournaments": Tournament.objects.filter(
+            start_date__lte=now, end_date__gte=now
+        ),
+        "finished_tournaments": Tournament.objects.filter(end_date__lt=now),
+        "round_matches": Match.objects.filter(tournament=seed["tournament"], round=1),
+        "disputed_matches": Match.objects.filter(is_disputed=True),
+        "user_match_history": Match.objects.filter(
+            participations__user=seed["user"]
+        ).order_by("-id"),
+        "team_match_history": Match.objects.filter(
+            participations__team=seed["team"], participations__user__isnull=True
+        ).order_by("-id"),
+        "wallet_transactions": Transaction.objects.filter(
+            wallet=seed["user"].wallet
+        ).order_by("-timestamp", "-id"),
+        "prize_transactions": Transaction.objects.filter(
+            transaction_type="prize", timestamp__gte=now - timedelta(days=30)
+        ),
+        "unread_notifications": Notification.objects.filter(
+            user=seed["user"], is_read=False
+        ).order_by("-timestamp"),
+        "conversation_messages": Message.objects.filter(
+            conversation=seed["conversation"]
+        ).order_by("-timestamp", "-id"),
+        "active_otp": OTP.objects.filter(
+            user=seed["user"], code="123456", is_active=True
+        ),
+        "open_tickets": Ticket.objects.filter(status="open"),
+    }
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    Fails when a registered hot query falls back to a sequential scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from chat.models import Conversation, Message
+        from notifications.models import Notification
+        from support.models import Ticket
+        from users.models import OTP
+        from wallet.models import Transaction
+
+        user = User.objects.create_user(
+            username="plan_user", password="password", phone_number="+980"
+        )
+        game = Game.objects.create(name="Plan Game")
+        now = timezone.now()
+        tournaments = Tournament.objects.bulk_create(
+            Tournament(
+                name=f"Plan {i}",
+                game=game,
+                start_date=now + timedelta(days=i - 25),
+                end_date=now + timedelta(days=i - 24),
+            )
+            for i in range(50)
+        )
+        Match.objects.bulk_create(
+            Match(
+                tournament=tournament,
+                round=round_number,
+                participant1_user=user,
+                participant2_user=user,
+            )
+            for tournament in tournaments
+            for round_number in (1, 2)
+        )
+        Transaction.objects.bulk_create(
+            Transaction(wallet=user.wallet, amount=1, transaction_type="deposit")
+            for _ in range(50)
+        )
+        Notification.objects.bulk_create(
+            Notification(user=user, message=f"Notification {i}") for i in range(50)
+        )
+        conversation = Conversation.objects.create()
+        Message.objects.bulk_create(
+            Message(conversation=conversation, sender=user, content=f"Message {i}")
+            for i in range(50)
+        )
+        OTP.objects.bulk_create(OTP(user=user, code=f"{i:06d}") for i in range(50))
+        Ticket.objects.bulk_create(
+            Ticket(user=user, title=f"Ticket {i}", status="closed") for i in range(50)
+        )
+        team = Team.objects.create(name="Plan Team", captain=user)
+        cls.seed = {
+            "user": user,
+            "team": team,
+            "tournament": tournaments[0],
+            "conversation": conversation,
+        }
+
+    def assertNoSequentialScan(self, name, queryset):
+        from django.db import connection
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+            self.assertNotIn("Seq Scan", plan, f"{name} uses a sequential scan:\n{plan}")
+        else:
+            plan = queryset.explain()
+            for line in plan.splitlines():
+                self.assertFalse(
+                    " SCAN " in f" {line} " and " USING " not in line,
+                    f"{name} uses a sequential scan:\n{plan}",
+                )
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in _hot_queries(self.seed).items():
+            with self.subTest(query=name):
+                self.assertNoSequentialScan(name, queryset)
+
+
+class MatchParticipationTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(name="History Game")
+        self.players = [
+            User.objects.create_user(
+                username=f"history{i}", password="p", phone_number=f"+97{i}"
+            )
+            for i in range(6)
+        ]
+        self.teams = []
+        for i in range(2):
+            team = Team.objects.create(name=f"History Team {i}", captain=self.players[i * 2])
+            team.members.add(self.players[i * 2], self.players[i * 2 + 1])
+            self.teams.append(team)
+        self.tournament = Tournament.objects.create(
+            name="History Cup",
+            game=self.game,
+            type="team",
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+        )
+
+    def _history(self, user):
+        from users.views import match_history_queryset
+
+        return list(match_history_queryset().filter(participations__user=user))
+
+    def test_generated_team_matches_index_every_member(self):
+        from .services import create_round_matches
+
+        (match,) = create_round_matches(self.tournament, 1, self.teams)
+
+        rows = MatchParticipation.objects.filter(match=match)
+        self.assertEqual(
+            set(rows.filter(user__isnull=True).values_list("team_id", "side")),
+            {(self.teams[0].id, 1), (self.teams[1].id, 2)},
+        )
+        self.assertEqual(
+            set(rows.filter(user__isnull=False).values_list("user_id", "team_id")),
+            {
+                (self.players[0].id, self.teams[0].id),
+                (self.players[1].id, self.teams[0].id),
+                (self.players[2].id, self.teams[1].id),
+                (self.players[3].id, self.teams[1].id),
+            },
+        )
+        self.assertEqual(self._history(self.players[1]), [match])
+        self.assertEqual(self._history(self.players[4]), [])
+
+    def test_roster_changes_only_affect_open_matches(self):
+        from .services import create_round_matches
+
+        played, upcoming = create_round_matches(
+            self.tournament, 1, [self.teams[0], self.teams[1]] * 2
+        )
+        played.is_confirmed = True
+        played.save()
+
+        self.teams[0].members.add(self.players[4])
+        self.teams[0].members.remove(self.players[1])
+
+        self.assertEqual(self._history(self.players[4]), [upcoming])
+        self.assertEqual(self._history(self.players[1]), [played])
+
+    def test_history_query_count_does_not_grow_with_matches(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from .serializers import MatchReadOnlySerializer
+        from .services import create_round_matches
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                MatchReadOnlySerializer(self._history(self.players[0]), many=True).data
+            return len(context.captured_queries)
+
+        create_round_matches(self.tournament, 1, self.teams)
+        baseline = count_queries()
+        create_round_matches(self.tournament, 2, self.teams * 5)
+        self.assertEqual(len(self._history(self.players[0])), 6)
+        self.assertEqual(count_queries(), baseline)
+
+
+class GameLeaderboardTests(APITestCase):
+    def setUp(self):
+        self.game = Game.objects.create(name="Board Game")
+        self.url = f"/api/tournaments/games/{self.game.id}/leaderboard/"
+        self.players = [
+            User.objects.create_user(
+                username=f"board{i}", password="p", phone_number=f"+99{i}"
+            )
+            for i in range(4)
+        ]
+        self.current = Tournament.objects.create(
+            name="Current Cup",
+            game=self.game,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+        )
+        self.old = Tournament.objects.create(
+            name="Old Cup",
+            game=self.game,
+            start_date=timezone.now() - timedelta(days=400),
+            end_date=timezone.now() - timedelta(days=399),
+        )
+        for player, score in zip(self.players, [5, 15, 10, 0]):
+            Scoring.objects.create(tournament=self.old, user=player, score=score)
+
+    def test_top_k_all_time_and_season(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Scoring.objects.create(tournament=self.current, user=self.players[0], score=20)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [(row["username"], row["score"]) for row in response.data["results"]],
+            [("board0", 25), ("board1", 15), ("board2", 10)],
+        )
+
+        response = self.client.get(self.url, {"season": "current"})
+        self.assertEqual(
+            [(row["username"], row["score"]) for row in response.data["results"]],
+            [("board0", 20)],
+        )
+        self.assertEqual(
+            self.client.get(self.url, {"season": "bogus"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_distribute_scores_feeds_boards(self):
+        from .services import distribute_scores_for_tournament
+
+        self.client.get(self.url)  # Builds the boards.
+        self.current.top_players.add(self.players[2])
+        with self.captureOnCommitCallbacks(execute=True):
+            distribute_scores_for_tournament(self.current, score_distribution=[7])
+
+        response = self.client.get(f"{self.url}users/{self.players[2].id}/")
+        self.assertEqual(response.data, {"season": None, "position": 1, "score": 17})
+
+    def test_distributing_again_adds_points(self):
+        from .services import distribute_scores_for_tournament
+
+        self.current.top_players.add(self.players[2])
+        for points in (7, 3):
+            distribute_scores_for_tournament(self.current, score_distribution=[points])
+
+        self.assertEqual(
+            Scoring.objects.get(tournament=self.current, user=self.players[2]).score, 10
+        )
+        self.players[2].refresh_from_db()
+        self.assertEqual(self.players[2].score, 10)
+
+    def test_team_captain_who_is_a_member_scores_once(self):
+        from .services import distribute_scores_for_tournament
+
+        team = Team.objects.create(name="Board Team", captain=self.players[0])
+        team.members.add(self.players[0], self.players[1])
+        self.current.type = "team"
+        self.current.save()
+        self.current.top_teams.add(team)
+        distribute_scores_for_tournament(self.current, score_distribution=[7])
+
+        self.assertEqual(
+            dict(
+                Scoring.objects.filter(tournament=self.current).values_list(
+                    "user_id", "score"
+                )
+            ),
+            {self.players[0].pk: 7, self.players[1].pk: 7},
+        )
+        self.players[0].refresh_from_db()
+        self.assertEqual(self.players[0].score, 7)
+
+    def test_cold_boards_are_rebuilt_by_one_reader(self):
+        from django_redis import get_redis_connection
+
+        from .leaderboards import GAME_BOARDS_LOCK_KEY
+
+        client = get_redis_connection("default")
+        client.set(GAME_BOARDS_LOCK_KEY, 1)
+        with patch("tournaments.leaderboards.rebuild_game_leaderboards") as rebuild:
+            response = self.client.get(self.url)
+        rebuild.assert_not_called()
+        self.assertEqual(response.data["count"], 0)
+
+        client.delete(GAME_BOARDS_LOCK_KEY)
+        self.assertEqual(self.client.get(self.url).data["count"], 3)
+        self.assertFalse(client.exists(GAME_BOARDS_LOCK_KEY))
+
+    def test_around_me(self):
+        self.client.force_authenticate(user=self.players[2])
+        response = self.client.get(f"{self.url}me/", {"radius": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["position"] for row in response.data["results"]], [1, 2, 3]
+        )
+        self.client.force_authenticate(user=self.players[3])
+        response = self.client.get(f"{self.url}me/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuild_command(self):
+        from django.core.management import call_command
+        from django_redis import get_redis_connection
+
+        from .leaderboards import board_key, season_for
+
+        call_command("rebuild_game_leaderboards", batch_size=2, stdout=StringIO())
+        client = get_redis_connection("default")
+        self.assertEqual(client.zcard(board_key(self.game.id)), 3)
+        self.assertEqual(
+            client.zcard(board_key(self.game.id, season_for(self.old.start_date))), 3
+        )
+
+
+class SeedDataCommandTests(TestCase):
+    def test_seeds_consistent_data_in_batches(self):
+        from django.core.management import call_command
+
+        from chat.models import Message
+        from wallet.models import Transaction, Wallet
+
+        out = StringIO()
+        call_command(
+            "seed_data",
+            users=12,
+            tournaments=3,
+            teams=4,
+            matches=10,
+            transactions=60,
+            chats=15,
+            batch_size=5,
+            workers=1,
+            seed=1,
+            stdout=out,
+        )
+
+        users = User.objects.filter(username__startswith="user_")
+        self.assertEqual(users.count(), 12)
+        self.assertEqual(Wallet.objects.filter(user__in=users).count(), 12)
+        self.assertTrue(users.first().check_password("password123"))
+        self.assertEqual(Tournament.objects.count(), 3)
+        self.assertEqual(Team.objects.count(), 4)
+        self.assertEqual(Match.objects.count(), 10)
+        self.assertEqual(
+            MatchParticipation.objects.values("match").distinct().count(), 10
+        )
+        self.assertEqual(Message.objects.count(), 15)
+        self.assertGreaterEqual(Transaction.objects.count(), 60)
+        for wallet in Wallet.objects.filter(user__in=users):
+            self.assertGreaterEqual(wallet.withdrawable_balance, 0)
+            self.assertGreaterEqual(wallet.total_balance, wallet.withdrawable_balance)
+        self.assertIn("rows/s", out.getvalue())
+
+        # A second run continues numbering instead of colliding.
+        call_command("seed_data", users=3, workers=1, stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith="user_").count(), 15)
+
+        call_command("seed_data", clean=True, users=2, workers=1, stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith="user_").count(), 2)
+
+    def test_seeds_serially_inside_daemonic_processes(self):
+        from types import SimpleNamespace
+
+        from django.core.management import call_command
+
+        from .tasks import run_seed_data_task
+
+        command = "tournaments.management.commands.seed_data"
+        with (
+            patch(
+                f"{command}.multiprocessing.current_process",
+                return_value=SimpleNamespace(daemon=True),
+            ),
+            patch(f"{command}.ProcessPoolExecutor") as pool,
+        ):
+            call_command(
+                "seed_data",
+                users=4,
+                tournaments=1,
+                teams=2,
+                matches=2,
+                workers=4,
+                seed=1,
+                stdout=StringIO(),
+            )
+        pool.assert_not_called()
+        self.assertEqual(Match.objects.count(), 2)
+
+        with patch("tournaments.tasks.call_command") as seed:
+            run_seed_data_task(users=5)
+        seed.assert_called_once_with("seed_data", users=5, workers=1)
+
 
 class TournamentFilterTests(APITestCase):
     def setUp(self):
@@ -2,7 +2,8 @@ from django.urls import include, path
 
 from .routers import router
 from .views import (AdminReportListView, AdminWinnerSubmissionListView,
-                    TopTournamentsView, TotalPrizeMoneyView,
+                    PlatformStatsView, SearchView, TopTournamentsView,
+                    TotalPrizeMoneyView,
                     TotalTournamentsView, UserTournamentHistoryView)
 
 urlpatterns = [
@@ -29,4 +30,6 @@ urlpatterns = [
         TotalTournamentsView.as_view(),
         name="total-tournaments",
     ),
+    path("stats/", PlatformStatsView.as_view(), name="platform-stats"),
+    path("search/", SearchView.as_view(), name="search"),
 ]
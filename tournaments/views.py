@@ -14,27 +14,39 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from notifications.tasks import send_tournament_credentials
-from users.serializers import TeamSerializer
-from wallet.models import Transaction
+from users.models import Team, User
+from users.serializers import TeamSerializer, UserReadOnlySerializer
+from wallet.idempotency import idempotency_key_from
 
 from .exceptions import ApplicationError
 from .api_mixins import DynamicFieldsMixin
 from .filters import TournamentFilter
 from .models import (Game, Match, Participant, Report, Scoring, Tournament,
-                     TournamentColor, TournamentImage, WinnerSubmission)
+                     TournamentColor, TournamentImage, TournamentSeries,
+                     WinnerSubmission)
+from .leaderboards import (get_scores_around, get_top_scores,
+                           get_user_position, season_bounds, season_for)
+from .pagination import KeysetPagination
 from .permissions import IsGameManagerOrAdmin, IsTournamentCreatorOrAdmin
+from .rankings import get_top_tournaments
+from .search import normalize_search_query, search_queryset
+from .stats import get_platform_stats
 from .serializers import (GameCreateUpdateSerializer, GameReadOnlySerializer,
                           MatchCreateSerializer, MatchReadOnlySerializer,
                           MatchUpdateSerializer, ParticipantSerializer,
-                          ReportSerializer, ScoringSerializer,
+                          ReportSerializer, RoundCheckInSerializer,
+                          ScoringSerializer,
                           TournamentColorSerializer,
                           TournamentCreateUpdateSerializer,
                           TournamentImageSerializer,
                           TournamentListSerializer, TournamentReadOnlySerializer,
-                          WinnerSubmissionSerializer)
-from .services import (approve_winner_submission_service, confirm_match_result,
-                       create_report_service, create_winner_submission_service,
-                       dispute_match_result, generate_matches, join_tournament,
+                          TournamentSeriesSerializer, WinnerSubmissionSerializer)
+from .services import (annotate_entrant_count,
+                       approve_winner_submission_service, check_in_to_match,
+                       confirm_match_result, create_report_service,
+                       create_winner_submission_service, dispute_match_result,
+                       generate_matches, join_tournament,
+                       materialize_tournament_series, open_check_in,
                        reject_report_service, reject_winner_submission_service,
                        resolve_report_service)
 
@@ -96,6 +108,7 @@ class TournamentViewSet(DynamicFieldsMixin, viewsets.ModelViewSet):
             "destroy",
             "generate_matches",
             "start_countdown",
+            "open_check_in",
         ]:
             return [IsGameManagerOrAdmin()]
         return [IsAuthenticated()]
@@ -106,12 +119,14 @@ class TournamentViewSet(DynamicFieldsMixin, viewsets.ModelViewSet):
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def join(self, request, pk=None):
         """
-        Join a tournament.
+        Join a tournament. Send an Idempotency-Key header to make retries
+        safe: the entry fee is charged at most once per key.
         """
         tournament = self.get_object()
         user = request.user
         team_id = request.data.get("team_id")
         member_ids = request.data.get("member_ids")
+        idempotency_key = idempotency_key_from(request)
 
         try:
             result = join_tournament(
@@ -119,6 +134,7 @@ class TournamentViewSet(DynamicFieldsMixin, viewsets.ModelViewSet):
                 user=user,
                 team_id=team_id,
                 member_ids=member_ids,
+                idempotency_key=idempotency_key,
             )
             if tournament.type == "individual":
                 serializer = ParticipantSerializer(result)
@@ -154,6 +170,63 @@ class TournamentViewSet(DynamicFieldsMixin, viewsets.ModelViewSet):
         )
         return Response({"message": "Countdown started."})
 
+    @action(detail=True, methods=["post"])
+    def open_check_in(self, request, pk=None):
+        """
+        Open the check-in window for a round of the tournament.
+        """
+        tournament = self.get_object()
+        serializer = RoundCheckInSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            window = open_check_in(
+                tournament,
+                serializer.validated_data["round"],
+                closes_at=serializer.validated_data["closes_at"],
+                opens_at=serializer.validated_data.get("opens_at"),
+            )
+        except ApplicationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            RoundCheckInSerializer(window).data, status=status.HTTP_201_CREATED
+        )
+
+
+class TournamentSeriesViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for managing recurring tournament templates.
+    """
+
+    queryset = TournamentSeries.objects.all().select_related("game").order_by("id")
+    serializer_class = TournamentSeriesSerializer
+    permission_classes = [IsGameManagerOrAdmin]
+    pagination_class = StandardResultsSetPagination
+
+    def perform_create(self, serializer):
+        serializer.save(creator=self.request.user)
+
+    @action(detail=True, methods=["post"])
+    def materialize(self, request, pk=None):
+        """
+        Create the series' upcoming tournaments up to the given horizon.
+        """
+        series = self.get_object()
+        horizon_days = request.data.get("horizon_days")
+        try:
+            horizon_days = int(horizon_days) if horizon_days is not None else None
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "horizon_days must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if horizon_days is not None and not 0 < horizon_days <= 366:
+            return Response(
+                {"error": "horizon_days must be between 1 and 366."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        created = materialize_tournament_series(series, horizon_days=horizon_days)
+        return Response({"created": len(created)}, status=status.HTTP_201_CREATED)
+
 
 class MatchViewSet(viewsets.ModelViewSet):
     """
@@ -169,6 +242,8 @@ class MatchViewSet(viewsets.ModelViewSet):
         "winner_user",
         "winner_team",
     )
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-id",)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -203,6 +278,18 @@ class MatchViewSet(viewsets.ModelViewSet):
         except (ApplicationError, PermissionDenied, ValidationError) as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=["post"])
+    def check_in(self, request, pk=None):
+        """
+        Check in to a match during the round's check-in window.
+        """
+        match = self.get_object()
+        try:
+            check_in_to_match(match, request.user)
+            return Response({"message": "Checked in successfully."})
+        except (ApplicationError, PermissionDenied) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     @action(detail=True, methods=["post"])
     def dispute_result(self, request, pk=None):
         """
@@ -238,12 +325,97 @@ class GameViewSet(viewsets.ModelViewSet):
         return GameReadOnlySerializer
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "leaderboard", "leaderboard_user"]:
             return [AllowAny()]
         if self.action in ["create", "update", "partial_update", "destroy"]:
             return [IsAdminUser()]
         return [IsAuthenticated()]
 
+    def _leaderboard_season(self, request):
+        season = request.query_params.get("season")
+        if season == "current":
+            return season_for(timezone.now())
+        if season:
+            season_bounds(season)  # Raises ValueError for malformed labels.
+        return season
+
+    def _leaderboard_rows(self, rows):
+        users = User.objects.filter(id__in=[user_id for _, user_id, _ in rows]).only(
+            "id", "username", "profile_picture"
+        )
+        users = {user.id: user for user in users}
+        return [
+            {
+                "position": position,
+                "user_id": user_id,
+                "username": users[user_id].username,
+                "score": score,
+            }
+            for position, user_id, score in rows
+            if user_id in users
+        ]
+
+    @action(detail=True, methods=["get"])
+    def leaderboard(self, request, pk=None):
+        """
+        Top players of this game, all-time or for `?season=` ("current" or a
+        label such as "2026-S4"), paginated with `page`/`page_size`.
+        """
+        try:
+            season = self._leaderboard_season(request)
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(
+                max(int(request.query_params.get("page_size", 10)), 1),
+                StandardResultsSetPagination.max_page_size,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        rows, total = get_top_scores(pk, season, (page - 1) * page_size, page_size)
+        return Response(
+            {"count": total, "season": season, "results": self._leaderboard_rows(rows)}
+        )
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"leaderboard/users/(?P<user_id>\d+)",
+    )
+    def leaderboard_user(self, request, pk=None, user_id=None):
+        """
+        A user's position and score on this game's leaderboard.
+        """
+        try:
+            season = self._leaderboard_season(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        position = get_user_position(pk, season, int(user_id))
+        if position is None:
+            return Response(
+                {"error": "User is not ranked on this leaderboard."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(
+            {"season": season, "position": position[0], "score": position[1]}
+        )
+
+    @action(detail=True, methods=["get"], url_path="leaderboard/me")
+    def leaderboard_me(self, request, pk=None):
+        """
+        The requesting user's position with the `?radius=` places around it.
+        """
+        try:
+            season = self._leaderboard_season(request)
+            radius = min(max(int(request.query_params.get("radius", 5)), 0), 50)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = get_scores_around(pk, season, request.user.id, radius)
+        if rows is None:
+            return Response(
+                {"error": "You are not ranked on this leaderboard."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response({"season": season, "results": self._leaderboard_rows(rows)})
+
 
 class TournamentImageViewSet(viewsets.ModelViewSet):
     """
@@ -311,6 +483,8 @@ class ReportViewSet(viewsets.ModelViewSet):
     queryset = Report.objects.all()
     serializer_class = ReportSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-created_at", "-id")
 
     def get_queryset(self):
         queryset = Report.objects.all().select_related(
@@ -446,31 +620,39 @@ class ScoringViewSet(viewsets.ModelViewSet):
 class TopTournamentsView(APIView):
     """
     API view for getting top tournaments by prize pool.
+
+    Serves paginated slices of the precomputed lists kept in Redis by
+    `tournaments.rankings`; `page` and `page_size` apply to both lists.
     """
 
     permission_classes = [AllowAny]
+    pagination_class = StandardResultsSetPagination
 
     def get(self, request):
-        past_tournaments = Tournament.objects.filter(
-            end_date__lt=timezone.now()
-        ).order_by("-entry_fee")
-        future_tournaments = Tournament.objects.filter(
-            start_date__gte=timezone.now()
-        ).order_by("-entry_fee")
-
-        past_serializer = TournamentListSerializer(
-            past_tournaments, many=True, context={"request": request}
-        )
-        future_serializer = TournamentListSerializer(
-            future_tournaments, many=True, context={"request": request}
-        )
+        paginator = self.pagination_class()
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(
+                max(int(request.query_params.get("page_size", paginator.page_size)), 1),
+                paginator.max_page_size,
+            )
+        except ValueError:
+            return Response(
+                {"error": "page and page_size must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        return Response(
-            {
-                "past_tournaments": past_serializer.data,
-                "future_tournaments": future_serializer.data,
+        data = {}
+        for bucket in ("past", "future"):
+            rows, total = get_top_tournaments(
+                bucket, (page - 1) * page_size, page_size, request
+            )
+            data[f"{bucket}_tournaments"] = {
+                "count": total,
+                "has_next": page * page_size < total,
+                "results": rows,
             }
-        )
+        return Response(data)
 
 
 class TotalPrizeMoneyView(APIView):
@@ -481,12 +663,7 @@ class TotalPrizeMoneyView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        total_prize_money = (
-            Transaction.objects.filter(transaction_type="prize").aggregate(
-                total=models.Sum("amount")
-            )["total"]
-            or 0
-        )
+        total_prize_money = get_platform_stats()["total_prize_money"]
         return Response({"total_prize_money": total_prize_money})
 
 
@@ -498,10 +675,100 @@ class TotalTournamentsView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        total_tournaments = Tournament.objects.count()
+        total_tournaments = get_platform_stats()["total_tournaments"]
         return Response({"total_tournaments": total_tournaments})
 
 
+class PlatformStatsView(APIView):
+    """
+    API view for getting all platform statistics in one call.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(get_platform_stats())
+
+
+class SearchView(APIView):
+    """
+    API view for searching tournaments, games, users and teams.
+
+    With `type` set, returns a paginated list of that kind ranked by match
+    quality; otherwise returns the first page of every kind.
+    """
+
+    permission_classes = [AllowAny]
+    pagination_class = StandardResultsSetPagination
+
+    def get_targets(self):
+        return {
+            "tournaments": (
+                annotate_entrant_count(
+                    Tournament.objects.select_related("image", "game").prefetch_related(
+                        "game__images"
+                    )
+                ),
+                "name",
+                TournamentListSerializer,
+            ),
+            "games": (
+                Game.objects.prefetch_related("images"),
+                "name",
+                GameReadOnlySerializer,
+            ),
+            "users": (
+                User.objects.filter(is_active=True).prefetch_related(
+                    "in_game_ids", "groups"
+                ),
+                "username",
+                UserReadOnlySerializer,
+            ),
+            "teams": (
+                Team.objects.prefetch_related("members"),
+                "name",
+                TeamSerializer,
+            ),
+        }
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        if not normalize_search_query(query):
+            return Response(
+                {"error": "A search query is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        targets = self.get_targets()
+        search_type = request.query_params.get("type")
+        if search_type and search_type not in targets:
+            return Response(
+                {"error": f"type must be one of: {', '.join(targets)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        context = {"request": request}
+        if search_type:
+            queryset, field, serializer_class = targets[search_type]
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(
+                search_queryset(queryset, field, query), request, view=self
+            )
+            serializer = serializer_class(page, many=True, context=context)
+            return paginator.get_paginated_response(serializer.data)
+
+        page_size = self.pagination_class.page_size
+        return Response(
+            {
+                name: serializer_class(
+                    search_queryset(queryset, field, query)[:page_size],
+                    many=True,
+                    context=context,
+                ).data
+                for name, (queryset, field, serializer_class) in targets.items()
+            }
+        )
+
+
 class UserTournamentHistoryView(generics.ListAPIView):
     """
     API view to list tournaments a user has participated in.
@@ -2,6 +2,7 @@
 from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.db import models
+from django.db.models import F
 
 # 3rd-party Imports
 from unfold.admin import ModelAdmin, TabularInline
@@ -9,6 +10,7 @@ from simple_history.admin import SimpleHistoryAdmin
 from django_select2.forms import Select2Widget
 
 # Local Imports
+from .leaderboards import sync_player_scores
 from .models import (
     InGameID,
     OTP,
@@ -18,6 +20,7 @@ from .models import (
     TeamMembership,
     User,
 )
+from .profiles import invalidate_public_profiles
 
 # --- Inlines (using Unfold's TabularInline) ---
 
@@ -57,13 +60,20 @@ class UserAdmin(BaseUserAdmin, SimpleHistoryAdmin, ModelAdmin):
         ("Important dates", {"fields": ("last_login", "date_joined"), "classes": ("tab",)}),
     )
 
-    actions = ["reset_score"]
+    actions = ["reset_score", "revoke_tokens"]
 
     def reset_score(self, request, queryset):
         updated_count = queryset.update(score=0)
+        sync_player_scores(queryset)
+        invalidate_public_profiles(queryset.values_list("pk", flat=True))
         self.message_user(request, f"{updated_count} users had their score reset.", "success")
     reset_score.short_description = "Reset score of selected users"
 
+    def revoke_tokens(self, request, queryset):
+        updated_count = queryset.update(token_version=F("token_version") + 1)
+        self.message_user(request, f"{updated_count} users were signed out everywhere.", "success")
+    revoke_tokens.short_description = "Revoke login tokens of selected users"
+
 
 @admin.register(Role)
 class RoleAdmin(ModelAdmin):
@@ -82,7 +92,7 @@ class InGameIDAdmin(ModelAdmin):
 
 @admin.register(Team)
 class TeamAdmin(SimpleHistoryAdmin, ModelAdmin):
-    list_display = ("name", "captain", "max_members")
+    list_display = ("name", "captain", "member_count", "max_members")
     search_fields = ("name", "captain__username")
     autocomplete_fields = ("captain",)
     inlines = [TeamMembershipInline]
@@ -0,0 +1,72 @@
+import time
+
+from django.utils.functional import cached_property
+from django_redis import get_redis_connection
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+DEACTIVATED_KEY_PREFIX = "users:deactivated"
+
+
+class ClaimsUser(TokenUser):
+    """
+    A request user built from the claims of a `users.tokens.UserAccessToken`,
+    without touching the database.
+
+    It only exposes what the token carries (id, username, roles,
+    verification level, rank id and staff flag), so it suits read-only
+    endpoints that need nothing more than that.
+    """
+
+    @cached_property
+    def id(self):
+        # simplejwt serializes the id claim as a string; user ids are ints.
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @property
+    def role(self):
+        return self.token.get("roles", [])
+
+    @property
+    def rank_id(self):
+        return self.token.get("rank")
+
+    @property
+    def verification_level(self):
+        return self.token.get("verification_level")
+
+
+def mark_deactivated(user_id):
+    """
+    Records when a user was deactivated, so access tokens issued before then
+    stop authenticating. Kept for one access token lifetime; later tokens
+    cannot be obtained by inactive users.
+    """
+    lifetime = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    get_redis_connection("default").set(
+        f"{DEACTIVATED_KEY_PREFIX}:{user_id}", int(time.time()), ex=lifetime
+    )
+
+
+class ClaimsAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticates read-only endpoints from the access token's claims alone,
+    plus one Redis lookup that rejects tokens of since-deactivated users.
+    """
+
+    def get_user(self, validated_token):
+        user = ClaimsUser(super().get_user(validated_token).token)
+        deactivated_at = get_redis_connection("default").get(
+            f"{DEACTIVATED_KEY_PREFIX}:{user.pk}"
+        )
+        if deactivated_at is not None and validated_token.get("iat", 0) <= int(
+            deactivated_at
+        ):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
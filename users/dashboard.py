@@ -0,0 +1,143 @@
+"""
+Per-user dashboard payload.
+
+`build_dashboard` assembles the whole payload with a fixed number of
+queries. `get_dashboard` serves it from the cache, where it lives until the
+user's tournaments, pending invitations or transactions change (see
+`users.signals`), DASHBOARD_CACHE_TIMEOUT passes, or the next upcoming
+tournament starts.
+
+Spots left change whenever anyone joins, so they are not cached: a cached
+payload gets them from one query over its upcoming tournaments, and a join
+only invalidates the joining user's dashboard.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from tournaments.models import Participant, Tournament
+from tournaments.serializers import TournamentListSerializer
+from tournaments.services import annotate_entrant_count
+from wallet.models import Transaction
+from wallet.serializers import TransactionSerializer
+
+from .models import TeamInvitation
+from .serializers import TeamInvitationSerializer
+
+LATEST_TRANSACTIONS = 5
+
+
+def _dashboard_cache_key(user_id):
+    return f"users:dashboard:{user_id}"
+
+
+def build_dashboard(user, request=None):
+    """
+    Returns (payload, seconds until the payload goes stale). Only the
+    user's id is read, so a claims-only request user works too.
+    """
+    now = timezone.now()
+    tournaments = list(
+        annotate_entrant_count(
+            Tournament.objects.filter(
+                pk__in=Participant.objects.filter(user_id=user.pk).values(
+                    "tournament_id"
+                ),
+                start_date__gte=now,
+            )
+        )
+        .select_related("image", "game")
+        .prefetch_related("game__images")
+        .order_by("start_date")
+    )
+    invitations = list(
+        TeamInvitation.objects.filter(
+            Q(from_user_id=user.pk) | Q(to_user_id=user.pk), status="pending"
+        ).order_by("id")
+    )
+    transactions = Transaction.objects.filter(wallet__user_id=user.pk).order_by(
+        "-timestamp", "-id"
+    )[:LATEST_TRANSACTIONS]
+
+    data = {
+        "upcoming_tournaments": TournamentListSerializer(
+            tournaments, many=True, context={"request": request}
+        ).data,
+        "sent_invitations": TeamInvitationSerializer(
+            [invitation for invitation in invitations if invitation.from_user_id == user.pk],
+            many=True,
+        ).data,
+        "received_invitations": TeamInvitationSerializer(
+            [invitation for invitation in invitations if invitation.to_user_id == user.pk],
+            many=True,
+        ).data,
+        "latest_transactions": TransactionSerializer(transactions, many=True).data,
+    }
+
+    timeout = settings.DASHBOARD_CACHE_TIMEOUT
+    if tournaments:
+        # The first tournament drops off the list once it starts.
+        until_start = (tournaments[0].start_date - now).total_seconds()
+        timeout = max(1, min(timeout, int(until_start)))
+    return data, timeout
+
+
+def _fill_spots_left(data):
+    tournaments = data["upcoming_tournaments"]
+    if not tournaments:
+        return data
+    spots_left = {
+        pk: None if max_participants is None else max_participants - entrant_count
+        for pk, max_participants, entrant_count in annotate_entrant_count(
+            Tournament.objects.filter(pk__in=[t["id"] for t in tournaments])
+        ).values_list("pk", "max_participants", "entrant_count")
+    }
+    for tournament in tournaments:
+        tournament["spots_left"] = spots_left.get(tournament["id"])
+    return data
+
+
+def get_dashboard(user, request=None):
+    key = _dashboard_cache_key(user.pk)
+    data = cache.get(key)
+    if data is not None:
+        return _fill_spots_left(data)
+
+    data, timeout = build_dashboard(user, request)
+    cache.set(
+        key,
+        {
+            **data,
+            "upcoming_tournaments": [
+                {k: v for k, v in t.items() if k != "spots_left"}
+                for t in data["upcoming_tournaments"]
+            ],
+        },
+        timeout,
+    )
+    return data
+
+
+def invalidate_dashboards(user_ids):
+    """
+    Drops the cached dashboards of the given users once the surrounding
+    transaction commits.
+    """
+    keys = [_dashboard_cache_key(user_id) for user_id in set(user_ids) if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_tournament_dashboards(tournament_id):
+    """
+    Drops the dashboards of everyone registered in a tournament, whose
+    listing (name, dates, ...) has changed.
+    """
+    invalidate_dashboards(
+        Participant.objects.filter(tournament_id=tournament_id).values_list(
+            "user_id", flat=True
+        )
+    )
@@ -0,0 +1,291 @@
+"""
+Materialized player and team leaderboards.
+
+`PlayerStats` and `TeamStats` rows hold each user's and team's prize
+winnings and match wins. They are incremented by `process_transaction` and
+the match result services, and mirrored into Redis sorted sets so top-N
+pages and rank-of-me lookups are O(log n) reads. A team's winnings are the
+all-time winnings of its current members: payouts credit the winner's
+teams, and members joining or leaving carry their winnings with them.
+
+`reconcile_leaderboards` recomputes everything from transactions and
+matches nightly. When the sorted sets are missing (e.g. after a Redis
+flush) the first reader reloads them from the stats tables, under a lock.
+"""
+
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django_redis import get_redis_connection
+
+from .models import PlayerStats, Team, TeamMembership, TeamStats, User
+
+LEADERBOARD_KEYS = {
+    "players_by_winnings": "leaderboard:players:winnings",
+    "players_by_score": "leaderboard:players:score",
+    "teams_by_winnings": "leaderboard:teams:winnings",
+}
+LEADERBOARDS_BUILT_KEY = "leaderboard:built"
+LEADERBOARDS_LOCK_KEY = "leaderboard:rebuild-lock"
+REBUILD_LOCK_SECONDS = 60
+REBUILD_BATCH_SIZE = 1000
+
+
+def _ensure_rows(model, ids):
+    model.objects.bulk_create(
+        [model(pk=pk) for pk in ids], ignore_conflicts=True
+    )
+
+
+def _increment(model, deltas, field):
+    """
+    Applies {pk: delta} increments to `field`, one UPDATE per distinct delta.
+    """
+    _ensure_rows(model, deltas)
+    by_delta = {}
+    for pk, delta in deltas.items():
+        by_delta.setdefault(delta, []).append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
+
+
+def _zincrby_on_commit(board, deltas):
+    key = LEADERBOARD_KEYS[board]
+
+    def _apply():
+        client = get_redis_connection("default")
+        if not client.exists(LEADERBOARDS_BUILT_KEY):
+            return
+        pipe = client.pipeline()
+        for member, delta in deltas.items():
+            pipe.zincrby(key, float(delta), member)
+        pipe.execute()
+
+    transaction.on_commit(_apply)
+
+
+def record_prize(user, amount: Decimal):
+    """
+    Adds a prize payout to the user's and their teams' winnings.
+    """
+    record_prizes({user.pk: amount})
+
+
+def record_prizes(amounts):
+    """
+    Adds {user_id: amount} prize payouts to the users' and their teams'
+    winnings.
+    """
+    if not amounts:
+        return
+    _increment(PlayerStats, amounts, "total_winnings")
+    team_amounts = {}
+    for user_id, team_id in TeamMembership.objects.filter(
+        user_id__in=amounts
+    ).values_list("user_id", "team_id"):
+        team_amounts[team_id] = team_amounts.get(team_id, 0) + amounts[user_id]
+    if team_amounts:
+        _increment(TeamStats, team_amounts, "total_winnings")
+        _zincrby_on_commit("teams_by_winnings", team_amounts)
+    _zincrby_on_commit("players_by_winnings", amounts)
+
+
+def record_match_wins(user_ids=(), team_ids=()):
+    """
+    Counts a match win for every given user and team id (repeats allowed).
+    """
+    user_wins = Counter(pk for pk in user_ids if pk is not None)
+    team_wins = Counter(pk for pk in team_ids if pk is not None)
+    if user_wins:
+        _increment(PlayerStats, user_wins, "wins")
+    if team_wins:
+        _increment(TeamStats, team_wins, "wins")
+
+
+def record_team_members_changed(team_id, user_ids, joined):
+    """
+    Adds the winnings of members who joined the team to its total, or takes
+    off those of members who left.
+    """
+    total = PlayerStats.objects.filter(pk__in=user_ids).aggregate(
+        total=Sum("total_winnings")
+    )["total"]
+    if not total:
+        return
+    if joined:
+        _increment(TeamStats, {team_id: total}, "total_winnings")
+    elif not TeamStats.objects.filter(pk=team_id).update(
+        total_winnings=F("total_winnings") - total
+    ):
+        # Only existing rows are updated, so a departure never recreates
+        # the stats of a team being deleted.
+        return
+    _zincrby_on_commit("teams_by_winnings", {team_id: total if joined else -total})
+
+
+def sync_player_scores(users):
+    """
+    Mirrors the users' current scores into the score leaderboard.
+    """
+    scores = {user.pk: user.score for user in users}
+    if not scores:
+        return
+
+    def _apply():
+        client = get_redis_connection("default")
+        if client.exists(LEADERBOARDS_BUILT_KEY):
+            client.zadd(LEADERBOARD_KEYS["players_by_score"], scores)
+
+    transaction.on_commit(_apply)
+
+
+def _replace_sorted_set(client, key, rows):
+    """
+    Loads (member, score) rows into a temporary key in pipelined batches and
+    renames it over `key`, so readers never see a partial set.
+    """
+    temp_key = f"{key}:rebuild"
+    client.delete(temp_key)
+    batch = {}
+    for member, score in rows:
+        batch[member] = float(score)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            client.zadd(temp_key, batch)
+            batch = {}
+    if batch:
+        client.zadd(temp_key, batch)
+    if client.exists(temp_key):
+        client.rename(temp_key, key)
+    else:
+        client.delete(key)
+
+
+def rebuild_leaderboards():
+    """
+    Reloads every sorted set from the stats tables and user scores.
+    """
+    client = get_redis_connection("default")
+    _replace_sorted_set(
+        client,
+        LEADERBOARD_KEYS["players_by_winnings"],
+        PlayerStats.objects.filter(total_winnings__gt=0)
+        .values_list("user_id", "total_winnings")
+        .iterator(chunk_size=REBUILD_BATCH_SIZE),
+    )
+    _replace_sorted_set(
+        client,
+        LEADERBOARD_KEYS["players_by_score"],
+        User.objects.values_list("id", "score").iterator(chunk_size=REBUILD_BATCH_SIZE),
+    )
+    _replace_sorted_set(
+        client,
+        LEADERBOARD_KEYS["teams_by_winnings"],
+        TeamStats.objects.filter(total_winnings__gt=0)
+        .values_list("team_id", "total_winnings")
+        .iterator(chunk_size=REBUILD_BATCH_SIZE),
+    )
+    client.set(LEADERBOARDS_BUILT_KEY, 1)
+
+
+def reconcile_leaderboards():
+    """
+    Recomputes every stats row from transactions and matches, then rebuilds
+    the sorted sets.
+    """
+    winnings = Sum(
+        "wallet__transactions__amount",
+        filter=Q(wallet__transactions__transaction_type="prize"),
+        default=Decimal("0"),
+    )
+    player_winnings = dict(
+        User.objects.annotate(total=winnings)
+        .filter(total__gt=0)
+        .values_list("id", "total")
+    )
+    player_wins = dict(
+        User.objects.annotate(total=Count("won_matches"))
+        .filter(total__gt=0)
+        .values_list("id", "total")
+    )
+    team_winnings = Counter()
+    for team_id, user_id in TeamMembership.objects.values_list("team_id", "user_id"):
+        if user_id in player_winnings:
+            team_winnings[team_id] += player_winnings[user_id]
+    team_wins = dict(
+        Team.objects.annotate(total=Count("won_matches"))
+        .filter(total__gt=0)
+        .values_list("id", "total")
+    )
+
+    with transaction.atomic():
+        PlayerStats.objects.all().delete()
+        PlayerStats.objects.bulk_create(
+            [
+                PlayerStats(
+                    user_id=user_id,
+                    total_winnings=player_winnings.get(user_id, 0),
+                    wins=player_wins.get(user_id, 0),
+                )
+                for user_id in set(player_winnings) | set(player_wins)
+            ],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+        TeamStats.objects.all().delete()
+        TeamStats.objects.bulk_create(
+            [
+                TeamStats(
+                    team_id=team_id,
+                    total_winnings=team_winnings.get(team_id, 0),
+                    wins=team_wins.get(team_id, 0),
+                )
+                for team_id in set(team_winnings) | set(team_wins)
+            ],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+    rebuild_leaderboards()
+
+
+def _load_missing_leaderboards(client):
+    """
+    Reloads the sorted sets from the stats tables unless another request is
+    already doing so. Returns whether they were (re)loaded here.
+    """
+    if not client.set(LEADERBOARDS_LOCK_KEY, 1, nx=True, ex=REBUILD_LOCK_SECONDS):
+        return False
+    try:
+        if not client.exists(LEADERBOARDS_BUILT_KEY):
+            rebuild_leaderboards()
+    finally:
+        client.delete(LEADERBOARDS_LOCK_KEY)
+    return True
+
+
+def get_leaderboard_page(board, offset, limit):
+    """
+    Returns ([(member_id, score), ...], total) for a page of `board`,
+    best first. While the sorted sets are being reloaded, other readers get
+    whatever they hold so far.
+    """
+    key = LEADERBOARD_KEYS[board]
+    client = get_redis_connection("default")
+    for _ in range(2):
+        pipe = client.pipeline()
+        pipe.exists(LEADERBOARDS_BUILT_KEY)
+        pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+        pipe.zcard(key)
+        built, rows, total = pipe.execute()
+        if built or not _load_missing_leaderboards(client):
+            break
+    return [(int(member), score) for member, score in rows], total
+
+
+def get_leaderboard_position(board, member_id):
+    """
+    Returns the 1-based position of `member_id` on `board`, or None.
+    """
+    position = get_redis_connection("default").zrevrank(
+        LEADERBOARD_KEYS[board], member_id
+    )
+    return None if position is None else position + 1
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# The normalized expression of `tournaments.search.PersianNormalize`, which
+# must stay identical for queries to use these indexes.
+CREATE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS users_user_username_trgm_idx ON users_user "
+    "USING gin ((translate(lower(username), 'يىكۀة\u200c۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩ـًٌٍَُِّْ', 'ییکهه 01234567890123456789')) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS users_user_username_fts_idx ON users_user "
+    "USING gin (to_tsvector('simple'::regconfig, "
+    "COALESCE(translate(lower(username), 'يىكۀة\u200c۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩ـًٌٍَُِّْ', 'ییکهه 01234567890123456789'), '')))",
+    "CREATE INDEX IF NOT EXISTS users_team_name_trgm_idx ON users_team "
+    "USING gin ((translate(lower(name), 'يىكۀة\u200c۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩ـًٌٍَُِّْ', 'ییکهه 01234567890123456789')) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS users_team_name_fts_idx ON users_team "
+    "USING gin (to_tsvector('simple'::regconfig, "
+    "COALESCE(translate(lower(name), 'يىكۀة\u200c۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩ـًٌٍَُِّْ', 'ییکهه 01234567890123456789'), '')))",
+]
+
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS users_user_username_trgm_idx",
+    "DROP INDEX IF EXISTS users_user_username_fts_idx",
+    "DROP INDEX IF EXISTS users_team_name_trgm_idx",
+    "DROP INDEX IF EXISTS users_team_name_fts_idx",
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for statement in CREATE_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in DROP_INDEXES:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0009_user_referral_code_referral"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="otp",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "code"],
+                name="otp_active_user_code_idx",
+            ),
+        ),
+    ]
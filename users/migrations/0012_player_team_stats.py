@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0011_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlayerStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "total_winnings",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("wins", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TeamStats",
+            fields=[
+                (
+                    "team",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="users.team",
+                    ),
+                ),
+                (
+                    "total_winnings",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("wins", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:37
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _membership_count(TeamMembership, field):
+    return Coalesce(
+        Subquery(
+            TeamMembership.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Team = apps.get_model("users", "Team")
+    User = apps.get_model("users", "User")
+    TeamMembership = apps.get_model("users", "TeamMembership")
+    Team.objects.update(member_count=_membership_count(TeamMembership, "team"))
+    User.objects.update(team_count=_membership_count(TeamMembership, "user"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0013_user_token_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="team",
+            name="member_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="team_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_referral_stats(apps, schema_editor):
+    Referral = apps.get_model("users", "Referral")
+    ReferralStats = apps.get_model("users", "ReferralStats")
+    Transaction = apps.get_model("wallet", "Transaction")
+
+    stats = {
+        referrer_id: ReferralStats(user_id=referrer_id, direct_referrals=total)
+        for referrer_id, total in Referral.objects.values("referrer_id")
+        .annotate(total=Count("pk"))
+        .values_list("referrer_id", "total")
+    }
+    fees = (
+        Transaction.objects.filter(
+            transaction_type="entry_fee", wallet__user__referred_by__isnull=False
+        )
+        .values("wallet__user__referred_by__referrer_id")
+        .annotate(total=Sum("amount"))
+        .values_list("wallet__user__referred_by__referrer_id", "total")
+    )
+    for referrer_id, total in fees:
+        stats[referrer_id].referred_entry_fees = total
+    ReferralStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0014_team_counters"),
+        ("wallet", "0003_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferralStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="referral_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("direct_referrals", models.PositiveIntegerField(default=0)),
+                (
+                    "referred_entry_fees",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-direct_referrals", "user"],
+                        name="referral_stats_count_idx",
+                    ),
+                    models.Index(
+                        fields=["-referred_entry_fees", "user"],
+                        name="referral_stats_fees_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_referral_stats, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,25 @@
 import shortuuid
 from django.contrib.auth.models import AbstractUser, Group
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from phonenumber_field.modelfields import PhoneNumberField
 
 
+def _save_without_counters(instance, counters, kwargs):
+    """
+    Keeps a plain `save()` of an existing row from writing back stale
+    values of counters that are only changed through F() updates.
+    """
+    if not instance._state.adding and kwargs.get("update_fields") is None:
+        kwargs["update_fields"] = [
+            field.name
+            for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in counters
+        ]
+
+
 class User(AbstractUser):
     phone_number = PhoneNumberField(unique=True)
     profile_picture = models.ImageField(
@@ -16,10 +30,22 @@ class User(AbstractUser):
         "tournaments.Rank", on_delete=models.SET_NULL, null=True, blank=True
     )
     referral_code = models.CharField(max_length=22, unique=True, blank=True)
+    # Bumped to revoke every refresh token issued so far (see users.tokens).
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+    # Number of teams the user belongs to, kept by `reserve_team_slots` and
+    # `release_team_slots`.
+    team_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        # Set before the INSERT so new users need no follow-up UPDATE.
+        if not self.referral_code:
+            self.referral_code = shortuuid.uuid()
+        _save_without_counters(self, ("team_count", "token_version"), kwargs)
+        super().save(*args, **kwargs)
+
     @property
     def role(self):
         return [group.name for group in self.groups.all()]
@@ -54,25 +80,6 @@ class Role(models.Model):
         return Role.objects.filter(is_default=True).first()
 
 
-def assign_default_role_and_referral_code(sender, instance, created, **kwargs):
-    """
-    Assigns a default role and generates a referral code for new users.
-    """
-    if created:
-        # Assign default role
-        default_role = Role.get_default_role()
-        if default_role:
-            instance.groups.add(default_role.group)
-
-        # Generate referral code
-        if not instance.referral_code:
-            instance.referral_code = shortuuid.uuid()
-            instance.save()
-
-
-post_save.connect(assign_default_role_and_referral_code, sender=User)
-
-
 class Referral(models.Model):
     """
     Stores the relationship between a referrer and a referred user.
@@ -106,14 +113,74 @@ class Team(models.Model):
     )
     team_picture = models.ImageField(upload_to="team_pictures/", null=True, blank=True)
     max_members = models.PositiveIntegerField(default=5)
+    # Number of TeamMembership rows, kept by `reserve_team_slots` and
+    # `release_team_slots`.
+    member_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        _save_without_counters(self, ("member_count",), kwargs)
+        super().save(*args, **kwargs)
+
+
+MAX_TEAMS_PER_USER = 10
+
+
+def reserve_team_slots(team_id, user_ids):
+    """
+    Counts the given users into the team, raising ValidationError if the
+    team would overflow or any of them would exceed MAX_TEAMS_PER_USER.
+
+    The checks are conditional UPDATEs on the counters, so they hold under
+    concurrent joins and cost two queries however many users are added.
+    Call it inside a transaction so a failure rolls the counters back.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    added = len(user_ids)
+    if not Team.objects.filter(
+        pk=team_id, max_members__gte=F("member_count") + added
+    ).update(member_count=F("member_count") + added):
+        raise ValidationError("This team is already full.")
+    if (
+        User.objects.filter(pk__in=user_ids, team_count__lt=MAX_TEAMS_PER_USER).update(
+            team_count=F("team_count") + 1
+        )
+        != added
+    ):
+        raise ValidationError(
+            f"A user cannot be in more than {MAX_TEAMS_PER_USER} teams."
+        )
+
+
+def release_team_slots(team_id, user_ids):
+    """
+    Counts the given users out of the team.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    Team.objects.filter(pk=team_id).update(
+        member_count=Greatest(F("member_count") - len(user_ids), 0)
+    )
+    User.objects.filter(pk__in=user_ids).update(
+        team_count=Greatest(F("team_count") - 1, 0)
+    )
+
 
-def validate_user_team_limit(user):
-    if user.teams.count() >= 10:
-        raise ValidationError("A user cannot be in more than 10 teams.")
+class TeamMembershipQuerySet(models.QuerySet):
+    def delete(self):
+        # `team.members.remove()` and `clear()` delete through this queryset.
+        with transaction.atomic(using=self.db):
+            removed = {}
+            for team_id, user_id in self.values_list("team_id", "user_id"):
+                removed.setdefault(team_id, []).append(user_id)
+            for team_id, user_ids in removed.items():
+                release_team_slots(team_id, user_ids)
+            return super().delete()
 
 
 class TeamMembership(models.Model):
@@ -121,14 +188,81 @@ class TeamMembership(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     date_joined = models.DateField(auto_now_add=True)
 
+    objects = TeamMembershipQuerySet.as_manager()
+
     class Meta:
         unique_together = ("user", "team")
 
     def save(self, *args, **kwargs):
-        validate_user_team_limit(self.user)
-        if self.team.members.count() >= self.team.max_members:
-            raise ValidationError("This team is already full.")
-        super().save(*args, **kwargs)
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            reserve_team_slots(self.team_id, [self.user_id])
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            release_team_slots(self.team_id, [self.user_id])
+            return super().delete(*args, **kwargs)
+
+
+class PlayerStats(models.Model):
+    """
+    Leaderboard totals for a user, maintained incrementally by
+    `users.leaderboards` and reconciled nightly.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    total_winnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    wins = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats for {self.user}"
+
+
+class TeamStats(models.Model):
+    """
+    Leaderboard totals for a team. Winnings are the sum of the members'
+    prize winnings.
+    """
+
+    team = models.OneToOneField(
+        Team, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    total_winnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    wins = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats for {self.team}"
+
+
+class ReferralStats(models.Model):
+    """
+    Referral totals for a referrer, maintained incrementally by
+    `users.referrals` and indexed for top-referrer reads.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="referral_stats"
+    )
+    direct_referrals = models.PositiveIntegerField(default=0)
+    # Entry fees paid so far by the users this user referred.
+    referred_entry_fees = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-direct_referrals", "user"], name="referral_stats_count_idx"
+            ),
+            models.Index(
+                fields=["-referred_entry_fees", "user"], name="referral_stats_fees_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Referral stats for {self.user}"
 
 
 class TeamInvitation(models.Model):
@@ -159,5 +293,14 @@ class OTP(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "code"],
+                condition=models.Q(is_active=True),
+                name="otp_active_user_code_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.code}"
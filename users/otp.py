@@ -0,0 +1,187 @@
+"""
+One-time login codes stored in Redis.
+
+A pending code lives in a hash under `otp:code:<identifier>` (the user's
+normalized phone number or email) with a native TTL. The hash holds an
+HMAC of the code rather than the code itself, a failed-attempt counter,
+and a snapshot of the user's token claims taken when the code was sent, so
+verification and token issuance run without any SQL.
+
+Sends are throttled with sliding windows per identifier and per client IP,
+taken from the proxy headers when the request came through a trusted proxy.
+When OTP_AUDIT_ENABLED is set, sends and successful logins are recorded in
+the `OTP` model by a Celery task, off the request path.
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import secrets
+import time
+import uuid
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from phonenumber_field.phonenumber import to_python
+
+CODE_KEY_PREFIX = "otp:code"
+SEND_WINDOW_PREFIX = "otp:sends"
+
+
+class OTPError(Exception):
+    pass
+
+
+def phone_identifier(phone_number):
+    if not phone_number:
+        return None
+    phone = to_python(phone_number)
+    if phone is not None and phone.is_valid():
+        return f"phone:{phone.as_e164}"
+    return f"phone:{str(phone_number).strip()}"
+
+
+def email_identifier(email):
+    return f"email:{email.strip().lower()}" if email else None
+
+
+def _code_key(identifier):
+    return f"{CODE_KEY_PREFIX}:{identifier}"
+
+
+def _hash_code(identifier, code):
+    return hmac.new(
+        settings.SECRET_KEY.encode(), f"{identifier}:{code}".encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def _check_send_window(client, key, limit, window):
+    """
+    Records a send in the sliding window at `key`, rejecting it if the window
+    already holds `limit` sends.
+    """
+    now = time.time()
+    member = uuid.uuid4().hex
+    pipe = client.pipeline()
+    pipe.zremrangebyscore(key, 0, now - window)
+    pipe.zadd(key, {member: now})
+    pipe.zcard(key)
+    pipe.expire(key, window)
+    _, _, count, _ = pipe.execute()
+    if count > limit:
+        client.zrem(key, member)
+        raise OTPError("Too many OTP requests. Please try again later.")
+
+
+def _is_trusted_proxy(address):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in ipaddress.ip_network(network) for network in settings.TRUSTED_PROXIES)
+
+
+def client_ip(request):
+    """
+    Returns the client's address: REMOTE_ADDR, unless that is a trusted
+    proxy, in which case its X-Real-IP or the last untrusted address in
+    X-Forwarded-For.
+    """
+    remote_addr = request.META.get("REMOTE_ADDR")
+    if not _is_trusted_proxy(remote_addr):
+        return remote_addr
+    real_ip = request.META.get("HTTP_X_REAL_IP", "").strip()
+    if real_ip:
+        return real_ip
+    forwarded = [
+        address.strip()
+        for address in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _is_trusted_proxy(address):
+            return address
+    return forwarded[0] if forwarded else remote_addr
+
+
+def throttle_ip(ip_address):
+    limit, window = settings.OTP_SEND_LIMIT_PER_IP
+    _check_send_window(
+        get_redis_connection("default"), f"{SEND_WINDOW_PREFIX}:ip:{ip_address}", limit, window
+    )
+
+
+def throttle_identifier(identifier):
+    limit, window = settings.OTP_SEND_LIMIT_PER_IDENTIFIER
+    _check_send_window(
+        get_redis_connection("default"), f"{SEND_WINDOW_PREFIX}:id:{identifier}", limit, window
+    )
+
+
+def issue_code(identifier, user, claims):
+    """
+    Stores a new code for `identifier`, replacing any pending one, and
+    returns it.
+    """
+    code = f"{secrets.randbelow(10 ** settings.OTP_LENGTH):0{settings.OTP_LENGTH}d}"
+    key = _code_key(identifier)
+    pipe = get_redis_connection("default").pipeline()
+    pipe.delete(key)
+    pipe.hset(
+        key,
+        mapping={
+            "code": _hash_code(identifier, code),
+            "user_id": user.pk,
+            "token_version": user.token_version,
+            "claims": json.dumps(claims),
+            "attempts": 0,
+        },
+    )
+    pipe.expire(key, settings.OTP_TTL_SECONDS)
+    pipe.execute()
+    return code
+
+
+def consume_code(identifiers, code):
+    """
+    Checks `code` against the pending code of the first identifier that has
+    one, consuming it on success. Returns (user_id, token_version, claims).
+    """
+    client = get_redis_connection("default")
+    for identifier in identifiers:
+        if not identifier:
+            continue
+        key = _code_key(identifier)
+        pipe = client.pipeline()
+        pipe.hincrby(key, "attempts", 1)
+        pipe.hgetall(key)
+        attempts, pending = pipe.execute()
+        if not pending.get(b"code"):
+            # HINCRBY created the hash; there was no pending code.
+            client.delete(key)
+            continue
+        if attempts > settings.OTP_MAX_ATTEMPTS:
+            client.delete(key)
+            raise OTPError("Too many attempts. Please request a new code.")
+        if not hmac.compare_digest(pending[b"code"].decode(), _hash_code(identifier, code)):
+            raise OTPError("Invalid OTP.")
+        # Only the request that deletes the key may log in with it.
+        if not client.delete(key):
+            raise OTPError("Invalid OTP.")
+        return (
+            int(pending[b"user_id"]),
+            int(pending[b"token_version"]),
+            json.loads(pending[b"claims"]),
+        )
+    raise OTPError("OTP expired.")
+
+
+def discard_codes(user):
+    """
+    Drops the user's pending codes, e.g. when their sessions are revoked.
+    """
+    identifiers = [phone_identifier(user.phone_number), email_identifier(user.email)]
+    keys = [_code_key(identifier) for identifier in identifiers if identifier]
+    if keys:
+        get_redis_connection("default").delete(*keys)
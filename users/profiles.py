@@ -0,0 +1,79 @@
+"""
+Cached public profiles.
+
+A profile payload (`UserReadOnlySerializer`) is cached per user id for
+PUBLIC_PROFILE_CACHE_TIMEOUT seconds and dropped when the user, their roles
+or their in-game ids change (see `users.signals`) or their score is updated
+in bulk. Payloads are cached with relative media URLs and made absolute for
+the request serving them.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import User
+from .serializers import UserReadOnlySerializer
+
+MAX_BATCH_PROFILES = 100
+
+
+def _profile_cache_key(user_id):
+    return f"users:profile:{user_id}"
+
+
+def profile_queryset():
+    return User.objects.select_related("rank").prefetch_related("in_game_ids", "groups")
+
+
+def _absolute(payload, request):
+    if request is None or not payload.get("profile_picture"):
+        return payload
+    return {
+        **payload,
+        "profile_picture": request.build_absolute_uri(payload["profile_picture"]),
+    }
+
+
+def get_public_profiles(user_ids, request=None):
+    """
+    Returns {user_id: payload} for the given ids, reading cached payloads in
+    one round trip and building the missing ones with a fixed number of
+    queries. Unknown ids are left out.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    keys = {_profile_cache_key(user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(keys)
+    profiles = {keys[key]: payload for key, payload in cached.items()}
+
+    missing = [user_id for user_id in user_ids if user_id not in profiles]
+    if missing:
+        built = {
+            user.pk: dict(UserReadOnlySerializer(user).data)
+            for user in profile_queryset().filter(pk__in=missing)
+        }
+        cache.set_many(
+            {_profile_cache_key(user_id): payload for user_id, payload in built.items()},
+            settings.PUBLIC_PROFILE_CACHE_TIMEOUT,
+        )
+        profiles.update(built)
+
+    return {
+        user_id: _absolute(profiles[user_id], request)
+        for user_id in user_ids
+        if user_id in profiles
+    }
+
+
+def get_public_profile(user_id, request=None):
+    return get_public_profiles([user_id], request).get(user_id)
+
+
+def invalidate_public_profiles(user_ids):
+    """
+    Drops the cached profiles of the given users once the surrounding
+    transaction commits.
+    """
+    keys = [_profile_cache_key(user_id) for user_id in set(user_ids) if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,137 @@
+"""
+Referral counters.
+
+`ReferralStats` rows hold each referrer's number of direct referrals and
+the entry fees their referred users have paid. They are incremented when
+referred users sign up (`users.services.provision_user_accounts`, or the
+Referral signals for one-off rows) and when a referred user pays an entry
+fee (`wallet.services.process_transaction`), so top-referrer lists and a
+user's own stats are index reads. `reconcile_referral_stats` recomputes
+them from referrals and transactions.
+"""
+
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Subquery, Sum
+from django.db.models.functions import Greatest
+
+from .models import Referral, ReferralStats
+
+TOP_REFERRER_ORDERINGS = {
+    "referrals": "direct_referrals",
+    "entry_fees": "referred_entry_fees",
+}
+
+
+def record_referrals(referrer_ids, delta=1):
+    """
+    Counts new (or, with a negative `delta`, removed) referrals for the
+    given referrer ids, repeats allowed. One UPDATE per distinct count.
+    """
+    counts = Counter(pk for pk in referrer_ids if pk is not None)
+    if not counts:
+        return
+    if delta > 0:
+        # Removals only touch existing rows, so they never recreate the row
+        # of a referrer whose deletion cascaded to their referrals.
+        ReferralStats.objects.bulk_create(
+            [ReferralStats(user_id=pk) for pk in counts], ignore_conflicts=True
+        )
+    by_count = {}
+    for pk, count in counts.items():
+        by_count.setdefault(count * delta, []).append(pk)
+    for change, pks in by_count.items():
+        ReferralStats.objects.filter(pk__in=pks).update(
+            direct_referrals=Greatest(F("direct_referrals") + change, 0)
+        )
+
+
+def record_referred_entry_fee(user, amount: Decimal):
+    """
+    Adds an entry fee paid by `user` to their referrer's total, in a single
+    UPDATE that is a no-op for users nobody referred.
+    """
+    ReferralStats.objects.filter(
+        pk=Subquery(Referral.objects.filter(referred_id=user.pk).values("referrer_id"))
+    ).update(referred_entry_fees=F("referred_entry_fees") + amount)
+
+
+def record_referred_entry_fees(amounts):
+    """
+    Adds {user_id: amount} entry fees to the totals of the users' referrers,
+    one UPDATE per distinct total.
+    """
+    totals = {}
+    for referred_id, referrer_id in Referral.objects.filter(
+        referred_id__in=amounts
+    ).values_list("referred_id", "referrer_id"):
+        totals[referrer_id] = totals.get(referrer_id, 0) + amounts[referred_id]
+    by_total = {}
+    for referrer_id, total in totals.items():
+        by_total.setdefault(total, []).append(referrer_id)
+    for total, pks in by_total.items():
+        ReferralStats.objects.filter(pk__in=pks).update(
+            referred_entry_fees=F("referred_entry_fees") + total
+        )
+
+
+def get_top_referrers(by="referrals", limit=10):
+    """
+    Returns the best `limit` ReferralStats rows (with their users) ordered by
+    `by`, one of TOP_REFERRER_ORDERINGS.
+    """
+    field = TOP_REFERRER_ORDERINGS[by]
+    return list(
+        ReferralStats.objects.filter(**{f"{field}__gt": 0})
+        .select_related("user")
+        .order_by(f"-{field}", "user")[:limit]
+    )
+
+
+def get_referral_stats(user):
+    """
+    Returns the user's counters and their position among referrers.
+    """
+    stats = ReferralStats.objects.filter(pk=user.pk).first()
+    direct_referrals = stats.direct_referrals if stats else 0
+    referred_entry_fees = stats.referred_entry_fees if stats else Decimal("0")
+    position = None
+    if direct_referrals:
+        position = (
+            ReferralStats.objects.filter(direct_referrals__gt=direct_referrals).count() + 1
+        )
+    return {
+        "referral_code": user.referral_code,
+        "direct_referrals": direct_referrals,
+        "referred_entry_fees": referred_entry_fees,
+        "position": position,
+    }
+
+
+def reconcile_referral_stats():
+    """
+    Recomputes every ReferralStats row from referrals and entry fees.
+    """
+    from wallet.models import Transaction
+
+    stats = {
+        referrer_id: ReferralStats(user_id=referrer_id, direct_referrals=total)
+        for referrer_id, total in Referral.objects.values("referrer_id")
+        .annotate(total=Count("pk"))
+        .values_list("referrer_id", "total")
+    }
+    fees = (
+        Transaction.objects.filter(
+            transaction_type="entry_fee", wallet__user__referred_by__isnull=False
+        )
+        .values("wallet__user__referred_by__referrer_id")
+        .annotate(total=Sum("amount"))
+        .values_list("wallet__user__referred_by__referrer_id", "total")
+    )
+    for referrer_id, total in fees:
+        stats[referrer_id].referred_entry_fees = total
+    with transaction.atomic():
+        ReferralStats.objects.all().delete()
+        ReferralStats.objects.bulk_create(stats.values(), batch_size=1000)
@@ -2,7 +2,8 @@ from rest_framework import serializers
 
 from verification.serializers import VerificationSerializer
 
-from .models import InGameID, Role, Team, TeamInvitation, User, Referral
+from .models import InGameID, ReferralStats, Role, Team, TeamInvitation, User
+from .services import provision_users
 
 
 class InGameIDSerializer(serializers.ModelSerializer):
@@ -56,21 +57,11 @@ class UserCreateSerializer(serializers.ModelSerializer):
         }
 
     def create(self, validated_data):
-        referral_code = validated_data.pop('referral_code', None)
+        referral_code = validated_data.pop("referral_code", None)
         password = validated_data.pop("password")
         user = User(**validated_data)
         user.set_password(password)
-        user.save()
-
-        if referral_code:
-            try:
-                referrer = User.objects.get(referral_code=referral_code)
-                Referral.objects.create(referrer=referrer, referred=user)
-            except User.DoesNotExist:
-                # If the referral code is invalid, we can either raise an error
-                # or just ignore it. For a better user experience, we'll ignore it.
-                pass
-
+        (user,) = provision_users([user], referral_codes=[referral_code])
         return user
 
 
@@ -139,8 +130,8 @@ class TeamSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Team
-        fields = ("id", "name", "captain", "members", "team_picture")
-        read_only_fields = ("captain",)
+        fields = ("id", "name", "captain", "members", "member_count", "team_picture")
+        read_only_fields = ("captain", "member_count")
 
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -162,33 +153,47 @@ class TeamInvitationSerializer(serializers.ModelSerializer):
 
 
 class TopPlayerSerializer(serializers.ModelSerializer):
-    total_winnings = serializers.DecimalField(max_digits=10, decimal_places=2)
+    position = serializers.IntegerField(read_only=True)
+    total_winnings = serializers.DecimalField(max_digits=12, decimal_places=2)
 
     class Meta:
         model = User
-        fields = ("id", "username", "total_winnings")
+        fields = ("position", "id", "username", "total_winnings")
+
+
+class TopReferrerSerializer(serializers.ModelSerializer):
+    position = serializers.IntegerField(read_only=True)
+    id = serializers.IntegerField(source="user_id", read_only=True)
+    username = serializers.CharField(source="user.username", read_only=True)
+
+    class Meta:
+        model = ReferralStats
+        fields = ("position", "id", "username", "direct_referrals", "referred_entry_fees")
 
 
 class TopTeamSerializer(serializers.ModelSerializer):
-    total_winnings = serializers.DecimalField(max_digits=10, decimal_places=2)
+    position = serializers.IntegerField(read_only=True)
+    total_winnings = serializers.DecimalField(max_digits=12, decimal_places=2)
 
     class Meta:
         model = Team
-        fields = ("id", "name", "total_winnings")
+        fields = ("position", "id", "name", "total_winnings")
 
 
 class TopPlayerByRankSerializer(serializers.ModelSerializer):
     """Serializer for top players by rank."""
 
+    position = serializers.IntegerField(read_only=True)
     rank = serializers.StringRelatedField()
     total_winnings = serializers.DecimalField(
-        max_digits=10, decimal_places=2, read_only=True
+        max_digits=12, decimal_places=2, read_only=True
     )
     wins = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
         fields = (
+            "position",
             "id",
             "username",
             "score",
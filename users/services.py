@@ -1,97 +1,183 @@
-import random
-import string
-
-from django.utils import timezone
-from rest_framework_simplejwt.tokens import RefreshToken
+import shortuuid
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 
+from notifications.services import send_notifications
 from notifications.tasks import send_email_notification, send_sms_notification
+from tournaments.stats import adjust_platform_stat
+from wallet.models import Wallet
 
-from .models import OTP, Team, TeamInvitation, User
+from .leaderboards import sync_player_scores
+from .models import Referral, Role, Team, TeamInvitation, TeamMembership, User
+from .otp import (OTPError, consume_code, email_identifier, issue_code,
+                  phone_identifier, throttle_identifier, throttle_ip)
+from .referrals import record_referrals
+from .tasks import record_otp_audit_task
+from .tokens import issue_tokens_from_claims, token_claims
 
 
 class ApplicationError(Exception):
     pass
 
 
-def send_otp_service(phone_number=None, email=None):
+PROVISION_BATCH_SIZE = 1000
+
+
+def _rank_for_score(ranks, score):
+    """
+    Returns the highest of `ranks` (ordered by required score, descending)
+    that `score` qualifies for.
+    """
+    return next((rank for rank in ranks if rank.required_score <= score), None)
+
+
+def provision_user_accounts(users, referrers=None):
+    """
+    Creates what every new account needs next to its User row: the default
+    role, a wallet and, when `referrers` maps a user to the user who
+    referred them, the Referral. `users` must already be saved.
+    """
+    default_role = Role.get_default_role()
+    if default_role:
+        User.groups.through.objects.bulk_create(
+            [
+                User.groups.through(user_id=user.pk, group_id=default_role.group_id)
+                for user in users
+            ],
+            batch_size=PROVISION_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    Wallet.objects.bulk_create(
+        [Wallet(user=user) for user in users], batch_size=PROVISION_BATCH_SIZE
+    )
+    if referrers:
+        Referral.objects.bulk_create(
+            [
+                Referral(referrer=referrer, referred=user)
+                for user, referrer in referrers.items()
+            ],
+            batch_size=PROVISION_BATCH_SIZE,
+        )
+        record_referrals(referrer.pk for referrer in referrers.values())
+    adjust_platform_stat("total_players", len(users))
+
+
+def provision_users(users, referral_codes=None):
+    """
+    Creates one or many new accounts in a single transaction.
+
+    `users` are unsaved User instances with their passwords already set.
+    `referral_codes`, if given, holds the referral code each user signed up
+    with (or None), in the same order; unknown codes are ignored. Referral
+    codes and ranks are assigned up front, and users, wallets, role
+    memberships and referrals are each inserted in bulk.
+
+    Returns the saved users.
+    """
+    from tournaments.models import Rank
+
+    users = list(users)
+    ranks = list(Rank.objects.order_by("-required_score"))
+    for user in users:
+        if not user.referral_code:
+            user.referral_code = shortuuid.uuid()
+        if user.rank_id is None:
+            user.rank = _rank_for_score(ranks, user.score)
+
+    codes = [code or None for code in (referral_codes or [None] * len(users))]
+    referrers_by_code = {}
+    if any(codes):
+        referrers_by_code = {
+            referrer.referral_code: referrer
+            for referrer in User.objects.filter(referral_code__in=set(filter(None, codes)))
+        }
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(users, batch_size=PROVISION_BATCH_SIZE)
+        referrers = {
+            user: referrers_by_code[code]
+            for user, code in zip(users, codes)
+            if code in referrers_by_code
+        }
+        provision_user_accounts(users, referrers)
+        sync_player_scores(users)
+    return users
+
+
+def send_otp_service(phone_number=None, email=None, ip_address=None):
     """
-    Finds the user and sends an OTP code.
+    Finds the user and sends an OTP code, throttled per phone number or
+    email and per client IP. Returns the code.
     """
     if not phone_number and not email:
         raise ApplicationError("Phone number or email is required.")
 
-    user = None
-    if phone_number:
-        try:
-            user = User.objects.get(phone_number=phone_number)
-        except User.DoesNotExist:
-            pass
-    if email and not user:
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
+    try:
+        if ip_address:
+            throttle_ip(ip_address)
+
+        user = identifier = None
+        if phone_number:
+            user = User.objects.filter(phone_number=phone_number).first()
+            identifier = phone_identifier(phone_number)
+        if email and not user:
+            user = User.objects.filter(email=email).first()
+            identifier = email_identifier(email)
+        if not user or not identifier:
             raise ApplicationError("User not found.")
-    if not user:
-        raise ApplicationError("User not found.")
+        if not user.is_active:
+            raise ApplicationError("This account has been deactivated.")
 
-    otp_code = "".join(random.choices(string.digits, k=6))
-    otp = OTP.objects.create(user=user, code=otp_code)
+        throttle_identifier(identifier)
+        code = issue_code(identifier, user, token_claims(user))
+    except OTPError as e:
+        raise ApplicationError(str(e))
 
     # Send SMS
     if user.phone_number:
-        send_sms_notification.delay(str(user.phone_number), {"code": otp.code})
+        send_sms_notification.delay(str(user.phone_number), {"code": code})
     # Send Email
     if user.email:
-        send_email_notification.delay(user.email, "OTP Code", {"code": otp.code})
+        send_email_notification.delay(user.email, "OTP Code", {"code": code})
 
-    return otp
+    if settings.OTP_AUDIT_ENABLED:
+        record_otp_audit_task.delay(user.pk, "sent")
+    return code
 
 
 def verify_otp_service(phone_number=None, email=None, code=None):
     """
-    Verifies the OTP code and returns JWT tokens if valid.
+    Verifies the OTP code and returns JWT tokens if valid, without any
+    database queries.
     """
     if not code or (not phone_number and not email):
         raise ApplicationError("Phone number or email and code are required.")
 
-    user = None
-    if phone_number:
-        try:
-            user = User.objects.get(phone_number=phone_number)
-        except User.DoesNotExist:
-            pass
-    if email and not user:
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise ApplicationError("User not found.")
-    if not user:
-        raise ApplicationError("User not found.")
-
+    identifiers = [
+        phone_identifier(phone_number) if phone_number else None,
+        email_identifier(email),
+    ]
     try:
-        otp = OTP.objects.get(user=user, code=code, is_active=True)
-        if (timezone.now() - otp.created_at).total_seconds() > 300:  # 5 minutes
-            otp.is_active = False
-            otp.save()
-            raise ApplicationError("OTP expired.")
-
-        otp.is_active = False
-        otp.save()
-
-        refresh = RefreshToken.for_user(user)
-        return {
-            "refresh": str(refresh),
-            "access": str(refresh.access_token),
-        }
-    except OTP.DoesNotExist:
-        raise ApplicationError("Invalid OTP.")
+        user_id, token_version, claims = consume_code(identifiers, str(code))
+    except OTPError as e:
+        raise ApplicationError(str(e))
+
+    if settings.OTP_AUDIT_ENABLED:
+        record_otp_audit_task.delay(user_id, "verified")
+    return issue_tokens_from_claims(user_id, token_version, claims)
+
+
+def is_team_member(team: Team, user_id: int) -> bool:
+    return TeamMembership.objects.filter(team_id=team.pk, user_id=user_id).exists()
 
 
 def invite_member_service(team: Team, from_user: User, to_user_id: int):
     """
     Invites a user to a team.
     """
-    if from_user != team.captain:
+    if from_user.pk != team.captain_id:
         raise ApplicationError("Only the team captain can invite members.")
 
     try:
@@ -99,7 +185,7 @@ def invite_member_service(team: Team, from_user: User, to_user_id: int):
     except User.DoesNotExist:
         raise ApplicationError("User not found.")
 
-    if to_user in team.members.all():
+    if is_team_member(team, to_user.pk):
         raise ApplicationError("User is already a member of the team.")
 
     invitation, created = TeamInvitation.objects.get_or_create(
@@ -108,22 +194,113 @@ def invite_member_service(team: Team, from_user: User, to_user_id: int):
     if not created:
         raise ApplicationError("Invitation already sent.")
 
+    _notify_invited(team, from_user, [to_user.pk])
     return invitation
 
 
+def _notify_invited(team: Team, from_user: User, user_ids):
+    send_notifications(
+        user_ids,
+        f"{from_user.username} invited you to join {team.name}.",
+        "team_invitation",
+    )
+
+
+def invite_members_service(team: Team, from_user: User, user_ids=(), usernames=()):
+    """
+    Invites many users to a team at once, identified by id or username.
+
+    The users are resolved in a single query that also flags who is already
+    a member or already invited, the invitations are inserted in one batch
+    and the invitees notified in one batched call.
+
+    Returns {"invited", "already_member", "already_invited"} lists of user
+    ids and "not_found" with the ids or usernames that matched nobody.
+    """
+    if from_user.pk != team.captain_id:
+        raise ApplicationError("Only the team captain can invite members.")
+
+    try:
+        user_ids = {int(user_id) for user_id in user_ids}
+    except (TypeError, ValueError):
+        raise ApplicationError("User IDs must be integers.")
+    usernames = {str(username) for username in usernames}
+    if not user_ids and not usernames:
+        raise ApplicationError("No users to invite.")
+
+    candidates = (
+        User.objects.filter(Q(pk__in=user_ids) | Q(username__in=usernames))
+        .annotate(
+            is_member=Exists(
+                TeamMembership.objects.filter(team_id=team.pk, user_id=OuterRef("pk"))
+            ),
+            is_invited=Exists(
+                TeamInvitation.objects.filter(
+                    from_user_id=from_user.pk, team_id=team.pk, to_user_id=OuterRef("pk")
+                )
+            ),
+        )
+        .values_list("pk", "username", "is_member", "is_invited")
+    )
+    result = {"invited": [], "already_member": [], "already_invited": [], "not_found": []}
+    found_ids, found_usernames = set(), set()
+    for user_id, username, is_member, is_invited in candidates:
+        found_ids.add(user_id)
+        found_usernames.add(username)
+        if is_member or user_id == team.captain_id:
+            result["already_member"].append(user_id)
+        elif is_invited:
+            result["already_invited"].append(user_id)
+        else:
+            result["invited"].append(user_id)
+    result["not_found"] = sorted(user_ids - found_ids) + sorted(usernames - found_usernames)
+    for key in ("invited", "already_member", "already_invited"):
+        result[key].sort()
+
+    with transaction.atomic():
+        _create_invitations(team, from_user, result["invited"])
+    return result
+
+
+def _create_invitations(team: Team, from_user: User, user_ids):
+    """
+    Inserts pending invitations in one batch and notifies the invitees.
+    """
+    from .dashboard import invalidate_dashboards
+
+    if not user_ids:
+        return
+    TeamInvitation.objects.bulk_create(
+        [
+            TeamInvitation(from_user_id=from_user.pk, to_user_id=user_id, team_id=team.pk)
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+    # bulk_create skips the post_save receiver that drops their dashboards.
+    invalidate_dashboards([from_user.pk, *user_ids])
+    _notify_invited(team, from_user, user_ids)
+
+
 def respond_to_invitation_service(invitation_id: int, user: User, status: str):
     """
     Responds to a team invitation.
     """
     try:
-        invitation = TeamInvitation.objects.get(id=invitation_id, to_user=user)
+        invitation = TeamInvitation.objects.select_related("team").get(
+            id=invitation_id, to_user=user
+        )
     except TeamInvitation.DoesNotExist:
         raise ApplicationError("Invitation not found.")
 
     if status == "accepted":
         invitation.status = "accepted"
-        invitation.team.members.add(user)
-        invitation.save()
+        try:
+            with transaction.atomic():
+                invitation.team.members.add(user)
+                invitation.save()
+        except ValidationError as e:
+            raise ApplicationError(e.messages[0])
     elif status == "rejected":
         invitation.status = "rejected"
         invitation.save()
@@ -137,9 +314,9 @@ def leave_team_service(team: Team, user: User):
     """
     Allows a user to leave a team.
     """
-    if user not in team.members.all():
+    if not is_team_member(team, user.pk):
         raise ApplicationError("You are not a member of this team.")
-    if user == team.captain:
+    if user.pk == team.captain_id:
         raise ApplicationError(
             "The captain cannot leave the team. Please transfer captaincy first."
         )
@@ -151,18 +328,72 @@ def remove_member_service(team: Team, captain: User, member_id: int):
     """
     Allows a captain to remove a member from a team.
     """
-    if captain != team.captain:
+    if captain.pk != team.captain_id:
         raise ApplicationError("Only the team captain can remove members.")
 
-    try:
-        member = User.objects.get(id=member_id)
-    except User.DoesNotExist:
+    if not User.objects.filter(id=member_id).exists():
         raise ApplicationError("User not found.")
 
-    if member not in team.members.all():
+    if not is_team_member(team, member_id):
         raise ApplicationError("User is not a member of the team.")
 
-    if member == team.captain:
+    if int(member_id) == team.captain_id:
+        raise ApplicationError("The captain cannot be removed from the team.")
+
+    team.members.remove(member_id)
+
+
+def update_roster_service(
+    team: Team, captain: User, invite_ids=(), remove_ids=()
+):
+    """
+    Invites and removes several users in one go without loading the roster:
+    the query count does not grow with the team, only by one per removed
+    member (their open match rows). Users the captain has already invited
+    to the team are skipped.
+
+    Returns {"invited": [user ids], "removed": [user ids]}.
+    """
+    if captain.pk != team.captain_id:
+        raise ApplicationError("Only the team captain can manage the roster.")
+
+    try:
+        invite_ids = {int(user_id) for user_id in invite_ids}
+        remove_ids = {int(user_id) for user_id in remove_ids}
+    except (TypeError, ValueError):
+        raise ApplicationError("User IDs must be integers.")
+    user_ids = invite_ids | remove_ids
+    if not user_ids:
+        raise ApplicationError("No users to invite or remove.")
+
+    found = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+    if user_ids - found:
+        raise ApplicationError("User not found.")
+    members = set(
+        TeamMembership.objects.filter(team_id=team.pk, user_id__in=user_ids).values_list(
+            "user_id", flat=True
+        )
+    )
+    if invite_ids & members:
+        raise ApplicationError("User is already a member of the team.")
+    if remove_ids - members:
+        raise ApplicationError("User is not a member of the team.")
+    if team.captain_id in remove_ids:
         raise ApplicationError("The captain cannot be removed from the team.")
 
-    team.members.remove(member)
+    invited = sorted(
+        invite_ids
+        - set(
+            TeamInvitation.objects.filter(
+                from_user_id=captain.pk,
+                team_id=team.pk,
+                to_user_id__in=invite_ids,
+            ).values_list("to_user_id", flat=True)
+        )
+    )
+    with transaction.atomic():
+        _create_invitations(team, captain, invited)
+        if remove_ids:
+            team.members.remove(*remove_ids)
+
+    return {"invited": invited, "removed": sorted(remove_ids)}
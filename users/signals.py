@@ -1,9 +1,171 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import User
+from tournaments.models import Participant, Tournament
+from tournaments.stats import adjust_platform_stat
+from wallet.models import Transaction
+
+from .authentication import mark_deactivated
+from .dashboard import invalidate_dashboards, invalidate_tournament_dashboards
+from .leaderboards import record_team_members_changed, sync_player_scores
+from .models import (InGameID, Referral, Team, TeamInvitation, TeamMembership,
+                     User, reserve_team_slots)
+from .otp import discard_codes
+from .profiles import invalidate_public_profiles
+from .referrals import record_referrals
+from .services import provision_user_accounts
 
 
 @receiver(post_save, sender=User)
 def user_post_save(sender, instance, **kwargs):
     instance.update_rank()
+    sync_player_scores([instance])
+
+
+@receiver(post_save, sender=User)
+def provision_created_user(sender, instance, created, raw=False, **kwargs):
+    # Users created one by one (createsuperuser, the admin, ...) rather than
+    # through `provision_users`, which bulk-creates and skips this signal.
+    if created and not raw:
+        provision_user_accounts([instance])
+
+
+@receiver(post_save, sender=User)
+def user_profile_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which profiles don't show.
+    if not created and update_fields != frozenset({"last_login"}):
+        invalidate_public_profiles([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def user_deactivated(sender, instance, created, **kwargs):
+    # Login codes and claims-only access tokens carry what was true when
+    # they were issued, so a deactivated account must not be able to use
+    # either.
+    if not created and not instance.is_active:
+
+        def _apply():
+            discard_codes(instance)
+            mark_deactivated(instance.pk)
+
+        transaction.on_commit(_apply)
+
+
+@receiver(post_save, sender=InGameID)
+@receiver(post_delete, sender=InGameID)
+def in_game_id_changed(sender, instance, **kwargs):
+    invalidate_public_profiles([instance.user_id])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_roles_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ("post_add", "post_remove"):
+        invalidate_public_profiles(pk_set if reverse else [instance.pk])
+    elif action == "pre_clear":
+        invalidate_public_profiles(
+            instance.user_set.values_list("pk", flat=True) if reverse else [instance.pk]
+        )
+
+
+@receiver(post_save, sender=Referral)
+def count_created_referral(sender, instance, created, raw=False, **kwargs):
+    # Referrals made at signup are bulk-created and counted by
+    # `provision_user_accounts`; this covers rows added one by one.
+    if created and not raw:
+        record_referrals([instance.referrer_id])
+
+
+@receiver(post_delete, sender=Referral)
+def count_deleted_referral(sender, instance, origin=None, **kwargs):
+    # The referrer's own deletion takes their counters with it.
+    if isinstance(origin, User) and origin.pk == instance.referrer_id:
+        return
+    record_referrals([instance.referrer_id], delta=-1)
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    adjust_platform_stat("total_players", -1)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def participant_changed(sender, instance, **kwargs):
+    # Other entrants' dashboards only show this through spots left, which
+    # are not cached.
+    invalidate_dashboards([instance.user_id])
+
+
+@receiver(post_save, sender=Tournament)
+def tournament_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_tournament_dashboards(instance.pk)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def reserve_added_team_members(sender, instance, action, reverse, pk_set, **kwargs):
+    # Removals go through TeamMembershipQuerySet.delete, which releases the
+    # slots; `pk_set` here only holds users who are not members yet.
+    if action != "pre_add" or not pk_set:
+        return
+    if reverse:
+        for team_id in pk_set:
+            reserve_team_slots(team_id, [instance.pk])
+    else:
+        reserve_team_slots(instance.pk, pk_set)
+
+
+@receiver(post_save, sender=TeamMembership)
+def team_member_joined(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_team_members_changed(instance.team_id, [instance.user_id], joined=True)
+
+
+@receiver(post_delete, sender=TeamMembership)
+def team_member_left(sender, instance, origin=None, **kwargs):
+    # The team's own deletion takes its stats with it.
+    if isinstance(origin, Team) and origin.pk == instance.team_id:
+        return
+    record_team_members_changed(instance.team_id, [instance.user_id], joined=False)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def team_members_added(sender, instance, action, reverse, pk_set, **kwargs):
+    # `team.members.add()` bulk-inserts without TeamMembership signals;
+    # removals and clears delete row by row and reach `team_member_left`.
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        for team_id in pk_set:
+            record_team_members_changed(team_id, [instance.pk], joined=True)
+    else:
+        record_team_members_changed(instance.pk, pk_set, joined=True)
+
+
+@receiver(pre_delete, sender=Team)
+def release_deleted_team_members(sender, instance, **kwargs):
+    # Cascaded membership deletes bypass TeamMembershipQuerySet.delete.
+    User.objects.filter(teammembership__team=instance).update(
+        team_count=Greatest(F("team_count") - 1, 0)
+    )
+
+
+@receiver(pre_delete, sender=User)
+def release_deleted_user_teams(sender, instance, **kwargs):
+    Team.objects.filter(teammembership__user=instance).update(
+        member_count=Greatest(F("member_count") - 1, 0)
+    )
+
+
+@receiver(post_save, sender=TeamInvitation)
+@receiver(post_delete, sender=TeamInvitation)
+def team_invitation_changed(sender, instance, **kwargs):
+    invalidate_dashboards([instance.from_user_id, instance.to_user_id])
+
+
+@receiver(post_save, sender=Transaction)
+def transaction_changed(sender, instance, **kwargs):
+    invalidate_dashboards([instance.wallet.user_id])
@@ -0,0 +1,60 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_leaderboards_task():
+    """
+    Nightly task that recomputes leaderboard stats and sorted sets from
+    transactions and matches.
+    """
+    from .leaderboards import reconcile_leaderboards
+
+    reconcile_leaderboards()
+    logger.info("Leaderboards reconciled.")
+
+
+@shared_task
+def reconcile_referral_stats_task():
+    """
+    Nightly task that recomputes referral counters from referrals and
+    entry fees.
+    """
+    from .referrals import reconcile_referral_stats
+
+    reconcile_referral_stats()
+    logger.info("Referral stats reconciled.")
+
+
+@shared_task
+def record_otp_audit_task(user_id, event):
+    """
+    Writes an OTP send ("sent") or successful login ("verified") to the
+    `OTP` audit table. Codes themselves live only in Redis (see users.otp).
+    """
+    from .models import OTP
+
+    if event == "sent":
+        OTP.objects.create(user_id=user_id, code="")
+    elif event == "verified":
+        OTP.objects.filter(user_id=user_id, is_active=True).update(is_active=False)
+
+
+@shared_task
+def purge_otp_audit_task():
+    """
+    Deletes OTP audit rows older than OTP_AUDIT_RETENTION_DAYS.
+    """
+    from datetime import timedelta
+
+    from django.conf import settings
+    from django.utils import timezone
+
+    from .models import OTP
+
+    cutoff = timezone.now() - timedelta(days=settings.OTP_AUDIT_RETENTION_DAYS)
+    deleted, _ = OTP.objects.filter(created_at__lt=cutoff).delete()
+    logger.info("Purged %s OTP audit rows.", deleted)
@@ -1,9 +1,11 @@
 from datetime import timedelta
+from decimal import Decimal
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.utils import IntegrityError
 from django.test import TestCase
 from django.utils import timezone
@@ -12,10 +14,12 @@ from rest_framework.test import APIClient, APITestCase
 
 from tournaments.models import Game, Match, Rank, Tournament
 
-from .models import OTP, Role, Team, TeamInvitation, TeamMembership
+from .models import OTP, InGameID, Role, Team, TeamInvitation, TeamMembership
 from .services import (ApplicationError, invite_member_service,
+                       invite_members_service,
                        leave_team_service, remove_member_service,
-                       respond_to_invitation_service)
+                       respond_to_invitation_service, send_otp_service,
+                       update_roster_service, verify_otp_service)
 
 User = get_user_model()
 
@@ -109,6 +113,34 @@ class TeamModelTests(TestCase):
         another_team = Team.objects.create(name="Team 11", captain=self.captain)
         with self.assertRaises(ValidationError):
             TeamMembership.objects.create(user=user, team=another_team)
+        user.refresh_from_db()
+        self.assertEqual(user.team_count, 10)
+
+    def test_membership_counters(self):
+        team = Team.objects.create(name="Counted", captain=self.captain, max_members=2)
+        users = [
+            User.objects.create_user(
+                username=f"counted{i}", password="password", phone_number=f"+30{i}"
+            )
+            for i in range(3)
+        ]
+        TeamMembership.objects.create(user=users[0], team=team)
+        team.members.add(users[1])
+        with self.assertRaisesMessage(ValidationError, "This team is already full."):
+            with transaction.atomic():
+                team.members.add(users[2])
+        team.refresh_from_db()
+        self.assertEqual(team.member_count, 2)
+
+        team.members.remove(users[0])
+        team.refresh_from_db()
+        users[0].refresh_from_db()
+        self.assertEqual(team.member_count, 1)
+        self.assertEqual(users[0].team_count, 0)
+
+        team.delete()
+        users[1].refresh_from_db()
+        self.assertEqual(users[1].team_count, 0)
 
 
 class UserViewSetTests(APITestCase):
@@ -124,6 +156,9 @@ class UserViewSetTests(APITestCase):
         self.admin_user = User.objects.create_superuser(
             username="admin", password="password", phone_number="+3"
         )
+        audit_patcher = patch("users.services.record_otp_audit_task.delay")
+        self.record_otp_audit = audit_patcher.start()
+        self.addCleanup(audit_patcher.stop)
 
     def test_list_users_unauthenticated(self):
         response = self.client.get(self.users_url)
@@ -182,29 +217,39 @@ class UserViewSetTests(APITestCase):
         data = {"phone_number": self.user1.phone_number}
         response = self.client.post(f"{self.users_url}send_otp/", data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(OTP.objects.filter(user=self.user1).exists())
+        self.record_otp_audit.assert_called_once_with(self.user1.pk, "sent")
         mock_send_sms.assert_called_once()
         mock_send_email.assert_not_called()
 
+    def _send_otp(self, user=None):
+        with patch("users.services.send_sms_notification.delay"), patch(
+            "users.services.send_email_notification.delay"
+        ):
+            return send_otp_service(phone_number=str((user or self.user1).phone_number))
+
     def test_verify_otp_success(self):
         """
         Test that a valid OTP is verified successfully.
         """
-        otp = OTP.objects.create(user=self.user1, code="123456")
-        data = {"phone_number": self.user1.phone_number, "code": "123456"}
+        code = self._send_otp()
+        data = {"phone_number": self.user1.phone_number, "code": code}
         response = self.client.post(f"{self.users_url}verify_otp/", data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("access", response.data)
         self.assertIn("refresh", response.data)
-        otp.refresh_from_db()
-        self.assertFalse(otp.is_active)
+        self.record_otp_audit.assert_called_with(self.user1.pk, "verified")
+
+        # Codes are single-use.
+        response = self.client.post(f"{self.users_url}verify_otp/", data)
+        self.assertEqual(response.data["error"], "OTP expired.")
 
     def test_verify_otp_invalid_code(self):
         """
         Test that an invalid OTP fails verification.
         """
-        OTP.objects.create(user=self.user1, code="123456")
-        data = {"phone_number": self.user1.phone_number, "code": "654321"}
+        code = self._send_otp()
+        wrong = "000000" if code != "000000" else "111111"
+        data = {"phone_number": self.user1.phone_number, "code": wrong}
         response = self.client.post(f"{self.users_url}verify_otp/", data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data["error"], "Invalid OTP.")
@@ -213,14 +258,178 @@ class UserViewSetTests(APITestCase):
         """
         Test that an expired OTP fails verification.
         """
-        otp = OTP.objects.create(user=self.user1, code="123456")
-        otp.created_at = timezone.now() - timedelta(minutes=10)
-        otp.save()
-        data = {"phone_number": self.user1.phone_number, "code": "123456"}
+        from django_redis import get_redis_connection
+
+        code = self._send_otp()
+        client = get_redis_connection("default")
+        for key in client.scan_iter(match="otp:code:*"):
+            client.delete(key)
+        data = {"phone_number": self.user1.phone_number, "code": code}
         response = self.client.post(f"{self.users_url}verify_otp/", data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data["error"], "OTP expired.")
 
+    def test_otp_audit_task_records_sends_and_logins(self):
+        from .tasks import record_otp_audit_task
+
+        record_otp_audit_task(self.user1.pk, "sent")
+        self.assertTrue(OTP.objects.get(user=self.user1).is_active)
+        record_otp_audit_task(self.user1.pk, "verified")
+        self.assertFalse(OTP.objects.get(user=self.user1).is_active)
+
+    def test_verify_otp_runs_no_queries(self):
+        from django.test import override_settings
+
+        with override_settings(OTP_AUDIT_ENABLED=False):
+            code = self._send_otp()
+            with self.assertNumQueries(0):
+                tokens = verify_otp_service(phone_number="+1", code=code)
+        self.assertIn("access", tokens)
+
+    def test_verify_otp_attempts_are_limited(self):
+        from django.test import override_settings
+
+        code = self._send_otp()
+        wrong = "000000" if code != "000000" else "111111"
+        with override_settings(OTP_MAX_ATTEMPTS=2):
+            for _ in range(2):
+                with self.assertRaisesMessage(ApplicationError, "Invalid OTP."):
+                    verify_otp_service(phone_number="+1", code=wrong)
+            with self.assertRaisesMessage(ApplicationError, "Too many attempts"):
+                verify_otp_service(phone_number="+1", code=code)
+        with self.assertRaisesMessage(ApplicationError, "OTP expired."):
+            verify_otp_service(phone_number="+1", code=code)
+
+    def test_send_otp_is_throttled(self):
+        from django.test import override_settings
+
+        with override_settings(OTP_SEND_LIMIT_PER_IDENTIFIER=(2, 600)):
+            for _ in range(2):
+                self._send_otp()
+            with self.assertRaisesMessage(ApplicationError, "Too many OTP requests"):
+                self._send_otp()
+
+        with override_settings(OTP_SEND_LIMIT_PER_IP=(2, 600)), patch(
+            "users.services.send_sms_notification.delay"
+        ):
+            send_otp_service(phone_number="+2", ip_address="10.0.0.1")
+            send_otp_service(phone_number="+3", ip_address="10.0.0.1")
+            with self.assertRaisesMessage(ApplicationError, "Too many OTP requests"):
+                send_otp_service(phone_number="+2", ip_address="10.0.0.1")
+            send_otp_service(phone_number="+2", ip_address="10.0.0.2")
+
+    def test_client_ip_is_read_from_trusted_proxy_headers(self):
+        from django.test import RequestFactory, override_settings
+
+        from .otp import client_ip
+
+        factory = RequestFactory()
+        with override_settings(TRUSTED_PROXIES=["172.16.0.0/12"]):
+            behind_proxy = factory.post(
+                "/", REMOTE_ADDR="172.18.0.5", HTTP_X_REAL_IP="203.0.113.7"
+            )
+            self.assertEqual(client_ip(behind_proxy), "203.0.113.7")
+            forwarded = factory.post(
+                "/",
+                REMOTE_ADDR="172.18.0.5",
+                HTTP_X_FORWARDED_FOR="198.51.100.1, 203.0.113.8, 172.18.0.9",
+            )
+            self.assertEqual(client_ip(forwarded), "203.0.113.8")
+            # Anyone else cannot choose the address they are throttled by.
+            direct = factory.post(
+                "/", REMOTE_ADDR="203.0.113.9", HTTP_X_REAL_IP="198.51.100.2"
+            )
+            self.assertEqual(client_ip(direct), "203.0.113.9")
+
+    @patch("users.views.send_otp_service")
+    def test_send_otp_throttles_the_client_behind_the_proxy(self, send):
+        self.client.post(
+            f"{self.users_url}send_otp/",
+            {"phone_number": "+1"},
+            REMOTE_ADDR="127.0.0.1",
+            HTTP_X_REAL_IP="203.0.113.7",
+        )
+        self.assertEqual(send.call_args.kwargs["ip_address"], "203.0.113.7")
+
+    def test_inactive_user_cannot_log_in_with_otp(self):
+        code = self._send_otp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user1.is_active = False
+            self.user1.save()
+
+        with self.assertRaisesMessage(ApplicationError, "OTP expired."):
+            verify_otp_service(phone_number="+1", code=code)
+        with self.assertRaisesMessage(ApplicationError, "deactivated"):
+            self._send_otp()
+
+
+class PublicProfileTests(APITestCase):
+    def setUp(self):
+        self.users_url = "/api/users/users/"
+        self.viewer = User.objects.create_user(
+            username="viewer", password="password", phone_number="+50"
+        )
+        self.players = [
+            User.objects.create_user(
+                username=f"profile{i}", password="password", phone_number=f"+51{i}"
+            )
+            for i in range(3)
+        ]
+        self.ids = [player.id for player in self.players]
+
+    def test_profiles_are_cached(self):
+        from .profiles import get_public_profiles
+
+        with self.assertNumQueries(3):
+            profiles = get_public_profiles(self.ids)
+        self.assertEqual(list(profiles), self.ids)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_public_profiles(self.ids), profiles)
+
+    def test_profile_changes_invalidate_the_cache(self):
+        from .profiles import get_public_profile
+
+        get_public_profile(self.players[0].id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.players[0].first_name = "Renamed"
+            self.players[0].save()
+        self.assertEqual(get_public_profile(self.players[0].id)["first_name"], "Renamed")
+
+        game = Game.objects.create(name="Profile Game")
+        with self.captureOnCommitCallbacks(execute=True):
+            InGameID.objects.create(user=self.players[0], game=game, player_id="p-1")
+        self.assertEqual(
+            get_public_profile(self.players[0].id)["in_game_ids"],
+            [{"game": game.id, "player_id": "p-1"}],
+        )
+
+    def test_retrieve_other_profile(self):
+        self.client.force_authenticate(user=self.viewer)
+        response = self.client.get(f"{self.users_url}{self.players[0].id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["username"], "profile0")
+        self.assertNotIn("email", response.data)
+
+        response = self.client.get(f"{self.users_url}999999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_own_profile_uses_full_serializer(self):
+        self.client.force_authenticate(user=self.viewer)
+        response = self.client.get(f"{self.users_url}{self.viewer.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("email", response.data)
+
+    def test_batch_profiles(self):
+        ids = [self.ids[2], 999999, self.ids[0]]
+        response = self.client.get(self.users_url, {"ids": ",".join(map(str, ids))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [profile["id"] for profile in response.data], [self.ids[2], self.ids[0]]
+        )
+
+        response = self.client.get(self.users_url, {"ids": "1,abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class TeamViewSetTests(APITestCase):
     def setUp(self):
@@ -301,6 +510,38 @@ class TeamViewSetTests(APITestCase):
         self.assertEqual(invitation.status, "accepted")
         self.assertIn(self.non_member, self.team.members.all())
 
+    def test_roster_by_captain(self):
+        self.client.force_authenticate(user=self.captain)
+        data = {"invite": [self.non_member.id], "remove": [self.member.id]}
+        response = self.client.post(
+            f"{self.teams_url}{self.team.id}/roster/", data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["invited"], [self.non_member.id])
+        self.assertEqual(response.data["removed"], [self.member.id])
+        self.assertNotIn(self.member, self.team.members.all())
+
+    def test_invite_members_by_captain(self):
+        self.client.force_authenticate(user=self.captain)
+        data = {"usernames": [self.non_member.username, "ghost"]}
+        response = self.client.post(
+            f"{self.teams_url}{self.team.id}/invite-members/", data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["invited"], [self.non_member.id])
+        self.assertEqual(response.data["not_found"], ["ghost"])
+        self.assertTrue(
+            TeamInvitation.objects.filter(team=self.team, to_user=self.non_member).exists()
+        )
+
+    def test_roster_by_non_captain_fails(self):
+        self.client.force_authenticate(user=self.member)
+        data = {"invite": [self.non_member.id]}
+        response = self.client.post(
+            f"{self.teams_url}{self.team.id}/roster/", data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_respond_invitation_reject(self):
         invitation = TeamInvitation.objects.create(
             from_user=self.captain, to_user=self.non_member, team=self.team
@@ -384,6 +625,123 @@ class UserServicesTests(TestCase):
                 team=self.team, captain=self.member, member_id=self.captain.id
             )
 
+    def test_respond_to_invitation_full_team_fails(self):
+        self.team.max_members = 2
+        self.team.save()
+        invitation = TeamInvitation.objects.create(
+            from_user=self.captain, to_user=self.non_member, team=self.team
+        )
+        with self.assertRaisesMessage(ApplicationError, "This team is already full."):
+            respond_to_invitation_service(invitation.id, self.non_member, "accepted")
+        invitation.refresh_from_db()
+        self.assertEqual(invitation.status, "pending")
+
+    def test_update_roster_service(self):
+        result = update_roster_service(
+            team=self.team,
+            captain=self.captain,
+            invite_ids=[self.non_member.id],
+            remove_ids=[self.member.id],
+        )
+        self.assertEqual(
+            result, {"invited": [self.non_member.id], "removed": [self.member.id]}
+        )
+        self.assertTrue(
+            TeamInvitation.objects.filter(team=self.team, to_user=self.non_member).exists()
+        )
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.member_count, 1)
+        self.assertNotIn(self.member, self.team.members.all())
+
+        # Already invited users are skipped.
+        result = update_roster_service(
+            team=self.team, captain=self.captain, invite_ids=[self.non_member.id]
+        )
+        self.assertEqual(result["invited"], [])
+
+    def test_invite_members_service(self):
+        from notifications.models import Notification
+
+        recruits = [
+            User.objects.create_user(
+                username=f"recruit{i}", password="p", phone_number=f"+21{i}"
+            )
+            for i in range(3)
+        ]
+        TeamInvitation.objects.create(
+            from_user=self.captain, to_user=recruits[2], team=self.team
+        )
+        # Resolve, insert invitations, insert notifications (+ savepoint).
+        with self.assertNumQueries(5):
+            result = invite_members_service(
+                team=self.team,
+                from_user=self.captain,
+                user_ids=[recruits[0].id, self.member.id, 0],
+                usernames=["recruit1", "recruit2", "ghost"],
+            )
+        self.assertEqual(
+            result,
+            {
+                "invited": [recruits[0].id, recruits[1].id],
+                "already_member": [self.member.id],
+                "already_invited": [recruits[2].id],
+                "not_found": [0, "ghost"],
+            },
+        )
+        self.assertEqual(
+            TeamInvitation.objects.filter(team=self.team, status="pending").count(), 3
+        )
+        self.assertEqual(
+            Notification.objects.filter(notification_type="team_invitation").count(), 2
+        )
+
+    def test_invite_members_service_not_captain_fails(self):
+        with self.assertRaisesMessage(
+            ApplicationError, "Only the team captain can invite members."
+        ):
+            invite_members_service(
+                team=self.team, from_user=self.member, user_ids=[self.non_member.id]
+            )
+
+    def test_update_roster_service_errors(self):
+        with self.assertRaisesMessage(
+            ApplicationError, "User is already a member of the team."
+        ):
+            update_roster_service(
+                team=self.team, captain=self.captain, invite_ids=[self.member.id]
+            )
+        with self.assertRaisesMessage(
+            ApplicationError, "The captain cannot be removed from the team."
+        ):
+            update_roster_service(
+                team=self.team, captain=self.captain, remove_ids=[self.captain.id]
+            )
+        with self.assertRaisesMessage(ApplicationError, "User not found."):
+            update_roster_service(
+                team=self.team, captain=self.captain, invite_ids=[0]
+            )
+
+    def test_update_roster_query_count_ignores_team_size(self):
+        recruits = [
+            User.objects.create_user(
+                username=f"recruit{i}", password="p", phone_number=f"+20{i}"
+            )
+            for i in range(4)
+        ]
+        with self.assertNumQueries(7):
+            update_roster_service(
+                team=self.team, captain=self.captain, invite_ids=[recruits[0].id]
+            )
+        self.team.max_members = 10
+        self.team.save()
+        self.team.members.add(*recruits[:2])
+        with self.assertNumQueries(7):
+            update_roster_service(
+                team=self.team,
+                captain=self.captain,
+                invite_ids=[user.id for user in recruits[2:]],
+            )
+
 
 class MatchHistoryAPITests(APITestCase):
     def setUp(self):
@@ -445,8 +803,8 @@ class MatchHistoryAPITests(APITestCase):
         url = f"/api/users/users/{self.user1.id}/match-history/"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        match_ids = [item["id"] for item in response.data]
+        self.assertEqual(len(response.data["results"]), 2)
+        match_ids = [item["id"] for item in response.data["results"]]
         self.assertIn(self.match1.id, match_ids)
         self.assertIn(self.match2.id, match_ids)
         self.assertNotIn(self.match3.id, match_ids)
@@ -461,5 +819,478 @@ class MatchHistoryAPITests(APITestCase):
         url = f"/api/users/teams/{self.team1.id}/match-history/"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.match2.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.match2.id)
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        self.players = [
+            User.objects.create_user(
+                username=f"leader{i}", password="p", phone_number=f"+7{i:02d}"
+            )
+            for i in range(3)
+        ]
+        self.team = Team.objects.create(name="Leaders", captain=self.players[0])
+        TeamMembership.objects.create(user=self.players[0], team=self.team)
+        TeamMembership.objects.create(user=self.players[1], team=self.team)
+
+    def _pay(self, user, amount):
+        from decimal import Decimal
+
+        from wallet.services import process_transaction
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_transaction(user, Decimal(amount), "prize")
+
+    def test_top_players_follow_prize_payouts(self):
+        self.client.get("/api/users/top-players/")  # Builds the leaderboards.
+        self._pay(self.players[1], "50")
+        self._pay(self.players[2], "80")
+        self._pay(self.players[1], "40")
+
+        self.client.force_authenticate(user=self.players[2])
+        response = self.client.get("/api/users/top-players/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            [(p["username"], p["position"]) for p in response.data["results"]],
+            [("leader1", 1), ("leader2", 2)],
+        )
+        self.assertEqual(response.data["results"][0]["total_winnings"], "90.00")
+        self.assertEqual(response.data["my_position"], 2)
+
+    def test_top_teams_sum_member_winnings(self):
+        self._pay(self.players[0], "10")
+        self._pay(self.players[1], "15")
+        self._pay(self.players[2], "100")
+
+        response = self.client.get("/api/users/top-teams/")
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["total_winnings"], "25.00")
+
+    def test_top_players_by_rank_is_paginated(self):
+        from tournaments.services import confirm_match_result
+
+        User.objects.filter(pk=self.players[2].pk).update(score=30)
+        User.objects.filter(pk=self.players[0].pk).update(score=20)
+        game = Game.objects.create(name="Leader Game")
+        tournament = Tournament.objects.create(
+            name="Leader Cup",
+            game=game,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+        )
+        match = Match.objects.create(
+            tournament=tournament,
+            round=1,
+            participant1_user=self.players[0],
+            participant2_user=self.players[2],
+        )
+        confirm_match_result(match, self.players[2].id)
+
+        response = self.client.get("/api/users/top-players-by-rank/", {"page_size": 2})
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [p["username"] for p in response.data["results"]], ["leader2", "leader0"]
+        )
+        self.assertEqual(response.data["results"][0]["wins"], 1)
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([p["position"] for p in response.data["results"]], [3])
+
+    def test_reconcile_matches_incremental_totals(self):
+        from .leaderboards import reconcile_leaderboards
+        from .models import PlayerStats, TeamStats
+
+        self._pay(self.players[0], "10")
+        self._pay(self.players[1], "15")
+        incremental = (
+            list(PlayerStats.objects.order_by("pk").values_list("pk", "total_winnings")),
+            TeamStats.objects.get(team=self.team).total_winnings,
+        )
+        reconcile_leaderboards()
+        self.assertEqual(
+            incremental,
+            (
+                list(PlayerStats.objects.order_by("pk").values_list("pk", "total_winnings")),
+                TeamStats.objects.get(team=self.team).total_winnings,
+            ),
+        )
+
+    def test_team_winnings_follow_membership_changes(self):
+        from .leaderboards import reconcile_leaderboards
+        from .models import TeamStats
+
+        self._pay(self.players[2], "40")
+        self._pay(self.players[1], "15")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.members.add(self.players[2])
+            TeamMembership.objects.filter(user=self.players[1]).delete()
+        incremental = TeamStats.objects.get(team=self.team).total_winnings
+        self.assertEqual(incremental, Decimal("40.00"))
+
+        reconcile_leaderboards()
+        self.assertEqual(TeamStats.objects.get(team=self.team).total_winnings, incremental)
+
+    def test_deleting_a_team_drops_its_stats(self):
+        from django.db import connection
+
+        from .models import TeamStats
+
+        self._pay(self.players[1], "15")
+        team_id = self.team.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.delete()
+        self.assertFalse(TeamStats.objects.filter(pk=team_id).exists())
+        connection.check_constraints()
+
+    def test_members_without_stats_rows_are_listed(self):
+        from django_redis import get_redis_connection
+
+        from .leaderboards import LEADERBOARD_KEYS
+        from .models import PlayerStats, TeamStats
+
+        self._pay(self.players[1], "15")
+        self.client.get("/api/users/top-teams/")
+        PlayerStats.objects.all().delete()
+        TeamStats.objects.all().delete()
+        client = get_redis_connection("default")
+        self.assertTrue(client.zcard(LEADERBOARD_KEYS["players_by_winnings"]))
+
+        for url in ("/api/users/top-players/", "/api/users/top-teams/"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["results"][0]["total_winnings"], "0.00")
+
+    def test_cold_leaderboards_are_reloaded_from_stats_tables(self):
+        from django_redis import get_redis_connection
+
+        from .leaderboards import LEADERBOARDS_LOCK_KEY
+        from .models import PlayerStats
+
+        self._pay(self.players[1], "50")
+        client = get_redis_connection("default")
+        client.flushdb()
+
+        # While another request holds the lock, readers do not rebuild.
+        client.set(LEADERBOARDS_LOCK_KEY, 1)
+        response = self.client.get("/api/users/top-players/")
+        self.assertEqual(response.data["count"], 0)
+        client.delete(LEADERBOARDS_LOCK_KEY)
+
+        with patch("users.leaderboards.reconcile_leaderboards") as reconcile:
+            response = self.client.get("/api/users/top-players/")
+        reconcile.assert_not_called()
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(PlayerStats.objects.get(pk=self.players[1].pk).total_winnings, 50)
+
+
+class DashboardTests(APITestCase):
+    def setUp(self):
+        from tournaments.models import Participant
+
+        self.user = User.objects.create_user(
+            username="dash", password="p", phone_number="+600"
+        )
+        self.other = User.objects.create_user(
+            username="dash_other", password="p", phone_number="+601"
+        )
+        self.team = Team.objects.create(name="Dashers", captain=self.user)
+        game = Game.objects.create(name="Dash Game")
+        self.tournaments = [
+            Tournament.objects.create(
+                name=f"Dash Cup {i}",
+                game=game,
+                start_date=timezone.now() + timedelta(days=i),
+                end_date=timezone.now() + timedelta(days=i + 1),
+                max_participants=10,
+            )
+            for i in (2, 1, -1)
+        ]
+        for tournament in self.tournaments:
+            Participant.objects.create(user=self.user, tournament=tournament)
+        TeamInvitation.objects.create(
+            from_user=self.user, to_user=self.other, team=self.team
+        )
+
+    def _pay(self, amount):
+        from decimal import Decimal
+
+        from wallet.services import process_transaction
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_transaction(self.user, Decimal(amount), "deposit")
+
+    def test_dashboard_payload(self):
+        for amount in range(1, 8):
+            self._pay(str(amount))
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get("/api/users/dashboard/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t["name"] for t in response.data["upcoming_tournaments"]],
+            ["Dash Cup 1", "Dash Cup 2"],
+        )
+        self.assertEqual(response.data["upcoming_tournaments"][0]["spots_left"], 9)
+        self.assertEqual(len(response.data["sent_invitations"]), 1)
+        self.assertEqual(response.data["received_invitations"], [])
+        self.assertEqual(
+            [t["amount"] for t in response.data["latest_transactions"]],
+            ["7.00", "6.00", "5.00", "4.00", "3.00"],
+        )
+
+    def test_build_runs_a_constant_number_of_queries(self):
+        from .dashboard import build_dashboard, get_dashboard
+
+        with self.assertNumQueries(4):
+            build_dashboard(self.user)
+        get_dashboard(self.user)
+        # Only the spots left are read on a cache hit.
+        with self.assertNumQueries(1):
+            get_dashboard(self.user)
+
+    def test_cache_is_invalidated_by_related_changes(self):
+        from tournaments.models import Participant
+
+        from .dashboard import get_dashboard
+
+        get_dashboard(self.user)
+        self._pay("12")
+        self.assertEqual(get_dashboard(self.user)["latest_transactions"][0]["amount"], "12.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TeamInvitation.objects.create(
+                from_user=self.other, to_user=self.user, team=self.team
+            )
+        self.assertEqual(len(get_dashboard(self.user)["received_invitations"]), 1)
+
+        # Another player joining changes this user's spots left without
+        # invalidating their dashboard.
+        with patch("users.signals.invalidate_dashboards") as invalidate:
+            Participant.objects.create(user=self.other, tournament=self.tournaments[1])
+        invalidate.assert_called_once_with([self.other.pk])
+        self.assertEqual(
+            get_dashboard(self.user)["upcoming_tournaments"][0]["spots_left"], 8
+        )
+
+
+class TokenClaimsTests(APITestCase):
+    def setUp(self):
+        from verification.models import Verification
+
+        self.user = User.objects.create_user(
+            username="claims", password="secret-pass", phone_number="+610", is_staff=True
+        )
+        Verification.objects.create(user=self.user, level=2)
+
+    def _obtain(self):
+        response = self.client.post(
+            "/auth/jwt/create/", {"username": "claims", "password": "secret-pass"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_access_token_carries_claims(self):
+        from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+        tokens = self._obtain()
+        access = AccessToken(tokens["access"])
+        self.assertEqual(access["username"], "claims")
+        self.assertEqual(access["roles"], self.user.role)
+        self.assertEqual(access["verification_level"], 2)
+        self.user.refresh_from_db()
+        self.assertEqual(access["rank"], self.user.rank_id)
+        self.assertTrue(access["is_staff"])
+        self.assertNotIn("ver", access.payload)
+        self.assertEqual(RefreshToken(tokens["refresh"])["ver"], 0)
+
+    def test_claims_authentication_skips_the_database(self):
+        from rest_framework.test import APIRequestFactory
+
+        from .authentication import ClaimsAuthentication
+
+        access = self._obtain()["access"]
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.assertNumQueries(0):
+            user, _ = ClaimsAuthentication().authenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertTrue(user.is_staff)
+        self.assertEqual(user.verification_level, 2)
+
+    def test_claims_authentication_rejects_deactivated_users(self):
+        from rest_framework.test import APIRequestFactory
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+        from .authentication import ClaimsAuthentication
+
+        access = self._obtain()["access"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.assertRaises(AuthenticationFailed):
+            ClaimsAuthentication().authenticate(request)
+
+    def test_refresh_reloads_claims_and_honours_revocation(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from .tokens import revoke_user_tokens
+
+        refresh = self._obtain()["refresh"]
+        self.user.verification.level = 3
+        self.user.verification.save()
+
+        response = self.client.post("/auth/jwt/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data["access"])["verification_level"], 3)
+
+        revoke_user_tokens(self.user)
+        response = self.client.post("/auth/jwt/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProvisionUsersTests(TestCase):
+    def setUp(self):
+        group = Group.objects.create(name="Player")
+        Role.objects.create(group=group, is_default=True)
+        self.referrer = User.objects.create_user(
+            username="referrer", password="p", phone_number="+620"
+        )
+
+    def _new_users(self, count, prefix="new"):
+        users = []
+        for i in range(count):
+            user = User(username=f"{prefix}{i}", phone_number=f"+63{prefix}{i}")
+            user.set_password("p")
+            users.append(user)
+        return users
+
+    def test_provisions_accounts_in_bulk(self):
+        from wallet.models import Wallet
+
+        from .models import Referral
+        from .services import provision_users
+
+        users = provision_users(
+            self._new_users(3),
+            referral_codes=[self.referrer.referral_code, None, "unknown"],
+        )
+
+        self.assertEqual(len({user.referral_code for user in users}), 3)
+        self.assertTrue(all(user.referral_code for user in users))
+        self.assertEqual(Wallet.objects.filter(user__in=users).count(), 3)
+        self.assertEqual(
+            User.objects.filter(pk__in=[u.pk for u in users], groups__name="Player").count(),
+            3,
+        )
+        self.assertEqual(
+            list(Referral.objects.values_list("referrer", "referred")),
+            [(self.referrer.pk, users[0].pk)],
+        )
+        self.assertTrue(users[1].check_password("p"))
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from .services import provision_users
+
+        def count_queries(users):
+            codes = [self.referrer.referral_code] * len(users)
+            with CaptureQueriesContext(connection) as context:
+                provision_users(users, referral_codes=codes)
+            return len(context.captured_queries)
+
+        self.assertEqual(
+            count_queries(self._new_users(1, "a")), count_queries(self._new_users(20, "b"))
+        )
+
+    def test_single_created_user_gets_role_and_wallet(self):
+        from wallet.models import Wallet
+
+        self.assertTrue(Wallet.objects.filter(user=self.referrer).exists())
+        self.assertEqual(self.referrer.role, ["Player"])
+        self.assertTrue(self.referrer.referral_code)
+
+
+class ReferralStatsTests(APITestCase):
+    def setUp(self):
+        from .services import provision_users
+
+        self.referrers = [
+            User.objects.create_user(
+                username=f"referrer{i}", password="p", phone_number=f"+64{i}"
+            )
+            for i in range(2)
+        ]
+        users = []
+        for i in range(3):
+            user = User(username=f"referred{i}", phone_number=f"+65{i}")
+            user.set_password("p")
+            users.append(user)
+        codes = [self.referrers[0].referral_code] * 2 + [self.referrers[1].referral_code]
+        self.referred = provision_users(users, referral_codes=codes)
+
+    def _stats(self, user):
+        from .models import ReferralStats
+
+        return ReferralStats.objects.get(pk=user.pk)
+
+    def test_signups_count_referrals(self):
+        from .models import Referral
+
+        self.assertEqual(self._stats(self.referrers[0]).direct_referrals, 2)
+        self.assertEqual(self._stats(self.referrers[1]).direct_referrals, 1)
+
+        Referral.objects.filter(referred=self.referred[2]).delete()
+        self.assertEqual(self._stats(self.referrers[1]).direct_referrals, 0)
+        Referral.objects.create(referrer=self.referrers[1], referred=self.referred[2])
+        self.assertEqual(self._stats(self.referrers[1]).direct_referrals, 1)
+
+    def test_deleting_users_keeps_referral_stats_consistent(self):
+        from django.db import connection
+
+        from .models import ReferralStats
+
+        referrer_id = self.referrers[0].pk
+        self.referrers[0].delete()
+        self.assertFalse(ReferralStats.objects.filter(pk=referrer_id).exists())
+
+        self.referred[2].delete()
+        self.assertEqual(self._stats(self.referrers[1]).direct_referrals, 0)
+        connection.check_constraints()
+
+    def test_entry_fees_are_attributed_to_the_referrer(self):
+        from wallet.services import process_transaction
+
+        from .referrals import reconcile_referral_stats
+
+        for user in (self.referred[0], self.referrers[1]):
+            process_transaction(user, Decimal("100"), "deposit")
+            process_transaction(user, Decimal("30"), "entry_fee")
+        self.assertEqual(self._stats(self.referrers[0]).referred_entry_fees, Decimal("30"))
+        self.assertEqual(self._stats(self.referrers[1]).referred_entry_fees, Decimal("0"))
+
+        reconcile_referral_stats()
+        self.assertEqual(self._stats(self.referrers[0]).referred_entry_fees, Decimal("30"))
+        self.assertEqual(self._stats(self.referrers[0]).direct_referrals, 2)
+
+    def test_top_referrers_and_own_stats(self):
+        response = self.client.get("/api/users/referrals/top/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["position"], row["id"]) for row in response.data],
+            [(1, self.referrers[0].id), (2, self.referrers[1].id)],
+        )
+        response = self.client.get("/api/users/referrals/top/", {"by": "bogus"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.referrers[1])
+        response = self.client.get("/api/users/referrals/me/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["direct_referrals"], 1)
+        self.assertEqual(response.data["position"], 2)
+        self.assertEqual(response.data["referral_code"], self.referrers[1].referral_code)
@@ -0,0 +1,130 @@
+"""
+JWTs carrying the user's authorization claims.
+
+Access tokens embed the user's roles, verification level, rank and staff
+flag, so read-only endpoints can authorize a request from the token alone
+(see `users.authentication.ClaimsAuthentication`). Claims are reloaded from
+the database whenever an access token is refreshed.
+
+Refresh tokens carry the user's `token_version`. Bumping it with
+`revoke_user_tokens` invalidates every refresh token issued before, so
+outstanding sessions end once their current access token expires.
+"""
+
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import User
+from .otp import discard_codes
+
+TOKEN_VERSION_CLAIM = "ver"
+
+
+def token_claims(user):
+    """
+    Returns the authorization claims embedded in the user's access tokens.
+    """
+    try:
+        verification_level = user.verification.level
+    except User.verification.RelatedObjectDoesNotExist:
+        verification_level = None
+    return {
+        "username": user.username,
+        "roles": user.role,
+        "verification_level": verification_level,
+        "rank": user.rank_id,
+        "is_staff": user.is_staff,
+    }
+
+
+class UserAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.payload.update(token_claims(user))
+        return token
+
+
+class UserRefreshToken(RefreshToken):
+    access_token_class = UserAccessToken
+    # Claims are copied from the refresh token into each access token, so
+    # the version stays on the refresh token alone.
+    no_copy_claims = RefreshToken.no_copy_claims + (TOKEN_VERSION_CLAIM,)
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        token.payload.update(token_claims(user))
+        return token
+
+
+def issue_tokens(user):
+    """
+    Returns a fresh {"refresh", "access"} token pair for the user.
+    """
+    refresh = UserRefreshToken.for_user(user)
+    return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+
+def issue_tokens_from_claims(user_id, token_version, claims):
+    """
+    Same as `issue_tokens`, from a snapshot of the user's id, token version
+    and `token_claims` taken earlier, without touching the database.
+    """
+    refresh = UserRefreshToken()
+    refresh[api_settings.USER_ID_CLAIM] = str(user_id)
+    refresh[TOKEN_VERSION_CLAIM] = token_version
+    refresh.payload.update(claims)
+    return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+
+def revoke_user_tokens(user):
+    """
+    Invalidates every refresh token issued to the user so far, along with
+    any pending login code.
+    """
+    User.objects.filter(pk=user.pk).update(token_version=F("token_version") + 1)
+    user.refresh_from_db(fields=["token_version"])
+    discard_codes(user)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = UserRefreshToken
+
+
+class VersionedTokenRefreshSerializer(serializers.Serializer):
+    """
+    Issues a new access token with up-to-date claims, rejecting refresh
+    tokens whose version no longer matches the user's.
+    """
+
+    refresh = serializers.CharField()
+    access = serializers.CharField(read_only=True)
+
+    default_error_messages = {
+        "no_active_account": _("No active account found for the given token."),
+        "revoked": _("Token has been revoked."),
+    }
+
+    def validate(self, attrs):
+        refresh = UserRefreshToken(attrs["refresh"])
+        user = (
+            User.objects.select_related("verification")
+            .prefetch_related("groups")
+            .filter(**{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)})
+            .first()
+        )
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        if refresh.get(TOKEN_VERSION_CLAIM) != user.token_version:
+            raise InvalidToken(self.error_messages["revoked"])
+
+        return {"access": str(UserAccessToken.for_user(user))}
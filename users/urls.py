@@ -1,10 +1,11 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (AdminLoginView, DashboardView, RoleViewSet,
-                    TeamMatchHistoryView, TeamViewSet, TopPlayersByRankView,
-                    TopPlayersView, TopTeamsView, TotalPlayersView,
-                    UserMatchHistoryView, UserViewSet)
+from .views import (AdminLoginView, DashboardView, ReferralStatsView,
+                    RoleViewSet, TeamMatchHistoryView, TeamViewSet,
+                    TopPlayersByRankView, TopPlayersView, TopReferrersView,
+                    TopTeamsView, TotalPlayersView, UserMatchHistoryView,
+                    UserViewSet)
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet)
@@ -31,6 +32,8 @@ urlpatterns = [
         name="top-players-by-rank",
     ),
     path("top-teams/", TopTeamsView.as_view(), name="top-teams"),
+    path("referrals/top/", TopReferrersView.as_view(), name="top-referrers"),
+    path("referrals/me/", ReferralStatsView.as_view(), name="referral-stats"),
     path("total-players/", TotalPlayersView.as_view(), name="total-players"),
     path("auth/admin-login/", AdminLoginView.as_view(), name="admin-login"),
 ]
@@ -1,34 +1,39 @@
-from django.db import models
-from django.db.models import Count, F, Prefetch, Q, Sum
-from django.utils import timezone
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
 from tournaments.models import Participant, Tournament
 from tournaments.serializers import (TournamentListSerializer,
                                      TournamentReadOnlySerializer)
-from wallet.models import Transaction
-from wallet.serializers import TransactionSerializer
 
-from .models import Role, Team, TeamInvitation, User
+from .authentication import ClaimsAuthentication
+from .dashboard import get_dashboard
+from .profiles import MAX_BATCH_PROFILES, get_public_profile, get_public_profiles
+from .referrals import TOP_REFERRER_ORDERINGS, get_referral_stats, get_top_referrers
+from .leaderboards import get_leaderboard_page, get_leaderboard_position
+from .models import Role, Team, User
+from .otp import client_ip
 from .permissions import (IsAdminUser, IsCaptain, IsCaptainOrReadOnly,
                           IsOwnerOrReadOnly)
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from .serializers import (AdminLoginSerializer, RoleSerializer,
-                          TeamInvitationSerializer, TeamSerializer,
+from .serializers import (AdminLoginSerializer, RoleSerializer, TeamSerializer,
                           TopPlayerByRankSerializer, TopPlayerSerializer,
-                          TopTeamSerializer, UserCreateSerializer,
+                          TopReferrerSerializer, TopTeamSerializer,
+                          UserCreateSerializer,
                           UserReadOnlySerializer, UserSerializer)
 from .services import (ApplicationError, invite_member_service,
-                       leave_team_service, remove_member_service,
-                       respond_to_invitation_service, send_otp_service,
+                       invite_members_service, leave_team_service,
+                       remove_member_service, respond_to_invitation_service,
+                       send_otp_service, update_roster_service,
                        verify_otp_service)
+from .tokens import issue_tokens
 
 
 class RoleViewSet(viewsets.ModelViewSet):
@@ -60,11 +65,49 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserCreateSerializer
         if self.action in ("list", "retrieve"):
             # Use read-only serializer for lists or for retrieving other users
-            if self.action == "retrieve" and self.request.user.is_authenticated and self.get_object() == self.request.user:
+            if self.action == "retrieve" and self._is_own_profile():
                 return UserSerializer  # The user is viewing their own profile
             return UserReadOnlySerializer
         return UserSerializer  # For update, partial_update, etc.
 
+    def _is_own_profile(self):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        return self.request.user.is_authenticated and str(lookup) == str(
+            self.request.user.pk
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if self._is_own_profile():
+            return super().retrieve(request, *args, **kwargs)
+        # Other users' profiles are public: served from the profile cache.
+        try:
+            user_id = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise NotFound()
+        profile = get_public_profile(user_id, request)
+        if profile is None:
+            raise NotFound()
+        return Response(profile)
+
+    def list(self, request, *args, **kwargs):
+        ids = request.query_params.get("ids")
+        if ids is None:
+            return super().list(request, *args, **kwargs)
+        # Batch hydration: ?ids=1,2,3 returns those public profiles in order.
+        try:
+            user_ids = [int(user_id) for user_id in ids.split(",") if user_id.strip()]
+        except ValueError:
+            return Response(
+                {"error": "ids must be a comma-separated list of user IDs."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(user_ids) > MAX_BATCH_PROFILES:
+            return Response(
+                {"error": f"At most {MAX_BATCH_PROFILES} ids can be requested at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(list(get_public_profiles(user_ids, request).values()))
+
     def get_permissions(self):
         if self.action in ["create", "send_otp", "verify_otp", "list", "retrieve"]:
             return [AllowAny()]
@@ -90,7 +133,11 @@ class UserViewSet(viewsets.ModelViewSet):
         phone_number = request.data.get("phone_number")
         email = request.data.get("email")
         try:
-            send_otp_service(phone_number=phone_number, email=email)
+            send_otp_service(
+                phone_number=phone_number,
+                email=email,
+                ip_address=client_ip(request),
+            )
             return Response(
                 {"message": "OTP sent successfully."}, status=status.HTTP_200_OK
             )
@@ -130,6 +177,19 @@ class TeamViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return super().get_permissions()
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in [
+            "invite_member",
+            "invite_members",
+            "roster",
+            "leave_team",
+            "remove_member",
+        ]:
+            # Roster actions check membership with EXISTS queries instead.
+            queryset = queryset.prefetch_related(None)
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(captain=self.request.user)
 
@@ -158,6 +218,61 @@ class TeamViewSet(viewsets.ModelViewSet):
         except ApplicationError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[IsCaptain],
+        url_path="invite-members",
+    )
+    def invite_members(self, request, pk=None):
+        """
+        Invite several users at once, by id and/or username.
+        """
+        team = self.get_object()
+        user_ids = request.data.get("user_ids", [])
+        usernames = request.data.get("usernames", [])
+        if not isinstance(user_ids, list) or not isinstance(usernames, list):
+            return Response(
+                {"error": "user_ids and usernames must be lists."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            result = invite_members_service(
+                team=team,
+                from_user=request.user,
+                user_ids=user_ids,
+                usernames=usernames,
+            )
+            return Response(result, status=status.HTTP_200_OK)
+        except ApplicationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=["post"], permission_classes=[IsCaptain])
+    def roster(self, request, pk=None):
+        """
+        Invite and remove several members at once.
+        """
+        team = self.get_object()
+        invite_ids = request.data.get("invite", [])
+        remove_ids = request.data.get("remove", [])
+        if not isinstance(invite_ids, list) or not isinstance(remove_ids, list):
+            return Response(
+                {"error": "invite and remove must be lists of user IDs."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            result = update_roster_service(
+                team=team,
+                captain=request.user,
+                invite_ids=invite_ids,
+                remove_ids=remove_ids,
+            )
+            return Response(result, status=status.HTTP_200_OK)
+        except ApplicationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     @action(
         detail=False,
         methods=["post"],
@@ -226,114 +341,177 @@ class DashboardView(APIView):
     API view for user dashboard.
     """
 
+    authentication_classes = [ClaimsAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = User.objects.prefetch_related(
-            Prefetch(
-                "tournaments",
-                queryset=Tournament.objects.filter(
-                    start_date__gte=timezone.now()
-                ).order_by("start_date"),
-            ),
-            Prefetch(
-                "sent_invitations",
-                queryset=TeamInvitation.objects.filter(status="pending"),
-            ),
-            Prefetch(
-                "received_invitations",
-                queryset=TeamInvitation.objects.filter(status="pending"),
-            ),
-            Prefetch(
-                "wallet__transactions",
-                queryset=Transaction.objects.order_by("-timestamp")[:5],
-            ),
-        ).get(pk=request.user.pk)
-
-        # The data is now pre-fetched, so accessing it doesn't cause new queries.
-        upcoming_tournaments = user.tournaments.all()
-        sent_invitations = user.sent_invitations.all()
-        received_invitations = user.received_invitations.all()
-        latest_transactions = user.wallet.transactions.all()
-
-        data = {
-            "upcoming_tournaments": TournamentListSerializer(
-                upcoming_tournaments, many=True, context={"request": request}
-            ).data,
-            "sent_invitations": TeamInvitationSerializer(
-                sent_invitations, many=True
-            ).data,
-            "received_invitations": TeamInvitationSerializer(
-                received_invitations, many=True
-            ).data,
-            "latest_transactions": TransactionSerializer(
-                latest_transactions, many=True
-            ).data,
-        }
-        return Response(data)
-
-
-class TopPlayersView(APIView):
+        return Response(get_dashboard(request.user, request))
+
+
+class LeaderboardView(APIView):
     """
-    API view for getting top players by prize money.
+    Base view serving a page of a materialized leaderboard (see
+    `users.leaderboards`), plus the requesting user's own position.
+
+    Subclasses set `board` and `serializer_class` and define
+    `get_objects(ids)`, returning {member id: object} for the ids on a page.
     """
+
+    authentication_classes = [ClaimsAuthentication]
     permission_classes = [AllowAny]
+    board = None
+    serializer_class = None
+    page_size = 10
+    max_page_size = 100
+
+    def get_own_member_id(self, request):
+        return request.user.id if request.user.is_authenticated else None
 
     def get(self, request):
-        users = User.objects.annotate(
-            total_winnings=models.Sum(
-                "wallet__transactions__amount",
-                filter=models.Q(wallet__transactions__transaction_type="prize"),
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(
+                max(int(request.query_params.get("page_size", self.page_size)), 1),
+                self.max_page_size,
             )
-        ).order_by("-total_winnings")
-        serializer = TopPlayerSerializer(users, many=True)
-        return Response(serializer.data)
+        except ValueError:
+            return Response(
+                {"error": "page and page_size must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        offset = (page - 1) * page_size
+        rows, total = get_leaderboard_page(self.board, offset, page_size)
+        objects = self.get_objects([member_id for member_id, _ in rows])
+        results = []
+        for position, (member_id, _) in enumerate(rows, start=offset + 1):
+            obj = objects.get(member_id)
+            if obj is None:
+                continue
+            obj.position = position
+            results.append(obj)
+
+        url = request.build_absolute_uri()
+        own_member_id = self.get_own_member_id(request)
+        return Response(
+            {
+                "count": total,
+                "next": replace_query_param(url, "page", page + 1)
+                if offset + page_size < total
+                else None,
+                "previous": replace_query_param(url, "page", page - 1)
+                if page > 1
+                else None,
+                "my_position": get_leaderboard_position(self.board, own_member_id)
+                if own_member_id
+                else None,
+                "results": self.serializer_class(results, many=True).data,
+            }
+        )
 
 
-class TopPlayersByRankView(APIView):
+class TopPlayersView(LeaderboardView):
+    """
+    API view for getting top players by prize money.
+    """
+
+    board = "players_by_winnings"
+    serializer_class = TopPlayerSerializer
+
+    def get_objects(self, ids):
+        users = User.objects.filter(id__in=ids).select_related("stats")
+        for user in users:
+            stats = getattr(user, "stats", None)
+            user.total_winnings = stats.total_winnings if stats else 0
+        return {user.id: user for user in users}
+
+
+class TopPlayersByRankView(LeaderboardView):
     """
     API view for getting top players by rank.
+
+    Ranks are assigned by score thresholds, so ordering by score matches
+    ordering by rank.
     """
 
-    permission_classes = [AllowAny]
+    board = "players_by_score"
+    serializer_class = TopPlayerByRankSerializer
 
-    def get(self, request):
-        users = (
-            User.objects.annotate(
-                total_winnings=Sum(
-                    "wallet__transactions__amount",
-                    filter=Q(wallet__transactions__transaction_type="prize"),
-                    default=0,
-                ),
-                wins=Count("won_matches", distinct=True),
-            )
-            .order_by(F("rank__required_score").desc(nulls_last=True), "-score")
-        )
-        serializer = TopPlayerByRankSerializer(users, many=True)
-        return Response(serializer.data)
+    def get_objects(self, ids):
+        users = User.objects.filter(id__in=ids).select_related("rank", "stats")
+        for user in users:
+            stats = getattr(user, "stats", None)
+            user.total_winnings = stats.total_winnings if stats else 0
+            user.wins = stats.wins if stats else 0
+        return {user.id: user for user in users}
 
 
-class TopTeamsView(APIView):
+class TopTeamsView(LeaderboardView):
     """
     API view for getting top teams by prize money.
     """
+
+    board = "teams_by_winnings"
+    serializer_class = TopTeamSerializer
+
+    def get_own_member_id(self, request):
+        # Teams have no single "own" entry.
+        return None
+
+    def get_objects(self, ids):
+        teams = Team.objects.filter(id__in=ids).select_related("stats")
+        for team in teams:
+            stats = getattr(team, "stats", None)
+            team.total_winnings = stats.total_winnings if stats else 0
+        return {team.id: team for team in teams}
+
+
+class TopReferrersView(APIView):
+    """
+    API view for the top referrers, by direct referrals (`?by=referrals`,
+    the default) or by the entry fees their referred users paid
+    (`?by=entry_fees`).
+    """
+
     permission_classes = [AllowAny]
+    default_limit = 10
+    max_limit = 100
 
     def get(self, request):
-        teams = Team.objects.annotate(
-            total_winnings=models.Sum(
-                "members__wallet__transactions__amount",
-                filter=models.Q(members__wallet__transactions__transaction_type="prize"),
+        by = request.query_params.get("by", "referrals")
+        if by not in TOP_REFERRER_ORDERINGS:
+            return Response(
+                {"error": f"by must be one of: {', '.join(TOP_REFERRER_ORDERINGS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        ).order_by("-total_winnings")
-        serializer = TopTeamSerializer(teams, many=True)
-        return Response(serializer.data)
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+
+        referrers = get_top_referrers(by=by, limit=limit)
+        for position, stats in enumerate(referrers, start=1):
+            stats.position = position
+        return Response(TopReferrerSerializer(referrers, many=True).data)
+
+
+class ReferralStatsView(APIView):
+    """
+    API view for the requesting user's own referral stats.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_referral_stats(request.user))
 
 
-from django.db.models import Q
 from rest_framework import generics
 from tournaments.models import Match
+from tournaments.pagination import KeysetPagination
 from tournaments.serializers import MatchReadOnlySerializer
+from tournaments.stats import get_platform_stats
 
 
 class TotalPlayersView(APIView):
@@ -343,10 +521,24 @@ class TotalPlayersView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        total_players = User.objects.count()
+        total_players = get_platform_stats()["total_players"]
         return Response({"total_players": total_players})
 
 
+def match_history_queryset():
+    """
+    Matches with everything MatchReadOnlySerializer renders loaded up
+    front, so a history page costs a fixed number of queries.
+    """
+    users = ("participant1_user", "participant2_user", "winner_user")
+    teams = ("participant1_team", "participant2_team", "winner_team")
+    return Match.objects.select_related(*users, *teams).prefetch_related(
+        *(f"{user}__in_game_ids" for user in users),
+        *(f"{user}__groups" for user in users),
+        *(f"{team}__members" for team in teams),
+    )
+
+
 class UserMatchHistoryView(generics.ListAPIView):
     """
     API view to list match history for a specific user.
@@ -354,15 +546,13 @@ class UserMatchHistoryView(generics.ListAPIView):
 
     serializer_class = MatchReadOnlySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-id",)
 
     def get_queryset(self):
-        user_id = self.kwargs["pk"]
-        return Match.objects.filter(
-            Q(participant1_user__id=user_id)
-            | Q(participant2_user__id=user_id)
-            | Q(participant1_team__members__id=user_id)
-            | Q(participant2_team__members__id=user_id)
-        ).distinct()
+        return match_history_queryset().filter(
+            participations__user_id=self.kwargs["pk"]
+        )
 
 
 class TeamMatchHistoryView(generics.ListAPIView):
@@ -372,12 +562,14 @@ class TeamMatchHistoryView(generics.ListAPIView):
 
     serializer_class = MatchReadOnlySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-id",)
 
     def get_queryset(self):
-        team_id = self.kwargs["pk"]
-        return Match.objects.filter(
-            Q(participant1_team__id=team_id) | Q(participant2_team__id=team_id)
-        ).distinct()
+        return match_history_queryset().filter(
+            participations__team_id=self.kwargs["pk"],
+            participations__user__isnull=True,
+        )
 
 
 class AdminLoginView(APIView):
@@ -396,13 +588,7 @@ class AdminLoginView(APIView):
         user = authenticate(request, username=username, password=password)
         if user is not None:
             if user.is_staff:
-                refresh = RefreshToken.for_user(user)
-                return Response(
-                    {
-                        "refresh": str(refresh),
-                        "access": str(refresh.access_token),
-                    }
-                )
+                return Response(issue_tokens(user))
             else:
                 return Response(
                     {"error": "You are not authorized to login from here."},
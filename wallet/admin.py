@@ -10,7 +10,7 @@ from import_export import resources
 from django_select2.forms import Select2Widget
 
 # Local Imports
-from .models import Transaction, Wallet
+from .models import JournalEntry, LedgerAccount, Posting, Transaction, Wallet
 
 # --- Resources for django-import-export ---
 
@@ -36,6 +36,17 @@ class TransactionInline(TabularInline):
         return False
 
 
+class PostingInline(TabularInline):
+    model = Posting
+    extra = 0
+    fields = ("account", "amount")
+    readonly_fields = ("account", "amount")
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 # --- ModelAdmins (Upgraded) ---
 
 @admin.register(Wallet)
@@ -62,9 +73,45 @@ class TransactionAdmin(ImportExportModelAdmin, SimpleHistoryAdmin, ModelAdmin):
     resource_class = TransactionResource
     list_display = ("wallet", "amount", "transaction_type", "timestamp")
     list_filter = ("transaction_type", "timestamp")
-    search_fields = ("wallet__user__username", "description")
+    search_fields = ("wallet__user__username", "description", "idempotency_key")
     autocomplete_fields = ("wallet",)
-    readonly_fields = ("wallet", "amount", "transaction_type", "timestamp", "description")
+    readonly_fields = (
+        "wallet",
+        "amount",
+        "transaction_type",
+        "timestamp",
+        "description",
+        "idempotency_key",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LedgerAccount)
+class LedgerAccountAdmin(ModelAdmin):
+    list_display = ("code", "kind", "user", "tournament")
+    list_filter = ("kind",)
+    search_fields = ("code", "user__username", "tournament__name")
+    readonly_fields = ("code", "kind", "user", "tournament")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(JournalEntry)
+class JournalEntryAdmin(ModelAdmin):
+    list_display = ("id", "entry_type", "tournament", "created_at")
+    list_filter = ("entry_type", "created_at")
+    search_fields = ("description", "postings__account__code")
+    readonly_fields = ("entry_type", "description", "tournament", "transaction", "created_at")
+    inlines = [PostingInline]
 
     def has_add_permission(self, request):
         return False
@@ -0,0 +1,66 @@
+"""
+Idempotency keys for wallet operations.
+
+A Transaction may carry an `idempotency_key`, unique across transactions,
+so a retried join, prize payout or payment callback gets back the
+transaction its first attempt created instead of moving money twice. Keys
+of committed transactions are also kept in Redis for
+IDEMPOTENCY_KEY_TTL_SECONDS, which answers most retries before a wallet row
+is locked; the unique constraint remains the source of truth.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from rest_framework.exceptions import ValidationError
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_CLIENT_KEY_LENGTH = 64
+
+
+def _redis_key(key):
+    return f"wallet:idempotency:{key}"
+
+
+def cached_transaction_ids(keys):
+    """
+    Returns {key: transaction id} for the given keys known to Redis, in one
+    round trip.
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    client = get_redis_connection("default")
+    values = client.mget([_redis_key(key) for key in keys])
+    return {key: int(value) for key, value in zip(keys, values) if value is not None}
+
+
+def remember_transactions(transaction_ids):
+    """
+    Caches {key: transaction id} once the surrounding transaction commits.
+    """
+    if not transaction_ids:
+        return
+
+    def _apply():
+        client = get_redis_connection("default")
+        pipe = client.pipeline()
+        for key, transaction_id in transaction_ids.items():
+            pipe.set(
+                _redis_key(key), transaction_id, ex=settings.IDEMPOTENCY_KEY_TTL_SECONDS
+            )
+        pipe.execute()
+
+    transaction.on_commit(_apply)
+
+
+def idempotency_key_from(request):
+    """
+    Returns the client's Idempotency-Key header, if any.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER, "").strip()
+    if len(key) > MAX_CLIENT_KEY_LENGTH:
+        raise ValidationError(
+            {"idempotency_key": f"Must be at most {MAX_CLIENT_KEY_LENGTH} characters."}
+        )
+    return key or None
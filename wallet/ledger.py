@@ -0,0 +1,226 @@
+"""
+Double-entry ledger.
+
+Every movement of funds is a `JournalEntry` whose `Posting` rows sum to
+zero across `LedgerAccount`s: one per user (mirroring `Wallet.total_balance`),
+one prize pool per paid tournament, and platform accounts that money enters
+and leaves through ("platform:external") or that opening balances are booked
+against ("platform:opening"). Posting entries is always two INSERTs, however
+many entries and accounts there are.
+
+`take_balance_snapshots` periodically records the balance of every account
+that moved since the previous run, up to a posting id cutoff. An account's
+balance at any time is then its latest snapshot taken by that time plus the
+postings after the snapshot's cutoff, which the (account, id) index bounds
+to one snapshot period.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import BalanceSnapshot, JournalEntry, LedgerAccount, Posting, Wallet
+
+EXTERNAL_ACCOUNT = "platform:external"
+OPENING_ACCOUNT = "platform:opening"
+
+
+class UnbalancedEntry(ValueError):
+    pass
+
+
+def user_account_code(user_id):
+    return f"user:{user_id}"
+
+
+def prize_pool_account_code(tournament_id):
+    return f"prize_pool:{tournament_id}"
+
+
+def _new_account(code):
+    kind, _, ref = code.partition(":")
+    account = LedgerAccount(kind=kind, code=code)
+    if kind == "user":
+        account.user_id = int(ref)
+    elif kind == "prize_pool":
+        account.tournament_id = int(ref)
+    return account
+
+
+def get_accounts(codes):
+    """
+    Returns {code: LedgerAccount} for the given codes, opening the missing
+    accounts. One query when they all exist, three otherwise.
+    """
+    codes = set(codes)
+    accounts = {a.code: a for a in LedgerAccount.objects.filter(code__in=codes)}
+    missing = codes - accounts.keys()
+    if missing:
+        LedgerAccount.objects.bulk_create(
+            [_new_account(code) for code in missing], ignore_conflicts=True
+        )
+        accounts.update(
+            (a.code, a) for a in LedgerAccount.objects.filter(code__in=missing)
+        )
+    return accounts
+
+
+def post_entry(entry_type, postings, description="", tournament=None, txn=None):
+    """
+    Books a journal entry with `postings`, a list of (account code, signed
+    amount) pairs that must sum to zero, and returns it.
+    """
+    return post_entries(
+        [
+            {
+                "entry_type": entry_type,
+                "postings": postings,
+                "description": description,
+                "tournament": tournament,
+                "txn": txn,
+            }
+        ]
+    )[0]
+
+
+def post_entries(entries):
+    """
+    Books several journal entries, given as dicts of `post_entry`'s
+    arguments, with the same two INSERTs as a single one.
+    """
+    for entry in entries:
+        if sum((amount for _, amount in entry["postings"]), Decimal("0")) != 0:
+            raise UnbalancedEntry("Journal entry postings must sum to zero.")
+
+    accounts = get_accounts(
+        code for entry in entries for code, _ in entry["postings"]
+    )
+    with transaction.atomic():
+        journal = JournalEntry.objects.bulk_create(
+            [
+                JournalEntry(
+                    entry_type=entry["entry_type"],
+                    description=entry.get("description", ""),
+                    tournament=entry.get("tournament"),
+                    transaction=entry.get("txn"),
+                )
+                for entry in entries
+            ]
+        )
+        Posting.objects.bulk_create(
+            Posting(
+                entry=journal_entry,
+                account=accounts[code],
+                amount=amount,
+                created_at=journal_entry.created_at,
+            )
+            for journal_entry, entry in zip(journal, entries)
+            for code, amount in entry["postings"]
+        )
+    return journal
+
+
+def account_balance(account, at=None):
+    """
+    Returns the balance of `account` as of `at` (default: now) from its
+    latest snapshot taken by then plus the postings made after it.
+    """
+    snapshots = BalanceSnapshot.objects.filter(account=account)
+    postings = Posting.objects.filter(account=account)
+    if at is not None:
+        snapshots = snapshots.filter(taken_at__lte=at)
+        postings = postings.filter(created_at__lte=at)
+
+    snapshot = snapshots.order_by("-last_posting_id").first()
+    balance = Decimal("0")
+    if snapshot is not None:
+        balance = snapshot.balance
+        postings = postings.filter(pk__gt=snapshot.last_posting_id)
+    delta = postings.aggregate(total=Sum("amount"))["total"]
+    return balance + (delta or 0)
+
+
+def user_balance(user, at=None):
+    account = LedgerAccount.objects.filter(code=user_account_code(user.pk)).first()
+    if account is None:
+        return Decimal("0")
+    return account_balance(account, at)
+
+
+def take_balance_snapshots():
+    """
+    Snapshots every account with postings since the previous run, up to the
+    last posting older than LEDGER_SNAPSHOT_LAG_SECONDS, so entries still
+    being committed are left for the next run. Returns how many snapshots
+    were written.
+    """
+    as_of = timezone.now() - timedelta(seconds=settings.LEDGER_SNAPSHOT_LAG_SECONDS)
+    cutoff = Posting.objects.filter(created_at__lte=as_of).aggregate(
+        cutoff=Max("pk")
+    )["cutoff"]
+    previous = BalanceSnapshot.objects.aggregate(cutoff=Max("last_posting_id"))[
+        "cutoff"
+    ] or 0
+    if cutoff is None or cutoff <= previous:
+        return 0
+
+    deltas = dict(
+        Posting.objects.filter(pk__gt=previous, pk__lte=cutoff)
+        .values("account_id")
+        .annotate(total=Sum("amount"))
+        .values_list("account_id", "total")
+    )
+    latest = (
+        BalanceSnapshot.objects.filter(account=OuterRef("pk"))
+        .order_by("-last_posting_id")
+        .values("balance")[:1]
+    )
+    opening = dict(
+        LedgerAccount.objects.filter(pk__in=deltas)
+        .annotate(balance=Subquery(latest))
+        .values_list("pk", "balance")
+    )
+    BalanceSnapshot.objects.bulk_create(
+        [
+            BalanceSnapshot(
+                account_id=account_id,
+                balance=(opening.get(account_id) or 0) + delta,
+                last_posting_id=cutoff,
+                taken_at=as_of,
+            )
+            for account_id, delta in deltas.items()
+        ],
+        batch_size=1000,
+    )
+    return len(deltas)
+
+
+def open_wallet_balances():
+    """
+    Books an "opening" entry against the platform for every wallet whose
+    total balance differs from its ledger balance, e.g. after balances were
+    written in bulk. Returns how many wallets were adjusted.
+    """
+    ledger = dict(
+        Posting.objects.filter(account__kind="user")
+        .values("account__user_id")
+        .annotate(total=Sum("amount"))
+        .values_list("account__user_id", "total")
+    )
+    adjustments = []
+    for user_id, total_balance in Wallet.objects.values_list("user_id", "total_balance"):
+        difference = total_balance - (ledger.get(user_id) or 0)
+        if difference:
+            adjustments.append((user_account_code(user_id), difference))
+    if adjustments:
+        opening = -sum((amount for _, amount in adjustments), Decimal("0"))
+        post_entry(
+            "opening",
+            adjustments + [(OPENING_ACCOUNT, opening)],
+            description="Opening wallet balances",
+        )
+    return len(adjustments)
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0002_transaction_description_alter_transaction_wallet"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["wallet", "timestamp", "id"], name="transaction_wallet_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["transaction_type", "timestamp"],
+                name="transaction_type_time_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,224 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_wallet_balances(apps, schema_editor):
+    """
+    Books every existing wallet's total balance against the platform's
+    opening account, so ledger balances start equal to wallet balances.
+    """
+    Wallet = apps.get_model("wallet", "Wallet")
+    LedgerAccount = apps.get_model("wallet", "LedgerAccount")
+    JournalEntry = apps.get_model("wallet", "JournalEntry")
+    Posting = apps.get_model("wallet", "Posting")
+
+    balances = list(
+        Wallet.objects.exclude(total_balance=0).values_list("user_id", "total_balance")
+    )
+    if not balances:
+        return
+    LedgerAccount.objects.bulk_create(
+        [
+            LedgerAccount(kind="user", code=f"user:{user_id}", user_id=user_id)
+            for user_id, _ in balances
+        ]
+        + [LedgerAccount(kind="platform", code="platform:opening")],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    accounts = dict(LedgerAccount.objects.values_list("code", "pk"))
+    entry = JournalEntry.objects.create(
+        entry_type="opening", description="Opening wallet balances"
+    )
+    postings = [
+        Posting(
+            entry=entry,
+            account_id=accounts[f"user:{user_id}"],
+            amount=balance,
+            created_at=entry.created_at,
+        )
+        for user_id, balance in balances
+    ]
+    postings.append(
+        Posting(
+            entry=entry,
+            account_id=accounts["platform:opening"],
+            amount=-sum(balance for _, balance in balances),
+            created_at=entry.created_at,
+        )
+    )
+    Posting.objects.bulk_create(postings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0024_match_participation"),
+        ("wallet", "0003_hot_query_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JournalEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("entry_type", models.CharField(max_length=20)),
+                ("description", models.CharField(blank=True, max_length=255)),
+                (
+                    "tournament",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="journal_entries",
+                        to="tournaments.tournament",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="journal_entry",
+                        to="wallet.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "journal entries",
+            },
+        ),
+        migrations.CreateModel(
+            name="LedgerAccount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("user", "User"),
+                            ("platform", "Platform"),
+                            ("prize_pool", "Prize Pool"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("code", models.CharField(max_length=64, unique=True)),
+                (
+                    "tournament",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="prize_pool_account",
+                        to="tournaments.tournament",
+                    ),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_account",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="BalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("balance", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("last_posting_id", models.BigIntegerField()),
+                ("taken_at", models.DateTimeField()),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="wallet.ledgeraccount",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["account", "-last_posting_id"],
+                        name="snapshot_account_latest_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="Posting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="postings",
+                        to="wallet.ledgeraccount",
+                    ),
+                ),
+                (
+                    "entry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="postings",
+                        to="wallet.journalentry",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["account", "id"], name="posting_account_id_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(open_wallet_balances, migrations.RunPython.noop),
+    ]
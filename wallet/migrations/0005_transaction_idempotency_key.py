@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0004_double_entry_ledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255, null=True, unique=True
+            ),
+        ),
+    ]
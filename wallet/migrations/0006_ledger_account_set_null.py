@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournaments", "0024_match_participation"),
+        ("wallet", "0005_transaction_idempotency_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ledgeraccount",
+            name="tournament",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="prize_pool_account",
+                to="tournaments.tournament",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ledgeraccount",
+            name="user",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="ledger_account",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -31,9 +31,132 @@ class Transaction(models.Model):
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPE_CHOICES)
     timestamp = models.DateTimeField(auto_now_add=True)
     description = models.CharField(max_length=255, blank=True)
+    # Set by callers that may retry (see `wallet.idempotency`).
+    idempotency_key = models.CharField(
+        max_length=255, null=True, blank=True, unique=True, editable=False
+    )
 
     def __str__(self):
         return f"{self.wallet.user.username} - {self.transaction_type} - {self.amount}"
 
     class Meta:
         app_label = "wallet"
+        indexes = [
+            models.Index(fields=["wallet", "timestamp", "id"], name="transaction_wallet_time_idx"),
+            models.Index(fields=["transaction_type", "timestamp"], name="transaction_type_time_idx"),
+        ]
+
+
+class LedgerAccount(models.Model):
+    """
+    An account in the double-entry ledger (see `wallet.ledger`). Every user
+    has one, mirroring their wallet's total balance; the platform has an
+    external account that funds enter and leave through, and every paid
+    tournament has a prize pool that collects its entry fees.
+    """
+
+    KIND_CHOICES = (
+        ("user", "User"),
+        ("platform", "Platform"),
+        ("prize_pool", "Prize Pool"),
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # "user:<id>", "prize_pool:<tournament id>" or "platform:<name>"; kept
+    # when the user or tournament is deleted, so their history stays readable.
+    code = models.CharField(max_length=64, unique=True)
+    user = models.OneToOneField(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ledger_account",
+    )
+    tournament = models.OneToOneField(
+        "tournaments.Tournament",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="prize_pool_account",
+    )
+
+    class Meta:
+        app_label = "wallet"
+
+    def __str__(self):
+        return self.code
+
+
+class JournalEntry(models.Model):
+    """
+    One balanced movement of funds: its postings sum to zero.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    entry_type = models.CharField(max_length=20)
+    description = models.CharField(max_length=255, blank=True)
+    tournament = models.ForeignKey(
+        "tournaments.Tournament",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="journal_entries",
+    )
+    # The single-sided wallet log row this entry was posted for, if any.
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="journal_entry",
+    )
+
+    class Meta:
+        app_label = "wallet"
+        verbose_name_plural = "journal entries"
+
+    def __str__(self):
+        return f"{self.entry_type} #{self.pk}"
+
+
+class Posting(models.Model):
+    """
+    A signed amount booked to one account by a journal entry; positive
+    amounts increase the account's balance.
+    """
+
+    entry = models.ForeignKey(
+        JournalEntry, on_delete=models.PROTECT, related_name="postings"
+    )
+    account = models.ForeignKey(
+        LedgerAccount, on_delete=models.PROTECT, related_name="postings"
+    )
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    # Copied from the entry so balance-at-time scans need no join.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        app_label = "wallet"
+        indexes = [
+            models.Index(fields=["account", "id"], name="posting_account_id_idx"),
+        ]
+
+
+class BalanceSnapshot(models.Model):
+    """
+    An account's balance including every posting up to `last_posting_id`.
+    """
+
+    account = models.ForeignKey(
+        LedgerAccount, on_delete=models.CASCADE, related_name="snapshots"
+    )
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    last_posting_id = models.BigIntegerField()
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        app_label = "wallet"
+        indexes = [
+            models.Index(
+                fields=["account", "-last_posting_id"], name="snapshot_account_latest_idx"
+            ),
+        ]
@@ -1,7 +1,24 @@
+from decimal import Decimal
+
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from zarinpal import ZarinPal
 from zarinpal.models import RequestInput, VerifyInput
 
+from tournaments.stats import adjust_platform_stat
+from users.leaderboards import record_prize, record_prizes
+from users.referrals import record_referred_entry_fee, record_referred_entry_fees
+
+from .idempotency import cached_transaction_ids, remember_transactions
+from .ledger import (
+    EXTERNAL_ACCOUNT,
+    post_entries,
+    post_entry,
+    prize_pool_account_code,
+    user_account_code,
+)
+from .models import Transaction, Wallet
+
 
 class ZarinpalService:
     def __init__(self):
@@ -41,12 +58,95 @@ class ZarinpalService:
         return self.zarinpal.get_payment_link(authority)
 
 
-from django.db import transaction
-from .models import Wallet, Transaction
-from decimal import Decimal
+BATCH_ABORTED = "Not applied: another transaction in the batch failed."
+KEY_ALREADY_USED = "This idempotency key was already used for another wallet."
+
+
+def _replay(user, existing):
+    """
+    Answers a retried transaction with the one its first attempt created.
+    """
+    if existing.wallet.user_id != user.pk:
+        return None, KEY_ALREADY_USED
+    return existing, None
+
+
+def _transactions_by_key(keys, cached_only=False):
+    """
+    Returns {key: Transaction} for the keys already used, looking them up
+    in Redis only, or in the database when `cached_only` is False.
+    """
+    keys = [key for key in keys if key]
+    if not keys:
+        return {}
+    if cached_only:
+        ids = cached_transaction_ids(keys)
+        if not ids:
+            return {}
+        found = Transaction.objects.select_related("wallet").in_bulk(ids.values())
+        return {key: found[pk] for key, pk in ids.items() if pk in found}
+    return {
+        txn.idempotency_key: txn
+        for txn in Transaction.objects.select_related("wallet").filter(
+            idempotency_key__in=keys
+        )
+    }
+
+
+def _validate(amount, transaction_type):
+    if amount <= 0:
+        return "Transaction amount must be positive."
+    if transaction_type not in [t[0] for t in Transaction.TRANSACTION_TYPE_CHOICES]:
+        return f"Invalid transaction type: {transaction_type}"
+    return None
+
+
+def _apply_to_wallet(wallet, amount, transaction_type):
+    """
+    Applies a transaction to the in-memory wallet balances, or returns why
+    it cannot be applied.
+    """
+    is_debit = transaction_type in ["withdrawal", "entry_fee"]
+
+    if is_debit:
+        # Check for sufficient funds
+        if wallet.withdrawable_balance < amount:
+            return "Insufficient withdrawable balance."
+        if wallet.total_balance < amount:
+            return "Insufficient total balance."
+
+        # Apply debit
+        wallet.total_balance -= amount
+        wallet.withdrawable_balance -= amount
+    else: # Credit
+        # Apply credit
+        wallet.total_balance += amount
+        if transaction_type in ["deposit", "prize"]:
+            wallet.withdrawable_balance += amount
+    return None
+
+
+def _ledger_postings(user, amount, transaction_type, tournament):
+    """
+    Returns the balanced postings for a wallet transaction. Entry fees,
+    prizes and refunds for a tournament move funds to and from its prize
+    pool; everything else goes through the platform's external account.
+    """
+    counterparty = EXTERNAL_ACCOUNT
+    if tournament is not None and transaction_type != "withdrawal":
+        counterparty = prize_pool_account_code(tournament.pk)
+    if transaction_type in ["withdrawal", "entry_fee"]:
+        amount = -amount
+    return [(user_account_code(user.pk), amount), (counterparty, -amount)]
+
 
 def process_transaction(
-    user, amount: Decimal, transaction_type: str, description: str = ""
+    user,
+    amount: Decimal,
+    transaction_type: str,
+    description: str = "",
+    tournament=None,
+    idempotency_key: str = None,
 ) -> (Transaction, str):
     """
     Safely processes a transaction by creating a Transaction object and updating
@@ -57,38 +157,36 @@ def process_transaction(
         amount: The amount for the transaction (should be positive).
         transaction_type: One of the choices from Transaction.TRANSACTION_TYPE_CHOICES.
         description: An optional description for the transaction.
+        tournament: The tournament an entry fee, prize or refund belongs to,
+            whose prize pool is the other side of the ledger entry.
+        idempotency_key: An optional key identifying the operation. Repeating
+            a key returns the transaction created the first time instead of
+            processing it again.
 
     Returns:
         A tuple of (Transaction, None) on success, or (None, "Error message") on failure.
     """
-    if amount <= 0:
-        return None, "Transaction amount must be positive."
+    error = _validate(amount, transaction_type)
+    if error:
+        return None, error
 
-    if transaction_type not in [t[0] for t in Transaction.TRANSACTION_TYPE_CHOICES]:
-        return None, f"Invalid transaction type: {transaction_type}"
+    # Answer most retries from Redis, before the wallet is locked.
+    existing = _transactions_by_key([idempotency_key], cached_only=True)
+    if existing:
+        return _replay(user, existing[idempotency_key])
 
     try:
         with transaction.atomic():
             # Lock the wallet row to prevent race conditions
             wallet = Wallet.objects.select_for_update().get(user=user)
 
-            is_debit = transaction_type in ["withdrawal", "entry_fee"]
-
-            if is_debit:
-                # Check for sufficient funds
-                if wallet.withdrawable_balance < amount:
-                    return None, "Insufficient withdrawable balance."
-                if wallet.total_balance < amount:
-                    return None, "Insufficient total balance."
+            existing = _transactions_by_key([idempotency_key])
+            if existing:
+                return _replay(user, existing[idempotency_key])
 
-                # Apply debit
-                wallet.total_balance -= amount
-                wallet.withdrawable_balance -= amount
-            else: # Credit
-                # Apply credit
-                wallet.total_balance += amount
-                if transaction_type in ["deposit", "prize"]:
-                    wallet.withdrawable_balance += amount
+            error = _apply_to_wallet(wallet, amount, transaction_type)
+            if error:
+                return None, error
 
             # Create the transaction record for audit purposes
             new_transaction = Transaction.objects.create(
@@ -96,15 +194,245 @@ def process_transaction(
                 amount=amount,
                 transaction_type=transaction_type,
                 description=description,
+                idempotency_key=idempotency_key,
             )
 
             # Save the updated wallet balance
             wallet.save()
 
+            post_entry(
+                transaction_type,
+                _ledger_postings(user, amount, transaction_type, tournament),
+                description=description,
+                tournament=tournament,
+                txn=new_transaction,
+            )
+
+            if transaction_type == "prize":
+                adjust_platform_stat("total_prize_money", amount)
+                record_prize(user, amount)
+            elif transaction_type == "entry_fee":
+                record_referred_entry_fee(user, amount)
+
+            if idempotency_key:
+                remember_transactions({idempotency_key: new_transaction.pk})
             return new_transaction, None
 
     except Wallet.DoesNotExist:
         return None, "User wallet not found."
+    except IntegrityError as e:
+        # A concurrent attempt with the same key committed first.
+        existing = _transactions_by_key([idempotency_key])
+        if existing:
+            return _replay(user, existing[idempotency_key])
+        return None, str(e)
     except Exception as e:
         # Catch any other unexpected errors
         return None, str(e)
+
+
+def process_transactions_bulk(items, all_or_nothing=True):
+    """
+    Processes many transactions at once: every affected wallet is locked in
+    id order with one SELECT ... FOR UPDATE, the items are validated against
+    the locked balances in memory, and the results are written with one
+    bulk update of the wallets, one bulk insert of Transaction rows and one
+    journal posting.
+
+    Args:
+        items: Dicts of `process_transaction` keyword arguments ("user",
+            "amount", "transaction_type", and optionally "description",
+            "tournament" and "idempotency_key"). Several items may target
+            the same wallet; they are applied in order. Items whose key was
+            already used return the existing transaction.
+        all_or_nothing: When True, a single failing item leaves every wallet
+            untouched and the other items report BATCH_ABORTED. When False,
+            the valid items are applied and only the failing ones report
+            their error.
+
+    Returns:
+        A list of (Transaction, None) or (None, "Error message") tuples in
+        the order of `items`.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    keys = {}
+    for index, item in enumerate(items):
+        error = _validate(item["amount"], item["transaction_type"])
+        key = item.get("idempotency_key")
+        if not error and key in keys.values():
+            error = "Duplicate idempotency key in batch."
+        if error:
+            results[index] = (None, error)
+        elif key:
+            keys[index] = key
+    replayed = set()
+
+    def _replay_known(existing):
+        for index, key in keys.items():
+            if results[index] is None and key in existing:
+                results[index] = _replay(items[index]["user"], existing[key])
+                replayed.add(index)
+
+    def _failed():
+        return any(
+            result is not None and result[0] is None for result in results
+        )
+
+    def _abort(error):
+        return [
+            result
+            if result is not None and (result[0] is None or index in replayed)
+            else (None, error)
+            for index, result in enumerate(results)
+        ]
+
+    # Answer retried items from Redis, before any wallet is locked.
+    _replay_known(_transactions_by_key(keys.values(), cached_only=True))
+    if all_or_nothing and _failed():
+        return _abort(BATCH_ABORTED)
+
+    try:
+        with transaction.atomic():
+            _replay_known(
+                _transactions_by_key(
+                    key for index, key in keys.items() if results[index] is None
+                )
+            )
+            if all_or_nothing and _failed():
+                return _abort(BATCH_ABORTED)
+            user_ids = {
+                item["user"].pk
+                for index, item in enumerate(items)
+                if results[index] is None
+            }
+            wallets = {
+                wallet.user_id: wallet
+                for wallet in Wallet.objects.select_for_update()
+                .filter(user_id__in=user_ids)
+                .order_by("pk")
+            }
+
+            applied = []
+            for index, item in enumerate(items):
+                if results[index] is not None:
+                    continue
+                wallet = wallets.get(item["user"].pk)
+                if wallet is None:
+                    error = "User wallet not found."
+                else:
+                    error = _apply_to_wallet(
+                        wallet, item["amount"], item["transaction_type"]
+                    )
+                if error:
+                    results[index] = (None, error)
+                    if all_or_nothing:
+                        return _abort(BATCH_ABORTED)
+                else:
+                    applied.append(index)
+            if not applied:
+                return results
+
+            new_transactions = Transaction.objects.bulk_create(
+                [
+                    Transaction(
+                        wallet=wallets[items[index]["user"].pk],
+                        amount=items[index]["amount"],
+                        transaction_type=items[index]["transaction_type"],
+                        description=items[index].get("description", ""),
+                        idempotency_key=items[index].get("idempotency_key"),
+                    )
+                    for index in applied
+                ]
+            )
+            touched = {items[index]["user"].pk for index in applied}
+            Wallet.objects.bulk_update(
+                [wallets[user_id] for user_id in touched],
+                ["total_balance", "withdrawable_balance"],
+            )
+            post_entries(
+                [
+                    {
+                        "entry_type": item["transaction_type"],
+                        "postings": _ledger_postings(
+                            item["user"],
+                            item["amount"],
+                            item["transaction_type"],
+                            item.get("tournament"),
+                        ),
+                        "description": item.get("description", ""),
+                        "tournament": item.get("tournament"),
+                        "txn": new_transaction,
+                    }
+                    for item, new_transaction in zip(
+                        (items[index] for index in applied), new_transactions
+                    )
+                ]
+            )
+
+            prizes, entry_fees = {}, {}
+            for index, new_transaction in zip(applied, new_transactions):
+                user_id = items[index]["user"].pk
+                if new_transaction.transaction_type == "prize":
+                    prizes[user_id] = prizes.get(user_id, 0) + new_transaction.amount
+                elif new_transaction.transaction_type == "entry_fee":
+                    entry_fees[user_id] = (
+                        entry_fees.get(user_id, 0) + new_transaction.amount
+                    )
+                results[index] = (new_transaction, None)
+            if prizes:
+                adjust_platform_stat("total_prize_money", sum(prizes.values()))
+                record_prizes(prizes)
+            if entry_fees:
+                record_referred_entry_fees(entry_fees)
+
+            # Bulk inserts skip the Transaction post_save signal.
+            from users.dashboard import invalidate_dashboards
+
+            invalidate_dashboards(touched)
+            remember_transactions(
+                {
+                    new_transaction.idempotency_key: new_transaction.pk
+                    for new_transaction in new_transactions
+                    if new_transaction.idempotency_key
+                }
+            )
+            return results
+
+    except Exception as e:
+        return _abort(str(e))
+
+
+def verify_deposit(user, amount: int, authority: str) -> (Transaction, str):
+    """
+    Verifies a Zarinpal payment and credits it to the user's wallet exactly
+    once, however often the payment callback is repeated: the authority is
+    the deposit's idempotency key, and a known authority is answered without
+    calling the gateway again.
+
+    `amount` must come from the payment request the server created, never
+    from the callback itself.
+
+    Returns:
+        A tuple of (Transaction, None) on success, or (None, "Error message") on failure.
+    """
+    idempotency_key = f"zarinpal:{authority}"
+    existing = _transactions_by_key([idempotency_key], cached_only=True)
+    if not existing:
+        existing = _transactions_by_key([idempotency_key])
+    if existing:
+        return _replay(user, existing[idempotency_key])
+
+    response = ZarinpalService().verify_payment(amount, authority)
+    data = response.get("data") or {}
+    # 101 means the payment was already verified by an earlier callback.
+    if data.get("code") not in (100, 101):
+        return None, response.get("error") or data.get("message") or "Payment verification failed."
+
+    return process_transaction(
+        user=user,
+        amount=Decimal(amount),
+        transaction_type="deposit",
+        description=f"Zarinpal payment {data.get('ref_id')}",
+        idempotency_key=idempotency_key,
+    )
@@ -1,13 +1,3 @@
-from django.db.models import F
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-
-from notifications.tasks import send_email_notification, send_sms_notification
-from users.models import User
-
-from .models import Transaction, Wallet
-
-
 # @receiver(post_save, sender=Transaction)
 # def transaction_post_save(sender, instance, created, **kwargs):
 #     """
@@ -40,8 +30,6 @@ from .models import Transaction, Wallet
 #         if user.phone_number:
 #             send_sms_notification.delay(str(user.phone_number), context)
 
-
-@receiver(post_save, sender=User)
-def create_user_wallet(sender, instance, created, **kwargs):
-    if created:
-        Wallet.objects.create(user=instance)
+# Wallets for new users are created by `users.services.provision_users`
+# (and its post_save fallback in `users.signals`), alongside the rest of
+# the account.
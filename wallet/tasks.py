@@ -0,0 +1,17 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def take_balance_snapshots_task():
+    """
+    Hourly task that snapshots the balance of every ledger account that
+    moved since the previous run.
+    """
+    from .ledger import take_balance_snapshots
+
+    count = take_balance_snapshots()
+    logger.info("Took %d ledger balance snapshots.", count)
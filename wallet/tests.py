@@ -2,11 +2,29 @@ from decimal import Decimal
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_redis import get_redis_connection
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
-from .models import Transaction, Wallet
+from tournaments.models import Game, Tournament
+
+from .ledger import (
+    EXTERNAL_ACCOUNT,
+    UnbalancedEntry,
+    account_balance,
+    get_accounts,
+    open_wallet_balances,
+    post_entry,
+    prize_pool_account_code,
+    take_balance_snapshots,
+    user_account_code,
+    user_balance,
+)
+from .models import BalanceSnapshot, Posting, Transaction, Wallet
 
 User = get_user_model()
 
@@ -28,7 +46,13 @@ class WalletSignalTests(TestCase):
         self.assertEqual(user.wallet.total_balance, 0)
 
 
-from .services import process_transaction
+from .services import (
+    BATCH_ABORTED,
+    KEY_ALREADY_USED,
+    process_transaction,
+    process_transactions_bulk,
+    verify_deposit,
+)
 
 
 class WalletServiceTests(TestCase):
@@ -131,6 +155,303 @@ class WalletServiceTests(TestCase):
         self.assertEqual(self.wallet.withdrawable_balance, Decimal("85.00"))
 
 
+@override_settings(LEDGER_SNAPSHOT_LAG_SECONDS=0)
+class LedgerTests(TestCase):
+    """Tests for the double-entry ledger behind wallet transactions."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="ledgeruser", password="password", phone_number="+1234567891"
+        )
+        Wallet.objects.filter(user=self.user).update(
+            total_balance=Decimal("100.00"), withdrawable_balance=Decimal("100.00")
+        )
+        open_wallet_balances()
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name="Paid Cup",
+            game=Game.objects.create(name="Ledger Game"),
+            start_date=now,
+            end_date=now + timezone.timedelta(days=1),
+            entry_fee=Decimal("30.00"),
+            is_free=False,
+        )
+
+    def _wallet_total(self):
+        return Wallet.objects.get(user=self.user).total_balance
+
+    def test_transactions_post_balanced_entries(self):
+        process_transaction(self.user, Decimal("50.00"), "deposit")
+        process_transaction(
+            self.user, Decimal("30.00"), "entry_fee", tournament=self.tournament
+        )
+        process_transaction(
+            self.user, Decimal("80.00"), "prize", tournament=self.tournament
+        )
+        txn, _ = process_transaction(self.user, Decimal("20.00"), "withdrawal")
+
+        self.assertEqual(txn.journal_entry.postings.count(), 2)
+        self.assertEqual(sum(Posting.objects.values_list("amount", flat=True)), 0)
+        self.assertEqual(user_balance(self.user), self._wallet_total())
+        accounts = get_accounts(
+            [prize_pool_account_code(self.tournament.pk), EXTERNAL_ACCOUNT]
+        )
+        pool = accounts[prize_pool_account_code(self.tournament.pk)]
+        self.assertEqual(account_balance(pool), Decimal("-50.00"))
+        self.assertEqual(
+            account_balance(accounts[EXTERNAL_ACCOUNT]), Decimal("-30.00")
+        )
+
+    def test_failed_transaction_posts_nothing(self):
+        postings = Posting.objects.count()
+        _, error = process_transaction(self.user, Decimal("500.00"), "withdrawal")
+        self.assertIsNotNone(error)
+        self.assertEqual(Posting.objects.count(), postings)
+
+    def test_balance_is_snapshot_plus_delta(self):
+        process_transaction(self.user, Decimal("50.00"), "deposit")
+        # The user, the opening account and the external account.
+        self.assertEqual(take_balance_snapshots(), 3)
+        process_transaction(
+            self.user, Decimal("30.00"), "entry_fee", tournament=self.tournament
+        )
+
+        snapshot = BalanceSnapshot.objects.get(
+            account__code=user_account_code(self.user.pk)
+        )
+        self.assertEqual(snapshot.balance, Decimal("150.00"))
+        account = snapshot.account
+        with self.assertNumQueries(2):
+            self.assertEqual(account_balance(account), Decimal("120.00"))
+        self.assertEqual(self._wallet_total(), Decimal("120.00"))
+
+        # Only the accounts that moved since the last run are snapshotted.
+        self.assertEqual(take_balance_snapshots(), 2)
+        self.assertEqual(take_balance_snapshots(), 0)
+        self.assertEqual(account_balance(account), Decimal("120.00"))
+
+    def test_balance_at_past_time(self):
+        process_transaction(self.user, Decimal("50.00"), "deposit")
+        take_balance_snapshots()
+        before_fee = timezone.now()
+        process_transaction(
+            self.user, Decimal("30.00"), "entry_fee", tournament=self.tournament
+        )
+        take_balance_snapshots()
+        process_transaction(self.user, Decimal("5.00"), "deposit")
+
+        self.assertEqual(user_balance(self.user, at=before_fee), Decimal("150.00"))
+        self.assertEqual(user_balance(self.user), Decimal("125.00"))
+
+    def test_posting_is_a_constant_number_of_writes(self):
+        users = [
+            User.objects.create_user(
+                username=f"poster{i}", password="p", phone_number=f"+98912000000{i}"
+            )
+            for i in range(4)
+        ]
+        codes = [user_account_code(user.pk) for user in users]
+        get_accounts(codes + [EXTERNAL_ACCOUNT])
+
+        counts = []
+        for size in (1, 4):
+            postings = [(code, Decimal("1.00")) for code in codes[:size]]
+            postings.append((EXTERNAL_ACCOUNT, -Decimal(size)))
+            with CaptureQueriesContext(connection) as ctx:
+                post_entry("deposit", postings)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_user_with_ledger_history_can_be_deleted(self):
+        process_transaction(self.user, Decimal("50.00"), "deposit")
+        code = user_account_code(self.user.pk)
+
+        self.user.delete()
+
+        account = get_accounts([code])[code]
+        self.assertIsNone(account.user_id)
+        self.assertEqual(account_balance(account), Decimal("150.00"))
+
+    def test_tournament_with_prize_pool_can_be_deleted(self):
+        process_transaction(
+            self.user, Decimal("30.00"), "entry_fee", tournament=self.tournament
+        )
+        code = prize_pool_account_code(self.tournament.pk)
+
+        self.tournament.delete()
+
+        self.assertIsNone(get_accounts([code])[code].tournament_id)
+
+    def test_unbalanced_entry_is_rejected(self):
+        with self.assertRaises(UnbalancedEntry):
+            post_entry("deposit", [(EXTERNAL_ACCOUNT, Decimal("1.00"))])
+
+
+class BulkTransactionTests(TestCase):
+    """Tests for process_transactions_bulk."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                username=f"bulk{i}", password="p", phone_number=f"+98913000000{i}"
+            )
+            for i in range(4)
+        ]
+        Wallet.objects.update(
+            total_balance=Decimal("50.00"), withdrawable_balance=Decimal("50.00")
+        )
+        open_wallet_balances()
+
+    def _balances(self):
+        return dict(
+            Wallet.objects.filter(user__in=self.users).values_list(
+                "user_id", "total_balance"
+            )
+        )
+
+    def _items(self, users, amount, transaction_type):
+        return [
+            {"user": user, "amount": Decimal(amount), "transaction_type": transaction_type}
+            for user in users
+        ]
+
+    def test_bulk_applies_every_item(self):
+        results = process_transactions_bulk(
+            self._items(self.users, "20.00", "entry_fee")
+            + self._items(self.users[:1], "5.00", "prize")
+        )
+
+        self.assertTrue(all(txn and error is None for txn, error in results))
+        balances = self._balances()
+        self.assertEqual(balances[self.users[0].pk], Decimal("35.00"))
+        self.assertEqual(balances[self.users[1].pk], Decimal("30.00"))
+        self.assertEqual(Transaction.objects.count(), 5)
+        for user in self.users:
+            self.assertEqual(user_balance(user), balances[user.pk])
+        self.assertEqual(sum(Posting.objects.values_list("amount", flat=True)), 0)
+
+    def test_bulk_is_a_constant_number_of_queries(self):
+        get_accounts(
+            [user_account_code(user.pk) for user in self.users] + [EXTERNAL_ACCOUNT]
+        )
+        counts = []
+        for users in (self.users[:1], self.users):
+            with CaptureQueriesContext(connection) as ctx:
+                process_transactions_bulk(self._items(users, "1.00", "deposit"))
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_all_or_nothing_aborts_on_one_failure(self):
+        items = self._items(self.users, "10.00", "withdrawal")
+        items[2]["amount"] = Decimal("500.00")
+
+        results = process_transactions_bulk(items)
+
+        self.assertEqual(results[2], (None, "Insufficient withdrawable balance."))
+        self.assertEqual(results[0], (None, BATCH_ABORTED))
+        self.assertEqual(set(self._balances().values()), {Decimal("50.00")})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_best_effort_applies_valid_items(self):
+        items = self._items(self.users[:2], "30.00", "withdrawal")
+        # A second withdrawal from the same wallet sees the first one.
+        items += self._items(self.users[:1], "30.00", "withdrawal")
+        items += self._items(self.users[2:3], "-1.00", "deposit")
+
+        results = process_transactions_bulk(items, all_or_nothing=False)
+
+        self.assertIsNone(results[0][1])
+        self.assertIsNone(results[1][1])
+        self.assertEqual(results[2], (None, "Insufficient withdrawable balance."))
+        self.assertEqual(results[3], (None, "Transaction amount must be positive."))
+        balances = self._balances()
+        self.assertEqual(balances[self.users[0].pk], Decimal("20.00"))
+        self.assertEqual(balances[self.users[2].pk], Decimal("50.00"))
+        self.assertEqual(Transaction.objects.count(), 2)
+
+
+class IdempotencyTests(TestCase):
+    """Tests for idempotency keys on wallet transactions."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="retrier", password="p", phone_number="+98914000000"
+        )
+        self.other = User.objects.create_user(
+            username="other", password="p", phone_number="+98914000001"
+        )
+
+    def _deposit(self, user, key):
+        with self.captureOnCommitCallbacks(execute=True):
+            return process_transaction(
+                user, Decimal("10.00"), "deposit", idempotency_key=key
+            )
+
+    def test_repeated_key_returns_the_first_transaction(self):
+        first, _ = self._deposit(self.user, "abc")
+        with self.assertNumQueries(1):
+            again, error = self._deposit(self.user, "abc")
+
+        self.assertIsNone(error)
+        self.assertEqual(again, first)
+        self.user.wallet.refresh_from_db()
+        self.assertEqual(self.user.wallet.total_balance, Decimal("10.00"))
+
+    def test_database_catches_keys_missing_from_redis(self):
+        first, _ = self._deposit(self.user, "abc")
+        get_redis_connection("default").flushdb()
+
+        again, error = self._deposit(self.user, "abc")
+
+        self.assertEqual(again, first)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_of_another_wallet_is_rejected(self):
+        self._deposit(self.user, "abc")
+        self.assertEqual(self._deposit(self.other, "abc"), (None, KEY_ALREADY_USED))
+
+    def test_bulk_replays_known_keys(self):
+        first, _ = self._deposit(self.user, "abc")
+        items = [
+            {
+                "user": user,
+                "amount": Decimal("10.00"),
+                "transaction_type": "deposit",
+                "idempotency_key": key,
+            }
+            for user, key in ((self.user, "abc"), (self.other, "def"))
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            results = process_transactions_bulk(items)
+        self.assertEqual(results[0], (first, None))
+
+        again = process_transactions_bulk(items)
+        self.assertEqual([txn for txn, _ in again], [txn for txn, _ in results])
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    @patch("wallet.services.ZarinpalService")
+    def test_repeated_payment_callback_credits_once(self, service):
+        service.return_value.verify_payment.return_value = {
+            "data": {"code": 100, "ref_id": 42},
+            "errors": [],
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            first, error = verify_deposit(self.user, 5000, "A0001")
+        again, _ = verify_deposit(self.user, 5000, "A0001")
+
+        self.assertIsNone(error)
+        self.assertEqual(again, first)
+        service.return_value.verify_payment.assert_called_once_with(5000, "A0001")
+        self.user.wallet.refresh_from_db()
+        self.assertEqual(self.user.wallet.total_balance, Decimal("5000.00"))
+
+    @patch("wallet.services.ZarinpalService")
+    def test_failed_payment_verification_credits_nothing(self, service):
+        service.return_value.verify_payment.return_value = {"error": "Timeout"}
+        self.assertEqual(verify_deposit(self.user, 5000, "A0002"), (None, "Timeout"))
+        self.assertFalse(Transaction.objects.exists())
+
+
 class WalletViewSetTests(APITestCase):
     def setUp(self):
         self.client = APIClient()
@@ -165,3 +486,50 @@ class WalletViewSetTests(APITestCase):
         other_wallet_url = f"/api/wallet/wallets/{other_user.wallet.id}/"
         response = self.client.get(other_wallet_url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TransactionViewSetTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="password", phone_number="+1112223333"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = "/api/wallet/transactions/"
+        Transaction.objects.bulk_create(
+            Transaction(wallet=self.user.wallet, amount=i + 1, transaction_type="deposit")
+            for i in range(25)
+        )
+        # Give several rows the same timestamp so the id tie-breaker matters.
+        first_ids = Transaction.objects.order_by("id").values_list("id", flat=True)[:10]
+        Transaction.objects.filter(id__in=list(first_ids)).update(
+            timestamp=Transaction.objects.order_by("id").first().timestamp
+        )
+
+    def test_cursor_pages_cover_every_transaction_once(self):
+        seen = []
+        url = f"{self.url}?page_size=10"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 10)
+            seen.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        expected = list(
+            Transaction.objects.order_by("-timestamp", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_preceding_page(self):
+        first = self.client.get(f"{self.url}?page_size=10")
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [item["id"] for item in previous.data["results"]],
+            [item["id"] for item in first.data["results"]],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{self.url}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,6 +1,8 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 
+from tournaments.pagination import KeysetPagination
+
 from .models import Transaction, Wallet
 from .serializers import TransactionSerializer, WalletSerializer
 
@@ -29,10 +31,10 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return (
             Transaction.objects.filter(wallet__user=self.request.user)
-            .order_by("-timestamp")
             .select_related("wallet")
         )